@@ -1,7 +1,7 @@
 import logging
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,6 +11,7 @@ from ...models import NovelProject, UsageMetric, User
 from ...schemas.admin import (
     AdminNovelSummary,
     DailyRequestLimit,
+    EmbeddingCacheStatistics,
     Statistics,
     UpdateLogCreate,
     UpdateLogRead,
@@ -28,10 +29,13 @@ from ...schemas.user import PasswordChangeRequest, User as UserSchema
 from ...services.auth_service import AuthService
 from ...services.admin_setting_service import AdminSettingService
 from ...services.config_service import ConfigService
+from ...services.embedding_cache_service import embedding_cache_stats
 from ...services.novel_service import NovelService
 from ...services.prompt_service import PromptService
 from ...services.update_log_service import UpdateLogService
+from ...services.vector_store_service import VectorStoreService, get_vector_store
 from ...services.user_service import UserService
+from ...utils.etag import etag_json_response, not_modified, project_etag, set_etag
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
@@ -78,6 +82,15 @@ async def read_statistics(
     return Statistics(novel_count=novel_count, user_count=user_count, api_request_count=api_request_count)
 
 
+@router.get("/embedding-cache/stats", response_model=EmbeddingCacheStatistics)
+async def read_embedding_cache_statistics(
+    vector_store: Optional[VectorStoreService] = Depends(get_vector_store),
+    _: None = Depends(get_current_admin),
+) -> EmbeddingCacheStatistics:
+    entries = await vector_store.count_cached_embeddings() if vector_store else 0
+    return EmbeddingCacheStatistics(entries=entries, **embedding_cache_stats.snapshot())
+
+
 @router.get("/users", response_model=List[UserSchema])
 async def list_users(
     service: UserService = Depends(get_user_service),
@@ -101,32 +114,64 @@ async def list_novel_projects(
 @router.get("/novel-projects/{project_id}", response_model=NovelProjectSchema)
 async def get_novel_project(
     project_id: str,
+    request: Request,
     service: NovelService = Depends(get_novel_service),
     _: None = Depends(get_current_admin),
-) -> NovelProjectSchema:
+) -> Union[NovelProjectSchema, Response]:
+    revision = await service.get_project_revision(project_id)
+    etag = project_etag(project_id, revision, "project")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     logger.info("管理员查看项目详情：%s", project_id)
-    return await service.get_project_schema_for_admin(project_id)
+    payload = await service.get_cached_payload(
+        project_id,
+        revision,
+        "project",
+        lambda: service.get_project_schema_for_admin(project_id),
+    )
+    return etag_json_response(payload, etag)
 
 
 @router.get("/novel-projects/{project_id}/sections/{section}", response_model=NovelSectionResponse)
 async def get_novel_project_section(
     project_id: str,
     section: NovelSectionType,
+    request: Request,
     service: NovelService = Depends(get_novel_service),
     _: None = Depends(get_current_admin),
-) -> NovelSectionResponse:
+) -> Union[NovelSectionResponse, Response]:
+    revision = await service.get_project_revision(project_id)
+    view = f"section-{section.value}"
+    etag = project_etag(project_id, revision, view)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     logger.info("管理员查看项目 %s 的 %s 区段", project_id, section)
-    return await service.get_section_data_for_admin(project_id, section)
+    payload = await service.get_cached_payload(
+        project_id,
+        revision,
+        view,
+        lambda: service.get_section_data_for_admin(project_id, section),
+    )
+    return etag_json_response(payload, etag)
 
 
 @router.get("/novel-projects/{project_id}/chapters/{chapter_number}", response_model=ChapterSchema)
 async def get_novel_project_chapter(
     project_id: str,
     chapter_number: int,
+    request: Request,
+    response: Response,
     service: NovelService = Depends(get_novel_service),
     _: None = Depends(get_current_admin),
-) -> ChapterSchema:
+) -> Union[ChapterSchema, Response]:
+    etag = project_etag(project_id, await service.get_project_revision(project_id), f"chapter-{chapter_number}")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     logger.info("管理员查看项目 %s 第 %s 章详情", project_id, chapter_number)
+    set_etag(response, etag)
     return await service.get_chapter_schema_for_admin(project_id, chapter_number)
 
 
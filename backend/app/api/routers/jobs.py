@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core.dependencies import get_current_user
+from ...db.session import AsyncSessionLocal, get_session
+from ...schemas.generation_job import GenerationJobRead, GenerationJobStatus
+from ...schemas.user import UserInDB
+from ...services.generation_job_service import GenerationJobService
+from ...utils.sse import SSE_HEADERS, SSE_HEARTBEAT, SSE_HEARTBEAT_SECONDS, format_sse_event
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+logger = logging.getLogger(__name__)
+
+# 订阅接口轮询任务状态的间隔
+_JOB_POLL_INTERVAL_SECONDS = 2.0
+_TERMINAL_STATUSES = {GenerationJobStatus.SUCCEEDED.value, GenerationJobStatus.FAILED.value}
+
+
+def get_generation_job_service(session: AsyncSession = Depends(get_session)) -> GenerationJobService:
+    return GenerationJobService(session)
+
+
+@router.get("", response_model=List[GenerationJobRead])
+async def list_jobs(
+    project_id: Optional[str] = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+    service: GenerationJobService = Depends(get_generation_job_service),
+    current_user: UserInDB = Depends(get_current_user),
+) -> List[GenerationJobRead]:
+    jobs = await service.list_jobs_for_user(current_user.id, project_id=project_id, limit=limit)
+    return [GenerationJobRead.model_validate(job) for job in jobs]
+
+
+@router.get("/{job_id}", response_model=GenerationJobRead)
+async def get_job(
+    job_id: str,
+    service: GenerationJobService = Depends(get_generation_job_service),
+    current_user: UserInDB = Depends(get_current_user),
+) -> GenerationJobRead:
+    job = await service.get_job_for_user(job_id, current_user.id)
+    return GenerationJobRead.model_validate(job)
+
+
+@router.get("/{job_id}/events")
+async def subscribe_job(
+    job_id: str,
+    service: GenerationJobService = Depends(get_generation_job_service),
+    current_user: UserInDB = Depends(get_current_user),
+) -> StreamingResponse:
+    """以 SSE 推送任务状态变化，任务结束后关闭连接。"""
+    await service.get_job_for_user(job_id, current_user.id)
+    return StreamingResponse(
+        _stream_job_status(job_id, current_user.id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+async def _stream_job_status(job_id: str, user_id: int) -> AsyncIterator[str]:
+    last_status: Optional[str] = None
+    idle_seconds = 0.0
+    while True:
+        async with AsyncSessionLocal() as session:
+            job = await GenerationJobService(session).get_job_for_user(job_id, user_id)
+            snapshot = GenerationJobRead.model_validate(job)
+        if snapshot.status.value != last_status:
+            last_status = snapshot.status.value
+            idle_seconds = 0.0
+            yield format_sse_event("status", snapshot.model_dump(mode="json"))
+            if last_status in _TERMINAL_STATUSES:
+                return
+        elif idle_seconds >= SSE_HEARTBEAT_SECONDS:
+            idle_seconds = 0.0
+            yield SSE_HEARTBEAT
+        await asyncio.sleep(_JOB_POLL_INTERVAL_SECONDS)
+        idle_seconds += _JOB_POLL_INTERVAL_SECONDS
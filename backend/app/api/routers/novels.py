@@ -1,8 +1,8 @@
 import json
 import logging
-from typing import Dict, List
+from typing import Dict, List, Union
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.dependencies import get_current_user
@@ -19,10 +19,13 @@ from ...schemas.novel import (
     NovelSectionResponse,
     NovelSectionType,
 )
+from ...schemas.generation_job import GenerationJobRead, GenerationJobType
 from ...schemas.user import UserInDB
+from ...services.generation_job_service import GenerationJobService, register_job_handler
 from ...services.llm_service import LLMService
 from ...services.novel_service import NovelService
 from ...services.prompt_service import PromptService
+from ...utils.etag import etag_json_response, not_modified, project_etag, set_etag
 from ...utils.json_utils import remove_think_tags, sanitize_json_like_text, unwrap_markdown_json
 
 logger = logging.getLogger(__name__)
@@ -82,35 +85,68 @@ async def list_novels(
 @router.get("/{project_id}", response_model=NovelProjectSchema)
 async def get_novel(
     project_id: str,
+    request: Request,
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> Union[NovelProjectSchema, Response]:
     novel_service = NovelService(session)
+    # 先只读修订号：客户端缓存仍然有效时直接返回 304，不加载项目内容
+    revision = await novel_service.get_project_revision(project_id, current_user.id)
+    etag = project_etag(project_id, revision, "project")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     logger.info("用户 %s 查询项目 %s", current_user.id, project_id)
-    return await novel_service.get_project_schema(project_id, current_user.id)
+    payload = await novel_service.get_cached_payload(
+        project_id,
+        revision,
+        "project",
+        lambda: novel_service.get_project_schema(project_id, current_user.id),
+    )
+    return etag_json_response(payload, etag)
 
 
 @router.get("/{project_id}/sections/{section}", response_model=NovelSectionResponse)
 async def get_novel_section(
     project_id: str,
     section: NovelSectionType,
+    request: Request,
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelSectionResponse:
+) -> Union[NovelSectionResponse, Response]:
     novel_service = NovelService(session)
+    revision = await novel_service.get_project_revision(project_id, current_user.id)
+    etag = project_etag(project_id, revision, f"section-{section.value}")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     logger.info("用户 %s 获取项目 %s 的 %s 区段", current_user.id, project_id, section)
-    return await novel_service.get_section_data(project_id, current_user.id, section)
+    payload = await novel_service.get_cached_payload(
+        project_id,
+        revision,
+        f"section-{section.value}",
+        lambda: novel_service.get_section_data(project_id, current_user.id, section),
+    )
+    return etag_json_response(payload, etag)
 
 
 @router.get("/{project_id}/chapters/{chapter_number}", response_model=ChapterSchema)
 async def get_chapter(
     project_id: str,
     chapter_number: int,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> ChapterSchema:
+) -> Union[ChapterSchema, Response]:
     novel_service = NovelService(session)
+    revision = await novel_service.get_project_revision(project_id, current_user.id)
+    etag = project_etag(project_id, revision, f"chapter-{chapter_number}")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     logger.info("用户 %s 获取项目 %s 第 %s 章", current_user.id, project_id, chapter_number)
+    set_etag(response, etag)
     return await novel_service.get_chapter_schema(project_id, current_user.id, chapter_number)
 
 
@@ -138,7 +174,7 @@ async def converse_with_concept(
     prompt_service = PromptService(session)
     llm_service = LLMService(session)
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.assert_project_owner(project_id, current_user.id)
 
     history_records = await novel_service.list_conversations(project_id)
     logger.info(
@@ -204,11 +240,39 @@ async def generate_blueprint(
     current_user: UserInDB = Depends(get_current_user),
 ) -> BlueprintGenerationResponse:
     """根据完整对话生成可执行的小说蓝图。"""
+    return await _run_blueprint_generation(project_id, session, current_user)
+
+
+@router.post(
+    "/{project_id}/blueprint/generate/jobs",
+    response_model=GenerationJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def enqueue_blueprint_generation(
+    project_id: str,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> GenerationJobRead:
+    """提交后台蓝图生成任务，结果写入任务的 result 字段。"""
+    await NovelService(session).assert_project_owner(project_id, current_user.id)
+    job = await GenerationJobService(session).enqueue(
+        user_id=current_user.id,
+        project_id=project_id,
+        job_type=GenerationJobType.BLUEPRINT_GENERATION,
+    )
+    return GenerationJobRead.model_validate(job)
+
+
+async def _run_blueprint_generation(
+    project_id: str,
+    session: AsyncSession,
+    current_user: UserInDB,
+) -> BlueprintGenerationResponse:
     novel_service = NovelService(session)
     prompt_service = PromptService(session)
     llm_service = LLMService(session)
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    project = await novel_service.ensure_project_owner(project_id, current_user.id, include_content=False)
     logger.info("项目 %s 开始生成蓝图", project_id)
 
     history_records = await novel_service.list_conversations(project_id)
@@ -276,7 +340,7 @@ async def generate_blueprint(
     if blueprint.title:
         project.title = blueprint.title
         project.status = "blueprint_ready"
-        await session.commit()
+        await novel_service.commit_project_changes(project_id)
         logger.info("项目 %s 更新标题为 %s，并标记为 blueprint_ready", project_id, blueprint.title)
 
     ai_message = (
@@ -285,6 +349,16 @@ async def generate_blueprint(
     return BlueprintGenerationResponse(blueprint=blueprint, ai_message=ai_message)
 
 
+async def _blueprint_generation_job(
+    session: AsyncSession,
+    current_user: UserInDB,
+    project_id: str,
+    payload: Dict,
+) -> Dict:
+    response = await _run_blueprint_generation(project_id, session, current_user)
+    return response.model_dump()
+
+
 @router.post("/{project_id}/blueprint/save", response_model=NovelProjectSchema)
 async def save_blueprint(
     project_id: str,
@@ -294,13 +368,13 @@ async def save_blueprint(
 ) -> NovelProjectSchema:
     """保存蓝图信息，可用于手动覆盖自动生成结果。"""
     novel_service = NovelService(session)
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    project = await novel_service.ensure_project_owner(project_id, current_user.id, include_content=False)
 
     if blueprint_data:
         await novel_service.replace_blueprint(project_id, blueprint_data)
         if blueprint_data.title:
             project.title = blueprint_data.title
-            await session.commit()
+            await novel_service.commit_project_changes(project_id)
         logger.info("项目 %s 手动保存蓝图", project_id)
     else:
         logger.warning("项目 %s 保存蓝图时未提供蓝图数据", project_id)
@@ -318,9 +392,12 @@ async def patch_blueprint(
 ) -> NovelProjectSchema:
     """局部更新蓝图字段，对世界观或角色做微调。"""
     novel_service = NovelService(session)
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.assert_project_owner(project_id, current_user.id)
 
     update_data = payload.model_dump(exclude_unset=True)
     await novel_service.patch_blueprint(project_id, update_data)
     logger.info("项目 %s 局部更新蓝图字段：%s", project_id, list(update_data.keys()))
     return await novel_service.get_project_schema(project_id, current_user.id)
+
+
+register_job_handler(GenerationJobType.BLUEPRINT_GENERATION, _blueprint_generation_job)
@@ -1,34 +1,43 @@
+import asyncio
 import json
 import logging
 import os
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple, Union
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...core.config import settings
 from ...core.dependencies import get_current_user
-from ...db.session import get_session
-from ...models.novel import Chapter, ChapterOutline
+from ...db.session import AsyncSessionLocal, get_session
+from ...models.novel import Chapter, ChapterOutline, ChapterVersion
+from ...schemas.generation_job import GenerationJobRead, GenerationJobType
 from ...schemas.novel import (
+    ChapterGenerationStatus,
+    ChapterSyncStatus,
     DeleteChapterRequest,
     EditChapterRequest,
     EvaluateChapterRequest,
     GenerateChapterRequest,
     GenerateOutlineRequest,
     NovelProject as NovelProjectSchema,
+    NovelProjectDelta,
     SelectVersionRequest,
     UpdateChapterOutlineRequest,
 )
 from ...schemas.user import UserInDB
 from ...services.chapter_context_service import ChapterContextService
-from ...services.chapter_ingest_service import ChapterIngestionService
+from ...services.chapter_ingestion_queue import chapter_ingestion_queue
+from ...services.generation_job_service import GenerationJobService, register_job_handler
+from ...services.generation_limiter import generation_limiter
 from ...services.llm_service import LLMService
 from ...services.novel_service import NovelService
 from ...services.prompt_service import PromptService
-from ...services.vector_store_service import VectorStoreService
+from ...services.vector_store_service import VectorStoreService, get_vector_store
 from ...utils.json_utils import remove_think_tags, unwrap_markdown_json
+from ...utils.sse import SSE_HEADERS, SSE_HEARTBEAT, SSE_HEARTBEAT_SECONDS, format_sse_event
 from ...repositories.system_config_repository import SystemConfigRepository
 
 router = APIRouter(prefix="/api/writer", tags=["Writer"])
@@ -39,6 +48,29 @@ async def _load_project_schema(service: NovelService, project_id: str, user_id:
     return await service.get_project_schema(project_id, user_id)
 
 
+# 写作接口的返回体：默认返回完整项目，请求携带 ?delta=true 时只返回受影响的章节与大纲
+WriterMutationResponse = Union[NovelProjectSchema, NovelProjectDelta]
+DeltaQuery = Query(False, description="为 true 时仅返回受影响的章节、大纲与项目修订号")
+
+
+async def _mutation_response(
+    service: NovelService,
+    project_id: str,
+    user_id: int,
+    delta: bool,
+    *,
+    chapter_numbers: Iterable[int] = (),
+    deleted_chapters: Iterable[int] = (),
+) -> WriterMutationResponse:
+    if delta:
+        return await service.get_project_delta(
+            project_id,
+            chapter_numbers=chapter_numbers,
+            deleted_chapters=deleted_chapters,
+        )
+    return await _load_project_schema(service, project_id, user_id)
+
+
 def _extract_tail_excerpt(text: Optional[str], limit: int = 500) -> str:
     """截取章节结尾文本，默认保留 500 字。"""
     if not text:
@@ -49,18 +81,30 @@ def _extract_tail_excerpt(text: Optional[str], limit: int = 500) -> str:
     return stripped[-limit:]
 
 
-@router.post("/novels/{project_id}/chapters/generate", response_model=NovelProjectSchema)
-async def generate_chapter(
+@dataclass
+class _ChapterGenerationPlan:
+    """章节生成前置准备的结果：目标章节、提示词与计划生成的版本数。"""
+
+    chapter: Chapter
+    writer_prompt: str
+    prompt_input: str
+    version_count: int
+
+
+async def _prepare_chapter_generation(
     project_id: str,
     request: GenerateChapterRequest,
-    session: AsyncSession = Depends(get_session),
-    current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+    session: AsyncSession,
+    current_user: UserInDB,
+) -> _ChapterGenerationPlan:
     novel_service = NovelService(session)
     prompt_service = PromptService(session)
     llm_service = LLMService(session)
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    generation_context = await novel_service.load_generation_context(
+        project_id, current_user.id, request.chapter_number
+    )
+    project = generation_context.project
     logger.info("用户 %s 开始为项目 %s 生成第 %s 章", current_user.id, project_id, request.chapter_number)
     outline = await novel_service.get_outline(project_id, request.chapter_number)
     if not outline:
@@ -71,42 +115,53 @@ async def generate_chapter(
     chapter.real_summary = None
     chapter.selected_version_id = None
     chapter.status = "generating"
-    await session.commit()
+    await novel_service.commit_project_changes(project_id)
 
     outlines_map = {item.chapter_number: item for item in project.outlines}
-    # 收集所有可用的历史章节摘要，便于在 Prompt 中提供前情背景
-    completed_chapters = []
-    latest_prev_number = -1
-    previous_summary_text = ""
-    previous_tail_excerpt = ""
-    for existing in project.chapters:
-        if existing.chapter_number >= request.chapter_number:
-            continue
-        if existing.selected_version is None or not existing.selected_version.content:
-            continue
-        if not existing.real_summary:
-            summary = await llm_service.get_summary(
-                existing.selected_version.content,
-                temperature=0.15,
-                user_id=current_user.id,
-                timeout=180.0,
-            )
-            existing.real_summary = remove_think_tags(summary)
-            await session.commit()
-        completed_chapters.append(
-            {
-                "chapter_number": existing.chapter_number,
-                "title": outlines_map.get(existing.chapter_number).title if outlines_map.get(existing.chapter_number) else f"第{existing.chapter_number}章",
-                "summary": existing.real_summary,
-            }
+    # 历史章节只加载章节行（含摘要），正文仅读取上一章，避免为长篇小说载入全部版本
+    written_chapters = generation_context.written_chapters
+    previous_chapter = generation_context.previous_chapter
+    previous_content = generation_context.previous_content
+    # Prompt 只直接用到上一章摘要：缺失时当场生成；更早章节缺失的摘要交给后台入库队列补齐，不阻塞本次生成
+    if previous_chapter is not None and not previous_chapter.real_summary:
+        summary = await llm_service.get_summary(
+            previous_content,
+            temperature=0.15,
+            user_id=current_user.id,
+            timeout=180.0,
+            cache=True,
         )
-        if existing.chapter_number > latest_prev_number:
-            latest_prev_number = existing.chapter_number
-            previous_summary_text = existing.real_summary or ""
-            previous_tail_excerpt = _extract_tail_excerpt(existing.selected_version.content)
+        previous_chapter.real_summary = remove_think_tags(summary)
+    backfill_numbers = [
+        existing.chapter_number
+        for existing in written_chapters
+        if not existing.real_summary
+        and existing.summary_status not in (ChapterSyncStatus.PENDING.value, ChapterSyncStatus.RUNNING.value)
+    ]
+    for existing in written_chapters:
+        if existing.chapter_number in backfill_numbers:
+            existing.summary_status = ChapterSyncStatus.PENDING.value
+            existing.vector_status = ChapterSyncStatus.PENDING.value
+    await novel_service.commit_project_changes(project_id)
+    for chapter_number in backfill_numbers:
+        chapter_ingestion_queue.enqueue_ingest(project_id, chapter_number)
+    if backfill_numbers:
+        logger.info("项目 %s 有 %d 章缺少摘要，已提交后台补齐", project_id, len(backfill_numbers))
+
+    # 收集已生成的历史章节摘要，便于在 Prompt 中提供前情背景
+    completed_chapters = [
+        {
+            "chapter_number": existing.chapter_number,
+            "title": outlines_map.get(existing.chapter_number).title if outlines_map.get(existing.chapter_number) else f"第{existing.chapter_number}章",
+            "summary": existing.real_summary,
+        }
+        for existing in written_chapters
+        if existing.real_summary
+    ]
+    previous_summary_text = (previous_chapter.real_summary or "") if previous_chapter else ""
+    previous_tail_excerpt = _extract_tail_excerpt(previous_content)
 
-    project_schema = await novel_service._serialize_project(project)
-    blueprint_dict = project_schema.blueprint.model_dump()
+    blueprint_dict = novel_service._build_blueprint_schema(project).model_dump()
 
     if "relationships" in blueprint_dict and blueprint_dict["relationships"]:
         for relation in blueprint_dict["relationships"]:
@@ -134,17 +189,8 @@ async def generate_chapter(
         logger.error("未配置名为 'writing' 的写作提示词，无法生成章节内容")
         raise HTTPException(status_code=500, detail="缺少写作提示词，请联系管理员配置 'writing' 提示词")
 
-    # 初始化向量检索服务，若未配置则自动降级为纯提示词生成
-    vector_store: Optional[VectorStoreService]
-    if not settings.vector_store_enabled:
-        vector_store = None
-    else:
-        try:
-            vector_store = VectorStoreService()
-        except RuntimeError as exc:
-            logger.warning("向量库初始化失败，RAG 检索被禁用: %s", exc)
-            vector_store = None
-    context_service = ChapterContextService(llm_service=llm_service, vector_store=vector_store)
+    # 复用进程内共享的向量库，若未配置则自动降级为纯提示词生成
+    context_service = ChapterContextService(llm_service=llm_service, vector_store=get_vector_store())
 
     outline_title = outline.title or f"第{outline.chapter_number}章"
     outline_summary = outline.summary or "暂无摘要"
@@ -156,6 +202,7 @@ async def generate_chapter(
         project_id=project_id,
         query_text=rag_query or outline.title or outline.summary or "",
         user_id=current_user.id,
+        target_chapter=request.chapter_number,
     )
     chunk_count = len(rag_context.chunks) if rag_context and rag_context.chunks else 0
     summary_count = len(rag_context.summaries) if rag_context and rag_context.summaries else 0
@@ -194,42 +241,6 @@ async def generate_chapter(
     ]
     prompt_input = "\n\n".join(f"{title}\n{content}" for title, content in prompt_sections if content)
     logger.debug("章节写作提示词：%s\n%s", writer_prompt, prompt_input)
-    async def _generate_single_version(idx: int) -> Dict:
-        try:
-            response = await llm_service.get_llm_response(
-                system_prompt=writer_prompt,
-                conversation_history=[{"role": "user", "content": prompt_input}],
-                temperature=0.9,
-                user_id=current_user.id,
-                timeout=600.0,
-            )
-            cleaned = remove_think_tags(response)
-            normalized = unwrap_markdown_json(cleaned)
-            try:
-                return json.loads(normalized)
-            except json.JSONDecodeError as parse_err:
-                logger.warning(
-                    "项目 %s 第 %s 章第 %s 个版本 JSON 解析失败，将原始内容作为纯文本处理: %s",
-                    project_id,
-                    request.chapter_number,
-                    idx + 1,
-                    parse_err,
-                )
-                return {"content": normalized}
-        except HTTPException:
-            raise
-        except Exception as exc:
-            logger.exception(
-                "项目 %s 生成第 %s 章第 %s 个版本时发生异常: %s",
-                project_id,
-                request.chapter_number,
-                idx + 1,
-                exc,
-            )
-            raise HTTPException(
-                status_code=500,
-                detail=f"生成章节第 {idx + 1} 个版本时失败: {str(exc)[:200]}"
-            )
 
     version_count = await _resolve_version_count(session)
     logger.info(
@@ -238,9 +249,33 @@ async def generate_chapter(
         request.chapter_number,
         version_count,
     )
-    raw_versions = []
-    for idx in range(version_count):
-        raw_versions.append(await _generate_single_version(idx))
+    return _ChapterGenerationPlan(
+        chapter=chapter,
+        writer_prompt=writer_prompt,
+        prompt_input=prompt_input,
+        version_count=version_count,
+    )
+
+
+def _parse_version_response(project_id: str, chapter_number: int, idx: int, response: str) -> Dict:
+    """清洗模型输出并尝试解析为 JSON，失败时按纯文本处理。"""
+    cleaned = remove_think_tags(response)
+    normalized = unwrap_markdown_json(cleaned)
+    try:
+        return json.loads(normalized)
+    except json.JSONDecodeError as parse_err:
+        logger.warning(
+            "项目 %s 第 %s 章第 %s 个版本 JSON 解析失败，将原始内容作为纯文本处理: %s",
+            project_id,
+            chapter_number,
+            idx + 1,
+            parse_err,
+        )
+        return {"content": normalized}
+
+
+def _split_version_payloads(raw_versions: List[Dict]) -> Tuple[List[str], List[Dict]]:
+    """将解析后的版本拆分为正文列表与元数据列表。"""
     contents: List[str] = []
     metadata: List[Dict] = []
     for variant in raw_versions:
@@ -255,15 +290,274 @@ async def generate_chapter(
         else:
             contents.append(str(variant))
             metadata.append({"raw": variant})
+    return contents, metadata
+
+
+@router.post("/novels/{project_id}/chapters/generate", response_model=WriterMutationResponse)
+async def generate_chapter(
+    project_id: str,
+    request: GenerateChapterRequest,
+    delta: bool = DeltaQuery,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> WriterMutationResponse:
+    novel_service = NovelService(session)
+    await _run_chapter_generation(project_id, request, session, current_user)
+    return await _mutation_response(
+        novel_service, project_id, current_user.id, delta, chapter_numbers=[request.chapter_number]
+    )
+
+
+@router.post(
+    "/novels/{project_id}/chapters/generate/jobs",
+    response_model=GenerationJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def enqueue_chapter_generation(
+    project_id: str,
+    request: GenerateChapterRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> GenerationJobRead:
+    """提交后台章节生成任务，立即返回任务信息，客户端通过 /api/jobs 查询进度。"""
+    return await _enqueue_job(
+        session,
+        current_user,
+        project_id,
+        GenerationJobType.CHAPTER_GENERATION,
+        request.model_dump(),
+    )
+
+
+async def _run_chapter_generation(
+    project_id: str,
+    request: GenerateChapterRequest,
+    session: AsyncSession,
+    current_user: UserInDB,
+) -> List[ChapterVersion]:
+    novel_service = NovelService(session)
+    plan = await _prepare_chapter_generation(project_id, request, session, current_user)
+    chapter = plan.chapter
+
+    async def _generate_single_version(idx: int) -> Dict:
+        # 多个版本并发生成，每个版本使用独立会话，避免共享 AsyncSession 并发访问
+        try:
+            async with generation_limiter.slot(current_user.id):
+                async with AsyncSessionLocal() as version_session:
+                    response = await LLMService(version_session).get_llm_response(
+                        system_prompt=plan.writer_prompt,
+                        conversation_history=[{"role": "user", "content": plan.prompt_input}],
+                        temperature=0.9,
+                        user_id=current_user.id,
+                        timeout=600.0,
+                    )
+            return _parse_version_response(project_id, request.chapter_number, idx, response)
+        except HTTPException:
+            raise
+        except Exception as exc:
+            logger.exception(
+                "项目 %s 生成第 %s 章第 %s 个版本时发生异常: %s",
+                project_id,
+                request.chapter_number,
+                idx + 1,
+                exc,
+            )
+            raise HTTPException(
+                status_code=500,
+                detail=f"生成章节第 {idx + 1} 个版本时失败: {str(exc)[:200]}"
+            )
 
-    await novel_service.replace_chapter_versions(chapter, contents, metadata)
+    results = await asyncio.gather(
+        *(_generate_single_version(idx) for idx in range(plan.version_count)),
+        return_exceptions=True,
+    )
+    raw_versions = []
+    failures: List[BaseException] = []
+    for idx, result in enumerate(results):
+        if isinstance(result, BaseException):
+            logger.warning(
+                "项目 %s 第 %s 章第 %s 个版本生成失败，已跳过: %s",
+                project_id,
+                request.chapter_number,
+                idx + 1,
+                getattr(result, "detail", result),
+            )
+            failures.append(result)
+            continue
+        raw_versions.append(result)
+    if not raw_versions:
+        chapter.status = ChapterGenerationStatus.FAILED.value
+        await novel_service.commit_project_changes(project_id)
+        first_error = failures[0]
+        if isinstance(first_error, HTTPException):
+            raise first_error
+        raise HTTPException(status_code=500, detail="章节生成失败，请稍后重试")
+    contents, metadata = _split_version_payloads(raw_versions)
+
+    versions = await novel_service.replace_chapter_versions(chapter, contents, metadata)
     logger.info(
         "项目 %s 第 %s 章生成完成，已写入 %s 个版本",
         project_id,
         request.chapter_number,
         len(contents),
     )
-    return await _load_project_schema(novel_service, project_id, current_user.id)
+    return versions
+
+
+@router.post("/novels/{project_id}/chapters/generate/stream")
+async def generate_chapter_stream(
+    project_id: str,
+    request: GenerateChapterRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> StreamingResponse:
+    """以 SSE 推送各版本的增量文本，全部完成后推送已保存的版本 ID。"""
+    plan = await _prepare_chapter_generation(project_id, request, session, current_user)
+    return StreamingResponse(
+        _stream_chapter_versions(
+            project_id=project_id,
+            chapter_number=request.chapter_number,
+            chapter_id=plan.chapter.id,
+            plan=plan,
+            user_id=current_user.id,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+async def _stream_chapter_versions(
+    *,
+    project_id: str,
+    chapter_number: int,
+    chapter_id: int,
+    plan: _ChapterGenerationPlan,
+    user_id: int,
+) -> AsyncIterator[str]:
+    # 响应开始后请求级会话已释放，流内的读写全部使用独立会话
+    queue: asyncio.Queue = asyncio.Queue()
+    buffers: List[List[str]] = [[] for _ in range(plan.version_count)]
+
+    async def _run_version(idx: int) -> str:
+        try:
+            async with generation_limiter.slot(user_id):
+                async with AsyncSessionLocal() as version_session:
+                    async for delta in LLMService(version_session).stream_llm_response(
+                        system_prompt=plan.writer_prompt,
+                        conversation_history=[{"role": "user", "content": plan.prompt_input}],
+                        temperature=0.9,
+                        user_id=user_id,
+                        timeout=600.0,
+                    ):
+                        buffers[idx].append(delta)
+                        await queue.put(("delta", {"version": idx, "content": delta}))
+        except Exception as exc:
+            detail = exc.detail if isinstance(exc, HTTPException) else f"生成章节第 {idx + 1} 个版本时失败: {str(exc)[:200]}"
+            logger.warning(
+                "项目 %s 第 %s 章第 %s 个版本流式生成失败: %s",
+                project_id,
+                chapter_number,
+                idx + 1,
+                detail,
+            )
+            await queue.put(("version_error", {"version": idx, "detail": detail}))
+            raise
+        await queue.put(("version_done", {"version": idx}))
+        return "".join(buffers[idx])
+
+    tasks = [asyncio.create_task(_run_version(idx)) for idx in range(plan.version_count)]
+    persist_task: Optional[asyncio.Task] = None
+    try:
+        yield format_sse_event("start", {"chapter_number": chapter_number, "version_count": plan.version_count})
+        pending = len(tasks)
+        while pending:
+            try:
+                event, payload = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # 长时间无增量时发送注释行，防止代理断开空闲连接
+                yield SSE_HEARTBEAT
+                continue
+            if event in {"version_done", "version_error"}:
+                pending -= 1
+            yield format_sse_event(event, payload)
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # 写库放在独立任务中并用 shield 保护，客户端在写入期间断开也不会让写入半途取消
+        persist_task = asyncio.create_task(
+            _persist_streamed_versions(
+                project_id, chapter_id, _collect_streamed_versions(project_id, chapter_number, tasks)
+            )
+        )
+        versions = await asyncio.shield(persist_task)
+        if versions is None:
+            yield format_sse_event("error", {"detail": "章节不存在"})
+            return
+        if not versions:
+            yield format_sse_event("error", {"detail": "章节生成失败，请稍后重试"})
+            return
+        logger.info(
+            "项目 %s 第 %s 章流式生成完成，已写入 %s 个版本",
+            project_id,
+            chapter_number,
+            len(versions),
+        )
+        yield format_sse_event(
+            "done",
+            {"chapter_number": chapter_number, "version_ids": [version.id for version in versions]},
+        )
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        if persist_task is None:
+            # 客户端在生成途中断开：保存已完整生成的版本，一个都没有则将章节标记为失败，避免停留在生成中
+            logger.info("项目 %s 第 %s 章流式生成被中断，保存已完成的版本", project_id, chapter_number)
+            background = asyncio.create_task(
+                _persist_streamed_versions(
+                    project_id,
+                    chapter_id,
+                    _collect_streamed_versions(project_id, chapter_number, tasks),
+                    only_if_generating=True,
+                )
+            )
+            _interrupted_persist_tasks.add(background)
+            background.add_done_callback(_interrupted_persist_tasks.discard)
+
+
+# 流式生成中断后在后台完成收尾写入，持有引用防止任务被提前回收
+_interrupted_persist_tasks: Set[asyncio.Task] = set()
+
+
+def _collect_streamed_versions(project_id: str, chapter_number: int, tasks: List[asyncio.Task]) -> List[Dict]:
+    return [
+        _parse_version_response(project_id, chapter_number, idx, task.result())
+        for idx, task in enumerate(tasks)
+        if task.done() and not task.cancelled() and task.exception() is None
+    ]
+
+
+async def _persist_streamed_versions(
+    project_id: str,
+    chapter_id: int,
+    raw_versions: List[Dict],
+    *,
+    only_if_generating: bool = False,
+) -> Optional[List[ChapterVersion]]:
+    """在独立会话中写入流式生成的版本；没有可用版本时将章节标记为失败。章节不存在时返回 None。"""
+    async with AsyncSessionLocal() as persist_session:
+        chapter = await persist_session.get(Chapter, chapter_id)
+        if chapter is None:
+            return None
+        if only_if_generating and chapter.status != ChapterGenerationStatus.GENERATING.value:
+            # 章节已被重新生成或手动修改，不再覆盖
+            return []
+        novel_service = NovelService(persist_session)
+        if not raw_versions:
+            chapter.status = ChapterGenerationStatus.FAILED.value
+            await novel_service.commit_project_changes(project_id)
+            return []
+        contents, metadata = _split_version_payloads(raw_versions)
+        return await novel_service.replace_chapter_versions(chapter, contents, metadata)
 
 
 async def _resolve_version_count(session: AsyncSession) -> int:
@@ -287,18 +581,17 @@ async def _resolve_version_count(session: AsyncSession) -> int:
     return 3
 
 
-@router.post("/novels/{project_id}/chapters/select", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/select", response_model=WriterMutationResponse)
 async def select_chapter_version(
     project_id: str,
     request: SelectVersionRequest,
+    delta: bool = DeltaQuery,
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> WriterMutationResponse:
     novel_service = NovelService(session)
-    llm_service = LLMService(session)
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
-    chapter = next((ch for ch in project.chapters if ch.chapter_number == request.chapter_number), None)
+    chapter = await novel_service.get_owned_chapter(project_id, current_user.id, request.chapter_number)
     if not chapter:
         logger.warning("项目 %s 未找到第 %s 章，无法选择版本", project_id, request.chapter_number)
         raise HTTPException(status_code=404, detail="章节不存在")
@@ -312,60 +605,60 @@ async def select_chapter_version(
         request.version_index,
     )
     if selected and selected.content:
-        summary = await llm_service.get_summary(
-            selected.content,
-            temperature=0.15,
-            user_id=current_user.id,
-            timeout=180.0,
-        )
-        chapter.real_summary = remove_think_tags(summary)
-        await session.commit()
+        # 摘要生成与向量入库交给后台队列，接口立即返回，进度见 summary_status / vector_status
+        await _schedule_chapter_ingestion(session, project_id, chapter)
 
-        # 选定版本后同步向量库，确保后续章节可检索到最新内容
-        vector_store: Optional[VectorStoreService]
-        if not settings.vector_store_enabled:
-            vector_store = None
-        else:
-            try:
-                vector_store = VectorStoreService()
-            except RuntimeError as exc:
-                logger.warning("向量库初始化失败，跳过章节向量同步: %s", exc)
-                vector_store = None
-
-        if vector_store:
-            ingestion_service = ChapterIngestionService(llm_service=llm_service, vector_store=vector_store)
-            outline = next((item for item in project.outlines if item.chapter_number == chapter.chapter_number), None)
-            chapter_title = outline.title if outline and outline.title else f"第{chapter.chapter_number}章"
-            await ingestion_service.ingest_chapter(
-                project_id=project_id,
-                chapter_number=chapter.chapter_number,
-                title=chapter_title,
-                content=selected.content,
-                summary=chapter.real_summary,
-                user_id=current_user.id,
-            )
-            logger.info(
-                "项目 %s 第 %s 章已同步至向量库",
-                project_id,
-                chapter.chapter_number,
-            )
-
-    return await _load_project_schema(novel_service, project_id, current_user.id)
+    return await _mutation_response(
+        novel_service, project_id, current_user.id, delta, chapter_numbers=[request.chapter_number]
+    )
 
 
-@router.post("/novels/{project_id}/chapters/evaluate", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/evaluate", response_model=WriterMutationResponse)
 async def evaluate_chapter(
     project_id: str,
     request: EvaluateChapterRequest,
+    delta: bool = DeltaQuery,
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> WriterMutationResponse:
+    novel_service = NovelService(session)
+    await _run_chapter_evaluation(project_id, request, session, current_user)
+    return await _mutation_response(
+        novel_service, project_id, current_user.id, delta, chapter_numbers=[request.chapter_number]
+    )
+
+
+@router.post(
+    "/novels/{project_id}/chapters/evaluate/jobs",
+    response_model=GenerationJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def enqueue_chapter_evaluation(
+    project_id: str,
+    request: EvaluateChapterRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> GenerationJobRead:
+    return await _enqueue_job(
+        session,
+        current_user,
+        project_id,
+        GenerationJobType.CHAPTER_EVALUATION,
+        request.model_dump(),
+    )
+
+
+async def _run_chapter_evaluation(
+    project_id: str,
+    request: EvaluateChapterRequest,
+    session: AsyncSession,
+    current_user: UserInDB,
+) -> None:
     novel_service = NovelService(session)
     prompt_service = PromptService(session)
     llm_service = LLMService(session)
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
-    chapter = next((ch for ch in project.chapters if ch.chapter_number == request.chapter_number), None)
+    chapter = await novel_service.get_owned_chapter(project_id, current_user.id, request.chapter_number)
     if not chapter:
         logger.warning("项目 %s 未找到第 %s 章，无法执行评估", project_id, request.chapter_number)
         raise HTTPException(status_code=404, detail="章节不存在")
@@ -378,8 +671,7 @@ async def evaluate_chapter(
         logger.error("缺少评估提示词，项目 %s 第 %s 章评估失败", project_id, request.chapter_number)
         raise HTTPException(status_code=500, detail="缺少评估提示词，请联系管理员配置 'evaluation' 提示词")
 
-    project_schema = await novel_service._serialize_project(project)
-    blueprint_dict = project_schema.blueprint.model_dump()
+    blueprint_dict = (await novel_service.get_blueprint_schema(project_id, current_user.id)).model_dump()
 
     versions_to_evaluate = [
         {"version_id": idx + 1, "content": version.content}
@@ -400,26 +692,60 @@ async def evaluate_chapter(
         temperature=0.3,
         user_id=current_user.id,
         timeout=360.0,
+        cache=True,
     )
     evaluation_clean = remove_think_tags(evaluation_raw)
     await novel_service.add_chapter_evaluation(chapter, None, evaluation_clean)
     logger.info("项目 %s 第 %s 章评估完成", project_id, request.chapter_number)
 
-    return await _load_project_schema(novel_service, project_id, current_user.id)
-
 
-@router.post("/novels/{project_id}/chapters/outline", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/outline", response_model=WriterMutationResponse)
 async def generate_chapter_outline(
+    project_id: str,
+    request: GenerateOutlineRequest,
+    delta: bool = DeltaQuery,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> WriterMutationResponse:
+    novel_service = NovelService(session)
+    chapter_numbers = await _run_outline_generation(project_id, request, session, current_user)
+    return await _mutation_response(
+        novel_service, project_id, current_user.id, delta, chapter_numbers=chapter_numbers
+    )
+
+
+@router.post(
+    "/novels/{project_id}/chapters/outline/jobs",
+    response_model=GenerationJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def enqueue_outline_generation(
     project_id: str,
     request: GenerateOutlineRequest,
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> GenerationJobRead:
+    return await _enqueue_job(
+        session,
+        current_user,
+        project_id,
+        GenerationJobType.OUTLINE_GENERATION,
+        request.model_dump(),
+    )
+
+
+async def _run_outline_generation(
+    project_id: str,
+    request: GenerateOutlineRequest,
+    session: AsyncSession,
+    current_user: UserInDB,
+) -> List[int]:
+    """生成并写入章节大纲，返回本次写入的章节号。"""
     novel_service = NovelService(session)
     prompt_service = PromptService(session)
     llm_service = LLMService(session)
 
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.assert_project_owner(project_id, current_user.id)
     logger.info(
         "用户 %s 请求生成项目 %s 的章节大纲，起始章节 %s，数量 %s",
         current_user.id,
@@ -432,8 +758,7 @@ async def generate_chapter_outline(
         logger.error("缺少大纲提示词，项目 %s 大纲生成失败", project_id)
         raise HTTPException(status_code=500, detail="缺少大纲提示词，请联系管理员配置 'outline' 提示词")
 
-    project_schema = await novel_service.get_project_schema(project_id, current_user.id)
-    blueprint_dict = project_schema.blueprint.model_dump()
+    blueprint_dict = (await novel_service.get_blueprint_schema(project_id, current_user.id)).model_dump()
 
     payload = {
         "novel_blueprint": blueprint_dict,
@@ -466,6 +791,7 @@ async def generate_chapter_outline(
         ) from exc
 
     new_outlines = data.get("chapters", [])
+    chapter_numbers: List[int] = []
     for item in new_outlines:
         stmt = (
             select(ChapterOutline)
@@ -476,6 +802,7 @@ async def generate_chapter_outline(
         )
         result = await session.execute(stmt)
         record = result.scalars().first()
+        chapter_numbers.append(item.get("chapter_number"))
         if record:
             record.title = item.get("title", record.title)
             record.summary = item.get("summary", record.summary)
@@ -488,21 +815,21 @@ async def generate_chapter_outline(
                     summary=item.get("summary"),
                 )
             )
-    await session.commit()
+    await novel_service.commit_project_changes(project_id)
     logger.info("项目 %s 章节大纲生成完成", project_id)
-
-    return await novel_service.get_project_schema(project_id, current_user.id)
+    return chapter_numbers
 
 
-@router.post("/novels/{project_id}/chapters/update-outline", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/update-outline", response_model=WriterMutationResponse)
 async def update_chapter_outline(
     project_id: str,
     request: UpdateChapterOutlineRequest,
+    delta: bool = DeltaQuery,
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> WriterMutationResponse:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.assert_project_owner(project_id, current_user.id)
     logger.info(
         "用户 %s 更新项目 %s 第 %s 章大纲",
         current_user.id,
@@ -528,25 +855,28 @@ async def update_chapter_outline(
 
     outline.title = request.title
     outline.summary = request.summary
-    await session.commit()
+    await novel_service.commit_project_changes(project_id)
     logger.info("项目 %s 第 %s 章大纲已更新", project_id, request.chapter_number)
 
-    return await novel_service.get_project_schema(project_id, current_user.id)
+    return await _mutation_response(
+        novel_service, project_id, current_user.id, delta, chapter_numbers=[request.chapter_number]
+    )
 
 
-@router.post("/novels/{project_id}/chapters/delete", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/delete", response_model=WriterMutationResponse)
 async def delete_chapters(
     project_id: str,
     request: DeleteChapterRequest,
+    delta: bool = DeltaQuery,
     session: AsyncSession = Depends(get_session),
+    vector_store: Optional[VectorStoreService] = Depends(get_vector_store),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> WriterMutationResponse:
     if not request.chapter_numbers:
         logger.warning("项目 %s 删除章节时未提供章节号", project_id)
         raise HTTPException(status_code=400, detail="请提供要删除的章节号列表")
     novel_service = NovelService(session)
-    llm_service = LLMService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.assert_project_owner(project_id, current_user.id)
     logger.info(
         "用户 %s 删除项目 %s 的章节 %s",
         current_user.id,
@@ -555,41 +885,31 @@ async def delete_chapters(
     )
     await novel_service.delete_chapters(project_id, request.chapter_numbers)
 
-    # 删除章节时同步清理向量库，避免过时内容被检索
-    vector_store: Optional[VectorStoreService]
-    if not settings.vector_store_enabled:
-        vector_store = None
-    else:
-        try:
-            vector_store = VectorStoreService()
-        except RuntimeError as exc:
-            logger.warning("向量库初始化失败，跳过章节向量删除: %s", exc)
-            vector_store = None
-
+    # 向量删除立即执行；该项目有排队中的入库任务时会在其后再删除一次，避免删除后又被写回
     if vector_store:
-        ingestion_service = ChapterIngestionService(llm_service=llm_service, vector_store=vector_store)
-        await ingestion_service.delete_chapters(project_id, request.chapter_numbers)
+        await chapter_ingestion_queue.delete_chapters(project_id, request.chapter_numbers)
         logger.info(
             "项目 %s 已从向量库移除章节 %s",
             project_id,
             request.chapter_numbers,
         )
 
-    return await novel_service.get_project_schema(project_id, current_user.id)
+    return await _mutation_response(
+        novel_service, project_id, current_user.id, delta, deleted_chapters=request.chapter_numbers
+    )
 
 
-@router.post("/novels/{project_id}/chapters/edit", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/edit", response_model=WriterMutationResponse)
 async def edit_chapter(
     project_id: str,
     request: EditChapterRequest,
+    delta: bool = DeltaQuery,
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> WriterMutationResponse:
     novel_service = NovelService(session)
-    llm_service = LLMService(session)
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
-    chapter = next((ch for ch in project.chapters if ch.chapter_number == request.chapter_number), None)
+    chapter = await novel_service.get_owned_chapter(project_id, current_user.id, request.chapter_number)
     if not chapter or chapter.selected_version is None:
         logger.warning("项目 %s 第 %s 章尚未生成或未选择版本，无法编辑", project_id, request.chapter_number)
         raise HTTPException(status_code=404, detail="章节尚未生成或未选择版本")
@@ -599,37 +919,75 @@ async def edit_chapter(
     logger.info("用户 %s 更新了项目 %s 第 %s 章内容", current_user.id, project_id, request.chapter_number)
 
     if request.content.strip():
-        summary = await llm_service.get_summary(
-            request.content,
-            temperature=0.15,
-            user_id=current_user.id,
-            timeout=180.0,
-        )
-        chapter.real_summary = remove_think_tags(summary)
-    await session.commit()
-
-    vector_store: Optional[VectorStoreService]
-    if not settings.vector_store_enabled:
-        vector_store = None
+        await _schedule_chapter_ingestion(session, project_id, chapter)
     else:
-        try:
-            vector_store = VectorStoreService()
-        except RuntimeError as exc:
-            logger.warning("向量库初始化失败，跳过章节向量更新: %s", exc)
-            vector_store = None
-
-    if vector_store and chapter.selected_version and chapter.selected_version.content:
-        ingestion_service = ChapterIngestionService(llm_service=llm_service, vector_store=vector_store)
-        outline = next((item for item in project.outlines if item.chapter_number == chapter.chapter_number), None)
-        chapter_title = outline.title if outline and outline.title else f"第{chapter.chapter_number}章"
-        await ingestion_service.ingest_chapter(
-            project_id=project_id,
-            chapter_number=chapter.chapter_number,
-            title=chapter_title,
-            content=chapter.selected_version.content,
-            summary=chapter.real_summary,
-            user_id=current_user.id,
-        )
-        logger.info("项目 %s 第 %s 章更新内容已同步至向量库", project_id, chapter.chapter_number)
+        await novel_service.commit_project_changes(project_id)
+
+    return await _mutation_response(
+        novel_service, project_id, current_user.id, delta, chapter_numbers=[request.chapter_number]
+    )
+
+
+async def _schedule_chapter_ingestion(session: AsyncSession, project_id: str, chapter: Chapter) -> None:
+    """清空旧摘要并将章节标记为待处理，提交事务后交给后台入库队列。"""
+    chapter.real_summary = None
+    chapter.summary_status = ChapterSyncStatus.PENDING.value
+    chapter.vector_status = ChapterSyncStatus.PENDING.value
+    await NovelService(session).commit_project_changes(project_id)
+    chapter_ingestion_queue.enqueue_ingest(project_id, chapter.chapter_number)
+    logger.info("项目 %s 第 %s 章已提交后台摘要与向量入库", project_id, chapter.chapter_number)
+
+
+async def _enqueue_job(
+    session: AsyncSession,
+    current_user: UserInDB,
+    project_id: str,
+    job_type: GenerationJobType,
+    payload: Dict[str, Any],
+) -> GenerationJobRead:
+    await NovelService(session).assert_project_owner(project_id, current_user.id)
+    job = await GenerationJobService(session).enqueue(
+        user_id=current_user.id,
+        project_id=project_id,
+        job_type=job_type,
+        payload=payload,
+    )
+    return GenerationJobRead.model_validate(job)
+
+
+async def _chapter_generation_job(
+    session: AsyncSession,
+    current_user: UserInDB,
+    project_id: str,
+    payload: Dict[str, Any],
+) -> Dict[str, Any]:
+    request = GenerateChapterRequest(**payload)
+    versions = await _run_chapter_generation(project_id, request, session, current_user)
+    return {"chapter_number": request.chapter_number, "version_ids": [version.id for version in versions]}
+
+
+async def _chapter_evaluation_job(
+    session: AsyncSession,
+    current_user: UserInDB,
+    project_id: str,
+    payload: Dict[str, Any],
+) -> Dict[str, Any]:
+    request = EvaluateChapterRequest(**payload)
+    await _run_chapter_evaluation(project_id, request, session, current_user)
+    return {"chapter_number": request.chapter_number}
+
+
+async def _outline_generation_job(
+    session: AsyncSession,
+    current_user: UserInDB,
+    project_id: str,
+    payload: Dict[str, Any],
+) -> Dict[str, Any]:
+    request = GenerateOutlineRequest(**payload)
+    chapter_numbers = await _run_outline_generation(project_id, request, session, current_user)
+    return {"start_chapter": request.start_chapter, "outline_count": len(chapter_numbers)}
+
 
-    return await novel_service.get_project_schema(project_id, current_user.id)
+register_job_handler(GenerationJobType.CHAPTER_GENERATION, _chapter_generation_job)
+register_job_handler(GenerationJobType.CHAPTER_EVALUATION, _chapter_evaluation_job)
+register_job_handler(GenerationJobType.OUTLINE_GENERATION, _outline_generation_job)
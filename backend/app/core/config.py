@@ -77,6 +77,94 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("WRITER_CHAPTER_VERSION_COUNT", "WRITER_CHAPTER_VERSIONS"),
         description="每次生成章节的候选版本数量",
     )
+    writer_generation_concurrency: int = Field(
+        default=8,
+        ge=1,
+        env="WRITER_GENERATION_CONCURRENCY",
+        description="全局同时进行的章节版本生成数量上限",
+    )
+    writer_user_generation_concurrency: int = Field(
+        default=3,
+        ge=1,
+        env="WRITER_USER_GENERATION_CONCURRENCY",
+        description="单个用户同时进行的章节版本生成数量上限",
+    )
+    generation_job_workers: int = Field(
+        default=4,
+        ge=1,
+        env="GENERATION_JOB_WORKERS",
+        description="后台生成任务的 worker 数量",
+    )
+    generation_job_max_attempts: int = Field(
+        default=3,
+        ge=1,
+        env="GENERATION_JOB_MAX_ATTEMPTS",
+        description="后台任务因服务重启中断后的最大执行次数",
+    )
+    chapter_ingestion_max_attempts: int = Field(
+        default=3,
+        ge=1,
+        env="CHAPTER_INGESTION_MAX_ATTEMPTS",
+        description="章节后台摘要与向量入库的最大尝试次数",
+    )
+    chapter_ingestion_retry_base_seconds: float = Field(
+        default=5.0,
+        ge=0.0,
+        env="CHAPTER_INGESTION_RETRY_BASE_SECONDS",
+        description="章节后台入库失败后的首次重试间隔（秒），之后按 2 倍递增",
+    )
+    project_payload_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        ge=0,
+        env="PROJECT_PAYLOAD_CACHE_MAX_BYTES",
+        description="项目与分区序列化结果缓存的内存上限（字节），键包含项目修订号，0 表示关闭",
+    )
+    llm_http_max_connections: int = Field(
+        default=100,
+        ge=1,
+        env="LLM_HTTP_MAX_CONNECTIONS",
+        description="单个 LLM 客户端连接池的最大连接数",
+    )
+    llm_http_max_keepalive_connections: int = Field(
+        default=20,
+        ge=0,
+        env="LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS",
+        description="单个 LLM 客户端保持长连接的最大数量",
+    )
+    llm_http_keepalive_expiry: float = Field(
+        default=60.0,
+        ge=0,
+        env="LLM_HTTP_KEEPALIVE_EXPIRY",
+        description="空闲长连接的保留时间，单位秒",
+    )
+    llm_http2_enabled: bool = Field(
+        default=True,
+        env="LLM_HTTP2_ENABLED",
+        description="是否在安装 h2 依赖时启用 HTTP/2",
+    )
+    llm_client_registry_size: int = Field(
+        default=64,
+        ge=1,
+        env="LLM_CLIENT_REGISTRY_SIZE",
+        description="进程内缓存的 LLM 客户端数量上限（按提供方、Key、Base URL 区分）",
+    )
+    llm_cache_enabled: bool = Field(
+        default=True,
+        env="LLM_CACHE_ENABLED",
+        description="是否启用 LLM 响应缓存（仅对显式开启缓存的调用生效，如摘要与评估）",
+    )
+    llm_cache_ttl_seconds: int = Field(
+        default=7 * 24 * 3600,
+        ge=60,
+        env="LLM_CACHE_TTL_SECONDS",
+        description="LLM 响应缓存的有效期（秒）",
+    )
+    llm_cache_max_entries: int = Field(
+        default=5000,
+        ge=1,
+        env="LLM_CACHE_MAX_ENTRIES",
+        description="LLM 响应缓存的最大条目数，超出后按最近访问时间淘汰",
+    )
     embedding_provider: str = Field(
         default="openai",
         env="EMBEDDING_PROVIDER",
@@ -113,6 +201,41 @@ class Settings(BaseSettings):
         env="OLLAMA_EMBEDDING_MODEL",
         description="Ollama 嵌入模型名称",
     )
+    embedding_batch_size: int = Field(
+        default=64,
+        ge=1,
+        env="EMBEDDING_BATCH_SIZE",
+        description="单次嵌入请求包含的最大文本条数",
+    )
+    embedding_batch_max_tokens: int = Field(
+        default=8000,
+        ge=256,
+        env="EMBEDDING_BATCH_MAX_TOKENS",
+        description="单次嵌入请求的估算 token 上限（按字符数保守估算）",
+    )
+    embedding_cache_enabled: bool = Field(
+        default=True,
+        env="EMBEDDING_CACHE_ENABLED",
+        description="是否在向量库中缓存文本嵌入（按模型与文本哈希复用）",
+    )
+    embedding_cache_max_entries: int = Field(
+        default=50000,
+        ge=100,
+        env="EMBEDDING_CACHE_MAX_ENTRIES",
+        description="嵌入缓存的最大条目数，超出后按最近使用时间淘汰",
+    )
+    embedding_cache_max_age_seconds: int = Field(
+        default=30 * 24 * 3600,
+        ge=3600,
+        env="EMBEDDING_CACHE_MAX_AGE_SECONDS",
+        description="嵌入缓存条目在未被使用时的最长保留时间（秒）",
+    )
+    embedding_cache_purge_interval_seconds: int = Field(
+        default=3600,
+        ge=60,
+        env="EMBEDDING_CACHE_PURGE_INTERVAL_SECONDS",
+        description="嵌入缓存清理任务的执行间隔（秒）",
+    )
     vector_db_url: Optional[str] = Field(
         default=None,
         env="VECTOR_DB_URL",
@@ -147,6 +270,89 @@ class Settings(BaseSettings):
         env="VECTOR_CHUNK_OVERLAP",
         description="章节分块重叠字数",
     )
+    vector_index_enabled: bool = Field(
+        default=True,
+        env="VECTOR_INDEX_ENABLED",
+        description="libsql 支持时是否使用 F32_BLOB 列与原生向量索引（DiskANN）",
+    )
+    vector_index_oversample: int = Field(
+        default=8,
+        ge=1,
+        env="VECTOR_INDEX_OVERSAMPLE",
+        description="原生向量索引检索时的候选倍数（Top-K × 倍数），用于回表后按项目过滤",
+    )
+    vector_index_max_candidates: int = Field(
+        default=1024,
+        ge=1,
+        env="VECTOR_INDEX_MAX_CANDIDATES",
+        description="原生向量索引候选不足时逐轮扩大的候选数上限，超过后改走按项目的精确扫描",
+    )
+    vector_fallback_cache_projects: int = Field(
+        default=32,
+        ge=1,
+        env="VECTOR_FALLBACK_CACHE_PROJECTS",
+        description="应用层相似度回退时在内存中缓存向量矩阵的项目数上限",
+    )
+    vector_write_batch_size: int = Field(
+        default=64,
+        ge=1,
+        env="VECTOR_WRITE_BATCH_SIZE",
+        description="向量库批量写入时每个事务包含的记录数",
+    )
+    vector_retrieval_cache_size: int = Field(
+        default=256,
+        ge=0,
+        env="VECTOR_RETRIEVAL_CACHE_SIZE",
+        description="检索结果 LRU 缓存的条目上限，键包含项目向量版本号，0 表示关闭",
+    )
+    vector_recency_weight: float = Field(
+        default=0.1,
+        ge=0.0,
+        env="VECTOR_RECENCY_WEIGHT",
+        description="生成章节时的远近加权：排序分 = 距离 + 权重 × 章节间隔 / 目标章节号，0 表示关闭",
+    )
+    vector_mmr_lambda: float = Field(
+        default=0.7,
+        ge=0.0,
+        le=1.0,
+        env="VECTOR_MMR_LAMBDA",
+        description="片段 MMR 重排的相关度权重，1 表示只看相关度，越小越偏向多样性",
+    )
+    vector_mmr_candidate_multiplier: int = Field(
+        default=3,
+        ge=1,
+        env="VECTOR_MMR_CANDIDATE_MULTIPLIER",
+        description="片段检索时的候选倍数（Top-K × 倍数），合并相邻片段与 MMR 重排后再截取 Top-K",
+    )
+    vector_hybrid_search: bool = Field(
+        default=True,
+        env="VECTOR_HYBRID_SEARCH",
+        description="是否维护 FTS5 关键词索引，并在检索时将 BM25 与向量结果按 RRF 融合",
+    )
+    vector_keyword_candidates: int = Field(
+        default=40,
+        ge=1,
+        env="VECTOR_KEYWORD_CANDIDATES",
+        description="混合检索时关键词与向量两路各自召回的候选数",
+    )
+    vector_keyword_max_terms: int = Field(
+        default=64,
+        ge=1,
+        env="VECTOR_KEYWORD_MAX_TERMS",
+        description="关键词检索时从查询文本中提取的检索词上限",
+    )
+    vector_rrf_k: int = Field(
+        default=60,
+        ge=1,
+        env="VECTOR_RRF_K",
+        description="倒数排名融合（RRF）的平滑常数 k",
+    )
+    vector_keyword_prefilter_threshold: int = Field(
+        default=5000,
+        ge=0,
+        env="VECTOR_KEYWORD_PREFILTER_THRESHOLD",
+        description="无原生向量索引时，项目行数超过该值且关键词命中充足则仅对关键词候选做向量打分",
+    )
 
     # -------------------- Linux.do OAuth 配置 --------------------
     linuxdo_client_id: Optional[str] = Field(default=None, env="LINUXDO_CLIENT_ID", description="Linux.do OAuth Client ID")
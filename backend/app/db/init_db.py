@@ -2,7 +2,7 @@ import logging
 
 from pathlib import Path
 
-from sqlalchemy import select, text
+from sqlalchemy import inspect, select, text
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
@@ -16,6 +16,22 @@ from .session import AsyncSessionLocal, engine
 
 logger = logging.getLogger(__name__)
 
+# create_all 不会为已有表补列，新增列在此登记：(表名, 列名, 列定义)
+_ADDED_COLUMNS = (
+    ("novel_projects", "revision", "INT NOT NULL DEFAULT 0"),
+    ("chapters", "summary_status", "VARCHAR(16) NOT NULL DEFAULT 'none'"),
+    ("chapters", "vector_status", "VARCHAR(16) NOT NULL DEFAULT 'none'"),
+)
+
+# create_all 同样不会为已有表补索引，需与模型 __table_args__ 保持一致：(表名, 索引名, 列, 是否唯一)
+_ADDED_INDEXES = (
+    ("novel_conversations", "uq_conversations_project_seq", ("project_id", "seq"), True),
+    ("chapter_outlines", "uq_outline_project_chapter", ("project_id", "chapter_number"), True),
+    ("chapters", "uq_chapter_project_number", ("project_id", "chapter_number"), True),
+    ("chapter_versions", "idx_chapter_versions_chapter", ("chapter_id", "created_at"), False),
+    ("chapter_evaluations", "idx_chapter_evaluations_chapter", ("chapter_id", "created_at"), False),
+)
+
 
 async def init_db() -> None:
     """初始化数据库结构并确保默认管理员存在。"""
@@ -25,6 +41,8 @@ async def init_db() -> None:
     # ---- 第一步：创建所有表结构 ----
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await _ensure_added_columns(conn)
+        await _ensure_added_indexes(conn)
     logger.info("数据库表结构已初始化")
 
     # ---- 第二步：确保管理员账号至少存在一个 ----
@@ -70,6 +88,76 @@ async def init_db() -> None:
         await session.commit()
 
 
+async def _ensure_added_columns(conn) -> None:
+    """为旧版数据库补齐后续新增的列，MySQL 与 SQLite 均使用 ALTER TABLE ... ADD COLUMN。"""
+
+    def _find_missing(sync_conn):
+        inspector = inspect(sync_conn)
+        existing = {}
+        missing = []
+        for table, column, ddl in _ADDED_COLUMNS:
+            if table not in existing:
+                existing[table] = {item["name"] for item in inspector.get_columns(table)}
+            if column not in existing[table]:
+                missing.append((table, column, ddl))
+        return missing
+
+    for table, column, ddl in await conn.run_sync(_find_missing):
+        await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        logger.info("已为表 %s 补充列 %s", table, column)
+
+
+async def _ensure_added_indexes(conn) -> None:
+    """为旧版数据库补齐复合索引与唯一约束，已存在相同列组合的索引时跳过，可重复执行。
+
+    MySQL 使用 ALGORITHM=INPLACE, LOCK=NONE 在线建索引，不阻塞读写；
+    若已有数据违反唯一性，则仅创建普通索引并记录告警，需人工清理重复数据后于下次启动补上唯一约束。
+    """
+
+    def _find_missing(sync_conn):
+        inspector = inspect(sync_conn)
+        missing = []
+        for table, name, columns, unique in _ADDED_INDEXES:
+            indexes = inspector.get_indexes(table)
+            unique_columns = [tuple(item["column_names"]) for item in inspector.get_unique_constraints(table)]
+            unique_columns += [tuple(item["column_names"]) for item in indexes if item.get("unique")]
+            all_columns = unique_columns + [tuple(item["column_names"]) for item in indexes]
+            if columns in (unique_columns if unique else all_columns):
+                continue
+            missing.append((table, name, columns, unique, columns in all_columns))
+        return missing
+
+    is_mysql = conn.dialect.name == "mysql"
+    for table, name, columns, unique, has_plain_index in await conn.run_sync(_find_missing):
+        column_list = ", ".join(columns)
+        if unique:
+            duplicates = await conn.scalar(
+                text(
+                    f"SELECT COUNT(*) FROM (SELECT 1 FROM {table} GROUP BY {column_list} "
+                    "HAVING COUNT(*) > 1) AS duplicated"
+                )
+            )
+            if duplicates:
+                logger.warning(
+                    "表 %s 存在 %d 组重复的 (%s)，暂不创建唯一索引 %s，请清理重复数据后重启",
+                    table,
+                    duplicates,
+                    column_list,
+                    name,
+                )
+                if has_plain_index:
+                    continue
+                unique = False
+                name = name.replace("uq_", "idx_", 1)
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        if is_mysql:
+            ddl = f"ALTER TABLE {table} ADD {kind} {name} ({column_list}), ALGORITHM=INPLACE, LOCK=NONE"
+        else:
+            ddl = f"CREATE {kind} {name} ON {table} ({column_list})"
+        await conn.execute(text(ddl))
+        logger.info("已为表 %s 补充索引 %s (%s)", table, name, column_list)
+
+
 async def _ensure_database_exists() -> None:
     """在首次连接前确认数据库存在，针对不同驱动做最小化准备工作。"""
     url = make_url(settings.sqlalchemy_database_uri)
@@ -12,6 +12,11 @@ from .db.init_db import init_db
 from .services.prompt_service import PromptService
 from .db.session import AsyncSessionLocal
 from .api.routers import api_router
+from .services.embedding_cache_service import embedding_cache_purger
+from .services.chapter_ingestion_queue import chapter_ingestion_queue
+from .services.generation_job_service import generation_job_worker
+from .services.vector_store_service import close_vector_store, init_vector_store
+from .utils.llm_tool import llm_client_registry
 
 
 dictConfig(
@@ -71,7 +76,21 @@ async def lifespan(app: FastAPI):
     async with AsyncSessionLocal() as session:
         prompt_service = PromptService(session)
         await prompt_service.preload()
+    # 创建共享的向量库连接并校验表结构，避免每个请求重复建表检查；迁移丢弃的旧向量交由入库队列重建
+    await init_vector_store(on_vectors_dropped=chapter_ingestion_queue.requeue_chapters)
+    # 启动后台任务 worker，并恢复上次未完成的任务
+    await generation_job_worker.start()
+    # 启动章节后台入库队列，并恢复上次未完成的章节
+    await chapter_ingestion_queue.start()
+    # 定期清理嵌入缓存中长期未使用的向量
+    await embedding_cache_purger.start()
     yield
+    await embedding_cache_purger.stop()
+    await chapter_ingestion_queue.stop()
+    await generation_job_worker.stop()
+    await close_vector_store()
+    # 应用退出时关闭复用的 LLM 连接池
+    await llm_client_registry.aclose()
 
 
 app = FastAPI(
@@ -88,6 +107,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 跨域部署时前端需要读取 ETag 以发起条件请求
+    expose_headers=["ETag"],
 )
 
 app.include_router(api_router)
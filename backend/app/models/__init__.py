@@ -1,7 +1,9 @@
 """集中导出 ORM 模型，确保 SQLAlchemy 元数据在初始化时被正确加载。"""
 
 from .admin_setting import AdminSetting
+from .generation_job import GenerationJob
 from .llm_config import LLMConfig
+from .llm_response_cache import LLMResponseCache
 from .novel import (
     BlueprintCharacter,
     BlueprintRelationship,
@@ -22,7 +24,9 @@ from .system_config import SystemConfig
 
 __all__ = [
     "AdminSetting",
+    "GenerationJob",
     "LLMConfig",
+    "LLMResponseCache",
     "NovelConversation",
     "NovelBlueprint",
     "BlueprintCharacter",
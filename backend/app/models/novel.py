@@ -3,7 +3,19 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import JSON, BigInteger, DateTime, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -36,6 +48,8 @@ class NovelProject(Base):
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     initial_prompt: Mapped[Optional[str]] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String(32), default="draft")
+    # 项目修订号：项目内任何对外可见的数据变化都会递增，供客户端增量同步
+    revision: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -64,12 +78,14 @@ class NovelConversation(Base):
     """对话记录表，存储概念阶段的连续对话。"""
 
     __tablename__ = "novel_conversations"
+    __table_args__ = (UniqueConstraint("project_id", "seq", name="uq_conversations_project_seq"),)
 
     id: Mapped[int] = mapped_column(BIGINT_PK_TYPE, primary_key=True, autoincrement=True)
     project_id: Mapped[str] = mapped_column(ForeignKey("novel_projects.id", ondelete="CASCADE"), nullable=False)
     seq: Mapped[int] = mapped_column(Integer, nullable=False)
     role: Mapped[str] = mapped_column(String(32), nullable=False)
-    content: Mapped[str] = mapped_column(LONG_TEXT_TYPE, nullable=False)
+    # 正文按需加载：默认查询不读取该列，需要时通过 undefer 显式加载，未加载时访问会直接报错
+    content: Mapped[str] = mapped_column(LONG_TEXT_TYPE, nullable=False, deferred=True, deferred_raiseload=True)
     metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSON)
     metadata = _MetadataAccessor()
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -137,6 +153,7 @@ class ChapterOutline(Base):
     """章节纲要。"""
 
     __tablename__ = "chapter_outlines"
+    __table_args__ = (UniqueConstraint("project_id", "chapter_number", name="uq_outline_project_chapter"),)
 
     id: Mapped[int] = mapped_column(BIGINT_PK_TYPE, primary_key=True, autoincrement=True)
     project_id: Mapped[str] = mapped_column(ForeignKey("novel_projects.id", ondelete="CASCADE"), nullable=False)
@@ -151,6 +168,7 @@ class Chapter(Base):
     """章节正文状态，指向选中的版本。"""
 
     __tablename__ = "chapters"
+    __table_args__ = (UniqueConstraint("project_id", "chapter_number", name="uq_chapter_project_number"),)
 
     id: Mapped[int] = mapped_column(BIGINT_PK_TYPE, primary_key=True, autoincrement=True)
     project_id: Mapped[str] = mapped_column(ForeignKey("novel_projects.id", ondelete="CASCADE"), nullable=False)
@@ -158,6 +176,9 @@ class Chapter(Base):
     real_summary: Mapped[Optional[str]] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String(32), default="not_generated")
     word_count: Mapped[int] = mapped_column(Integer, default=0)
+    # 后台摘要生成与向量入库的进度，取值见 schemas.novel.ChapterSyncStatus
+    summary_status: Mapped[str] = mapped_column(String(16), default="none", server_default="none")
+    vector_status: Mapped[str] = mapped_column(String(16), default="none", server_default="none")
     selected_version_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("chapter_versions.id", ondelete="SET NULL"), nullable=True
     )
@@ -188,12 +209,14 @@ class ChapterVersion(Base):
     """章节生成的不同版本文本。"""
 
     __tablename__ = "chapter_versions"
+    __table_args__ = (Index("idx_chapter_versions_chapter", "chapter_id", "created_at"),)
 
     id: Mapped[int] = mapped_column(BIGINT_PK_TYPE, primary_key=True, autoincrement=True)
     chapter_id: Mapped[int] = mapped_column(ForeignKey("chapters.id", ondelete="CASCADE"), nullable=False)
     version_label: Mapped[Optional[str]] = mapped_column(String(64))
     provider: Mapped[Optional[str]] = mapped_column(String(64))
-    content: Mapped[str] = mapped_column(LONG_TEXT_TYPE, nullable=False)
+    # 正文按需加载：默认查询不读取该列，需要时通过 undefer 显式加载，未加载时访问会直接报错
+    content: Mapped[str] = mapped_column(LONG_TEXT_TYPE, nullable=False, deferred=True, deferred_raiseload=True)
     metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSON)
     metadata = _MetadataAccessor()
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -212,6 +235,7 @@ class ChapterEvaluation(Base):
     """章节评估记录。"""
 
     __tablename__ = "chapter_evaluations"
+    __table_args__ = (Index("idx_chapter_evaluations_chapter", "chapter_id", "created_at"),)
 
     id: Mapped[int] = mapped_column(BIGINT_PK_TYPE, primary_key=True, autoincrement=True)
     chapter_id: Mapped[int] = mapped_column(ForeignKey("chapters.id", ondelete="CASCADE"), nullable=False)
@@ -0,0 +1,42 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update
+
+from .base import BaseRepository
+from ..models import GenerationJob
+
+
+class GenerationJobRepository(BaseRepository[GenerationJob]):
+    model = GenerationJob
+
+    async def list_by_user(
+        self,
+        user_id: int,
+        *,
+        project_id: Optional[str] = None,
+        limit: int = 20,
+    ) -> Iterable[GenerationJob]:
+        stmt = select(GenerationJob).where(GenerationJob.user_id == user_id)
+        if project_id:
+            stmt = stmt.where(GenerationJob.project_id == project_id)
+        stmt = stmt.order_by(GenerationJob.created_at.desc()).limit(limit)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def list_unfinished(self) -> Iterable[GenerationJob]:
+        stmt = (
+            select(GenerationJob)
+            .where(GenerationJob.status.in_(("pending", "running")))
+            .order_by(GenerationJob.created_at.asc())
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def claim(self, job_id: str) -> bool:
+        """以条件更新的方式抢占任务，避免同一任务被重复执行。"""
+        result = await self.session.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, GenerationJob.status == "pending")
+            .values(status="running", attempts=GenerationJob.attempts + 1)
+        )
+        return result.rowcount == 1
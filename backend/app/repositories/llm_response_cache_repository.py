@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, func, select, update
+
+from .base import BaseRepository
+from ..models import LLMResponseCache
+
+
+class LLMResponseCacheRepository(BaseRepository[LLMResponseCache]):
+    model = LLMResponseCache
+
+    async def get_valid(self, cache_key: str, now: datetime) -> Optional[LLMResponseCache]:
+        stmt = select(LLMResponseCache).where(
+            LLMResponseCache.cache_key == cache_key,
+            LLMResponseCache.expires_at > now,
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
+
+    async def touch(self, cache_key: str, now: datetime) -> None:
+        await self.session.execute(
+            update(LLMResponseCache)
+            .where(LLMResponseCache.cache_key == cache_key)
+            .values(hit_count=LLMResponseCache.hit_count + 1, last_accessed_at=now)
+        )
+
+    async def purge_expired(self, now: datetime) -> int:
+        result = await self.session.execute(delete(LLMResponseCache).where(LLMResponseCache.expires_at <= now))
+        return result.rowcount or 0
+
+    async def trim_to(self, max_entries: int) -> int:
+        """按最近访问时间淘汰最旧的条目，使总数不超过上限。"""
+        total = (await self.session.execute(select(func.count(LLMResponseCache.cache_key)))).scalar_one()
+        overflow = total - max_entries
+        if overflow <= 0:
+            return 0
+        stale_keys = (
+            await self.session.execute(
+                select(LLMResponseCache.cache_key)
+                .order_by(LLMResponseCache.last_accessed_at.asc())
+                .limit(overflow)
+            )
+        ).scalars().all()
+        if not stale_keys:
+            return 0
+        result = await self.session.execute(
+            delete(LLMResponseCache).where(LLMResponseCache.cache_key.in_(stale_keys))
+        )
+        return result.rowcount or 0
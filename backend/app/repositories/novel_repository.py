@@ -1,16 +1,24 @@
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
 
 from .base import BaseRepository
-from ..models import Chapter, NovelProject
+from ..models import Chapter, ChapterOutline, ChapterVersion, NovelConversation, NovelProject
 
 
 class NovelRepository(BaseRepository[NovelProject]):
     model = NovelProject
 
-    async def get_by_id(self, project_id: str) -> Optional[NovelProject]:
+    async def get_by_id(self, project_id: str, *, include_content: bool = True) -> Optional[NovelProject]:
+        """加载完整项目；include_content=False 时不读取对话与章节版本的正文列。"""
+        conversations = selectinload(NovelProject.conversations)
+        versions = selectinload(NovelProject.chapters).selectinload(Chapter.versions)
+        selected_version = selectinload(NovelProject.chapters).selectinload(Chapter.selected_version)
+        if include_content:
+            conversations = conversations.undefer(NovelConversation.content)
+            versions = versions.undefer(ChapterVersion.content)
+            selected_version = selected_version.undefer(ChapterVersion.content)
         stmt = (
             select(NovelProject)
             .where(NovelProject.id == project_id)
@@ -19,15 +27,115 @@ class NovelRepository(BaseRepository[NovelProject]):
                 selectinload(NovelProject.characters),
                 selectinload(NovelProject.relationships_),
                 selectinload(NovelProject.outlines),
-                selectinload(NovelProject.conversations),
-                selectinload(NovelProject.chapters).selectinload(Chapter.versions),
+                conversations,
+                versions,
                 selectinload(NovelProject.chapters).selectinload(Chapter.evaluations),
-                selectinload(NovelProject.chapters).selectinload(Chapter.selected_version),
+                selected_version,
             )
         )
         result = await self.session.execute(stmt)
         return result.scalars().first()
 
+    async def get_owner_id(self, project_id: str) -> Optional[int]:
+        """仅查询项目归属用户，用于不需要项目内容的权限校验。"""
+        return await self.session.scalar(select(NovelProject.user_id).where(NovelProject.id == project_id))
+
+    async def get_revision(self, project_id: str) -> Optional[int]:
+        return await self.session.scalar(select(NovelProject.revision).where(NovelProject.id == project_id))
+
+    async def get_owner_and_revision(self, project_id: str) -> Optional[Tuple[int, int]]:
+        result = await self.session.execute(
+            select(NovelProject.user_id, NovelProject.revision).where(NovelProject.id == project_id)
+        )
+        row = result.first()
+        return (row.user_id, row.revision) if row else None
+
+    async def bump_revision(self, project_id: str) -> None:
+        """递增项目修订号，由调用方提交事务；显式保留 updated_at，避免状态类变更改动最近编辑时间。"""
+        await self.session.execute(
+            update(NovelProject)
+            .where(NovelProject.id == project_id)
+            .values(revision=NovelProject.revision + 1, updated_at=NovelProject.updated_at)
+        )
+
+    async def get_with_blueprint(self, project_id: str) -> Optional[NovelProject]:
+        """加载项目及蓝图相关数据（角色、关系、大纲），不加载对话与章节正文。"""
+        stmt = (
+            select(NovelProject)
+            .where(NovelProject.id == project_id)
+            .options(
+                selectinload(NovelProject.blueprint),
+                selectinload(NovelProject.characters),
+                selectinload(NovelProject.relationships_),
+                selectinload(NovelProject.outlines),
+            )
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
+
+    async def get_chapter(self, project_id: str, chapter_number: int) -> Optional[Chapter]:
+        """加载单个章节及其全部版本（含正文）。"""
+        stmt = (
+            select(Chapter)
+            .where(Chapter.project_id == project_id, Chapter.chapter_number == chapter_number)
+            .options(
+                selectinload(Chapter.versions).undefer(ChapterVersion.content),
+                selectinload(Chapter.selected_version).undefer(ChapterVersion.content),
+            )
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
+
+    async def list_chapters(self, project_id: str, chapter_numbers: Iterable[int]) -> List[Chapter]:
+        """加载指定章节及其版本（含正文）与评审记录。"""
+        stmt = (
+            select(Chapter)
+            .where(Chapter.project_id == project_id, Chapter.chapter_number.in_(list(chapter_numbers)))
+            .order_by(Chapter.chapter_number)
+            .options(
+                selectinload(Chapter.versions).undefer(ChapterVersion.content),
+                selectinload(Chapter.selected_version).undefer(ChapterVersion.content),
+                selectinload(Chapter.evaluations),
+            )
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def list_outlines(self, project_id: str, chapter_numbers: Iterable[int]) -> List[ChapterOutline]:
+        stmt = (
+            select(ChapterOutline)
+            .where(
+                ChapterOutline.project_id == project_id,
+                ChapterOutline.chapter_number.in_(list(chapter_numbers)),
+            )
+            .order_by(ChapterOutline.chapter_number)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def list_written_chapters(self, project_id: str, before_chapter: int) -> List[Chapter]:
+        """列出指定章节之前已选定非空版本的章节，只取章节行本身（含摘要），不加载版本正文。"""
+        stmt = (
+            select(Chapter)
+            .join(ChapterVersion, ChapterVersion.id == Chapter.selected_version_id)
+            .where(
+                Chapter.project_id == project_id,
+                Chapter.chapter_number < before_chapter,
+                ChapterVersion.content != "",
+            )
+            .order_by(Chapter.chapter_number)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_selected_content(self, chapter_id: int) -> Optional[str]:
+        """读取章节当前选中版本的正文。"""
+        return await self.session.scalar(
+            select(ChapterVersion.content)
+            .join(Chapter, Chapter.selected_version_id == ChapterVersion.id)
+            .where(Chapter.id == chapter_id)
+        )
+
     async def list_by_user(self, user_id: int) -> Iterable[NovelProject]:
         result = await self.session.execute(
             select(NovelProject)
@@ -36,7 +144,7 @@ class NovelRepository(BaseRepository[NovelProject]):
             .options(
                 selectinload(NovelProject.blueprint),
                 selectinload(NovelProject.outlines),
-                selectinload(NovelProject.chapters).selectinload(Chapter.selected_version),
+                selectinload(NovelProject.chapters),
             )
         )
         return result.scalars().all()
@@ -49,7 +157,7 @@ class NovelRepository(BaseRepository[NovelProject]):
                 selectinload(NovelProject.owner),
                 selectinload(NovelProject.blueprint),
                 selectinload(NovelProject.outlines),
-                selectinload(NovelProject.chapters).selectinload(Chapter.selected_version),
+                selectinload(NovelProject.chapters),
             )
         )
         return result.scalars().all()
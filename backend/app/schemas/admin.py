@@ -10,6 +10,15 @@ class Statistics(BaseModel):
     api_request_count: int
 
 
+class EmbeddingCacheStatistics(BaseModel):
+    entries: int = Field(..., description="当前缓存条目数")
+    hits: int = Field(..., description="本进程启动以来的命中次数")
+    misses: int = Field(..., description="本进程启动以来的未命中次数")
+    writes: int = Field(..., description="本进程启动以来写入的条目数")
+    purged: int = Field(..., description="本进程启动以来清理的条目数")
+    hit_rate: float = Field(..., description="命中率")
+
+
 class DailyRequestLimit(BaseModel):
     limit: int = Field(..., ge=0, description="匿名用户每日可用次数")
 
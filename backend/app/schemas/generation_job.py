@@ -0,0 +1,36 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+
+class GenerationJobType(str, Enum):
+    CHAPTER_GENERATION = "chapter_generation"
+    CHAPTER_EVALUATION = "chapter_evaluation"
+    OUTLINE_GENERATION = "outline_generation"
+    BLUEPRINT_GENERATION = "blueprint_generation"
+
+
+class GenerationJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class GenerationJobRead(BaseModel):
+    id: str
+    project_id: str
+    job_type: GenerationJobType
+    status: GenerationJobStatus
+    payload: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
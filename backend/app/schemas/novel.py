@@ -47,6 +47,17 @@ class ChapterGenerationStatus(str, Enum):
     SUCCESSFUL = "successful"
 
 
+class ChapterSyncStatus(str, Enum):
+    """章节摘要与向量入库的后台处理状态。"""
+
+    NONE = "none"
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
 class ChapterOutline(BaseModel):
     chapter_number: int
     title: str
@@ -59,6 +70,8 @@ class Chapter(ChapterOutline):
     versions: Optional[List[str]] = None
     evaluation: Optional[str] = None
     generation_status: ChapterGenerationStatus = ChapterGenerationStatus.NOT_GENERATED
+    summary_status: ChapterSyncStatus = ChapterSyncStatus.NONE
+    vector_status: ChapterSyncStatus = ChapterSyncStatus.NONE
 
 
 class Relationship(BaseModel):
@@ -89,11 +102,22 @@ class NovelProject(BaseModel):
     conversation_history: List[Dict[str, Any]] = []
     blueprint: Optional[Blueprint] = None
     chapters: List[Chapter] = []
+    revision: int = 0
 
     class Config:
         from_attributes = True
 
 
+class NovelProjectDelta(BaseModel):
+    """写作接口的增量返回体：只包含受影响的章节与大纲，前端按 revision 局部更新本地状态。"""
+
+    project_id: str
+    revision: int
+    chapters: List[Chapter] = []
+    chapter_outline: List[ChapterOutline] = []
+    deleted_chapters: List[int] = []
+
+
 class NovelProjectSummary(BaseModel):
     id: str
     title: str
@@ -6,13 +6,17 @@ from __future__ import annotations
 所有关键步骤均包含中文注释，方便团队理解 RAG 流程。
 """
 
+import hashlib
 import logging
-from dataclasses import dataclass
-from typing import List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from itertools import groupby
+from typing import FrozenSet, Hashable, List, Optional, Sequence, Tuple
 
 from ..core.config import settings
 from ..services.llm_service import LLMService
-from .vector_store_service import RetrievedChunk, RetrievedSummary, VectorStoreService
+from ..utils.search_terms import extract_terms
+from .vector_store_service import RetrievalFilter, RetrievedChunk, RetrievedSummary, VectorStoreService
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +49,51 @@ class ChapterRAGContext:
         return lines
 
 
+class RetrievalResultCache:
+    """检索结果的进程内 LRU 缓存。
+
+    键中包含项目向量版本号与嵌入模型，章节入库、删除或更换嵌入模型后旧结果自然不再命中，无需主动清理。
+    读写时都复制片段与摘要，调用方修改返回结果不会污染缓存。
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Hashable, ...], ChapterRAGContext]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[ChapterRAGContext]:
+        cached = self._entries.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._copy(cached)
+
+    def set(self, key: Tuple[Hashable, ...], context: ChapterRAGContext) -> None:
+        if self._max_entries <= 0:
+            return
+        self._entries[key] = self._copy(context)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @staticmethod
+    def _copy(context: ChapterRAGContext) -> ChapterRAGContext:
+        return replace(
+            context,
+            chunks=[replace(chunk) for chunk in context.chunks],
+            summaries=[replace(summary) for summary in context.summaries],
+        )
+
+
+retrieval_result_cache = RetrievalResultCache(settings.vector_retrieval_cache_size)
+
+
 class ChapterContextService:
     """章节上下文服务，整合查询、格式化与容错逻辑。"""
 
@@ -65,37 +114,153 @@ class ChapterContextService:
         user_id: int,
         top_k_chunks: Optional[int] = None,
         top_k_summaries: Optional[int] = None,
+        target_chapter: Optional[int] = None,
+        exclude_chapters: Sequence[int] = (),
     ) -> ChapterRAGContext:
-        """根据章节摘要构造检索向量，并返回 RAG 上下文。"""
+        """根据章节摘要构造检索向量，并返回 RAG 上下文。
+
+        指定 target_chapter 时只检索此前章节（排除待重写章节的旧向量与后续章节），
+        并按 VECTOR_RECENCY_WEIGHT 让临近章节优先。
+        """
         query = self._normalize(query_text)
         if not settings.vector_store_enabled or not self._vector_store:
             logger.error("向量库未启用或初始化失败，跳过检索: project=%s", project_id)
             return ChapterRAGContext(query=query, chunks=[], summaries=[])
 
-        # get_embedding 会自动根据配置选择正确的模型
-        embedding = await self._llm_service.get_embedding(query, user_id=user_id)
+        chunk_limit = settings.vector_top_k_chunks if top_k_chunks is None else top_k_chunks
+        # 查询向量与缓存键使用同一个嵌入模型，更换模型后不会命中旧向量算出的结果
+        embedding_model = await self._llm_service.resolve_embedding_model()
+        # 版本号需在检索前读取：检索期间若有写入，结果会落在旧版本键下，不会被后续请求误用
+        cache_key = (
+            project_id,
+            self._vector_store.index_version(project_id),
+            embedding_model,
+            hashlib.sha256(query.encode("utf-8")).hexdigest(),
+            chunk_limit,
+            top_k_summaries,
+            target_chapter,
+            tuple(exclude_chapters),
+        )
+        cached = retrieval_result_cache.get(cache_key)
+        if cached is not None:
+            logger.info("命中检索结果缓存: project=%s chapter=%s", project_id, target_chapter)
+            return cached
+
+        embedding = await self._llm_service.get_embedding(query, user_id=user_id, model=embedding_model)
         if not embedding:
             logger.warning("检索查询向量生成失败: project=%s chapter_query=%s", project_id, query)
             return ChapterRAGContext(query=query, chunks=[], summaries=[])
 
-        chunks = await self._vector_store.query_chunks(
-            project_id=project_id,
-            embedding=embedding,
-            top_k=top_k_chunks,
-        )
-        summaries = await self._vector_store.query_summaries(
+        # 片段与摘要在同一次往返中检索，查询文本同时用于关键词召回；片段多取一些候选供去重与 MMR 挑选
+        retrieved = await self._vector_store.query_context(
             project_id=project_id,
             embedding=embedding,
-            top_k=top_k_summaries,
+            top_k_chunks=chunk_limit * settings.vector_mmr_candidate_multiplier,
+            top_k_summaries=top_k_summaries,
+            query_text=query,
+            retrieval_filter=RetrievalFilter(
+                before_chapter=target_chapter,
+                exclude_chapters=tuple(exclude_chapters),
+                recency_weight=settings.vector_recency_weight,
+            ),
         )
+        candidates = self._merge_adjacent_chunks(retrieved.chunks)
+        chunks = self._select_with_mmr(candidates, chunk_limit, settings.vector_mmr_lambda)
+        summaries = retrieved.summaries
         logger.info(
-            "章节上下文检索完成: project=%s chunks=%d summaries=%d query_preview=%s",
+            "章节上下文检索完成: project=%s candidates=%d merged=%d chunks=%d summaries=%d query_preview=%s",
             project_id,
+            len(retrieved.chunks),
+            len(candidates),
             len(chunks),
             len(summaries),
             query[:80],
         )
-        return ChapterRAGContext(query=query, chunks=chunks, summaries=summaries)
+        context = ChapterRAGContext(query=query, chunks=chunks, summaries=summaries)
+        retrieval_result_cache.set(cache_key, context)
+        return context
+
+    @classmethod
+    def _merge_adjacent_chunks(cls, chunks: List[RetrievedChunk]) -> List[RetrievedChunk]:
+        """将同一章节中编号相邻的片段拼接为一段连续文本，并去掉切分时产生的重叠部分。
+
+        合并后的片段取组内最小距离作为 score、最高相关度作为 relevance，结果按相关度降序排列，
+        保留向量库给出的远近加权与混合检索融合顺序。
+        """
+        ordered = sorted(
+            (chunk for chunk in chunks if chunk.chunk_index is not None),
+            key=lambda chunk: (chunk.chapter_number, chunk.chunk_index),
+        )
+        merged: List[RetrievedChunk] = [chunk for chunk in chunks if chunk.chunk_index is None]
+        for _, group in groupby(ordered, key=lambda chunk: chunk.chapter_number):
+            current: Optional[RetrievedChunk] = None
+            for chunk in group:
+                if current is not None and chunk.chunk_index == current.chunk_index:
+                    continue
+                if current is not None and chunk.chunk_index == current.chunk_index + 1:
+                    merged_indexes = current.metadata.get("merged_chunks", [current.chunk_index])
+                    current = replace(
+                        current,
+                        content=cls._join_without_overlap(current.content, chunk.content),
+                        score=min(current.score, chunk.score),
+                        relevance=max(cls._relevance(current), cls._relevance(chunk)),
+                        chunk_index=chunk.chunk_index,
+                        metadata={**current.metadata, "merged_chunks": [*merged_indexes, chunk.chunk_index]},
+                    )
+                    continue
+                if current is not None:
+                    merged.append(current)
+                current = chunk
+            if current is not None:
+                merged.append(current)
+        merged.sort(key=cls._relevance, reverse=True)
+        return merged
+
+    @staticmethod
+    def _relevance(chunk: RetrievedChunk) -> float:
+        """检索排序使用的相关度；向量库未提供时退回 1 - 余弦距离。"""
+        return chunk.relevance if chunk.relevance is not None else 1.0 - chunk.score
+
+    @staticmethod
+    def _join_without_overlap(previous: str, following: str) -> str:
+        """找出前段结尾与后段开头重合的最长文本，只保留一份。"""
+        max_overlap = min(len(previous), len(following), settings.vector_chunk_overlap * 2)
+        for size in range(max_overlap, 0, -1):
+            if previous.endswith(following[:size]):
+                return previous + following[size:]
+        return f"{previous}\n{following}"
+
+    @classmethod
+    def _select_with_mmr(cls, chunks: List[RetrievedChunk], top_k: int, lambda_mult: float) -> List[RetrievedChunk]:
+        """最大边际相关性（MMR）挑选：兼顾与查询的相关度，并惩罚与已选片段的重复。
+
+        相关度取向量库给出的 relevance（含远近加权或 RRF 融合），片段之间的相似度按二字词集合的 Jaccard 系数计算。
+        """
+        if top_k <= 0 or not chunks:
+            return []
+        term_sets: List[FrozenSet[str]] = [frozenset(extract_terms(chunk.content)) for chunk in chunks]
+        remaining = list(range(len(chunks)))
+        selected: List[int] = []
+        while remaining and len(selected) < top_k:
+            best_index = remaining[0]
+            best_score = float("-inf")
+            for idx in remaining:
+                redundancy = max(
+                    (cls._jaccard(term_sets[idx], term_sets[chosen]) for chosen in selected),
+                    default=0.0,
+                )
+                score = lambda_mult * cls._relevance(chunks[idx]) - (1.0 - lambda_mult) * redundancy
+                if score > best_score:
+                    best_index, best_score = idx, score
+            selected.append(best_index)
+            remaining.remove(best_index)
+        return [chunks[idx] for idx in selected]
+
+    @staticmethod
+    def _jaccard(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+        if not left or not right:
+            return 0.0
+        return len(left & right) / len(left | right)
 
     @staticmethod
     def _normalize(text: str) -> str:
@@ -106,4 +271,6 @@ class ChapterContextService:
 __all__ = [
     "ChapterContextService",
     "ChapterRAGContext",
+    "RetrievalResultCache",
+    "retrieval_result_cache",
 ]
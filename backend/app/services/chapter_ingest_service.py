@@ -6,12 +6,13 @@ from __future__ import annotations
 全部注释使用中文，方便团队成员阅读理解。
 """
 
+import hashlib
 import logging
 from typing import Dict, List, Optional, Sequence
 
 from ..core.config import settings
 from ..services.llm_service import LLMService
-from ..services.vector_store_service import VectorStoreService
+from ..services.vector_store_service import VectorStoreService, get_vector_store
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +32,7 @@ class ChapterIngestionService:
         vector_store: Optional[VectorStoreService] = None,
     ) -> None:
         self._llm_service = llm_service
-        self._vector_store = vector_store or VectorStoreService()
+        self._vector_store = vector_store or get_vector_store()
         self._text_splitter = self._init_text_splitter()
 
     async def ingest_chapter(
@@ -43,34 +44,72 @@ class ChapterIngestionService:
         content: str,
         summary: Optional[str],
         user_id: int,
-    ) -> None:
-        """将章节正文与摘要写入向量库，供后续 RAG 检索使用。"""
-        if not settings.vector_store_enabled:
+    ) -> bool:
+        """将章节正文与摘要写入向量库，供后续 RAG 检索使用。
+
+        片段 id 由内容哈希生成，重新入库时只对新增或变化的片段与摘要生成向量。
+        返回是否已完成写入，写入失败时返回 False，便于调用方重试。
+        """
+        if not settings.vector_store_enabled or not self._vector_store:
             logger.warning("向量库未启用，跳过章节向量写入: project=%s chapter=%s", project_id, chapter_number)
-            return
+            return False
         if not content.strip():
             logger.warning("章节正文为空，跳过向量写入: project=%s chapter=%s", project_id, chapter_number)
-            return
+            return False
 
         chunks = self._split_into_chunks(content)
         if not chunks:
             logger.warning("章节正文切分后为空，跳过向量写入: project=%s chapter=%s", project_id, chapter_number)
-            return
+            return False
+
+        cleaned_summary = (summary or "").strip()
+        # 读取章节已有片段，只对新增或变化的片段生成向量；读取失败时退回整章替换
+        stored = await self._vector_store.get_chapter_vectors(project_id, chapter_number)
+        stored_chunks = stored.chunks if stored else {}
+        chunk_ids = self._chunk_ids(project_id, chapter_number, chunks)
+
+        new_chunks = [
+            (index, chunk_id, chunk_text)
+            for index, (chunk_id, chunk_text) in enumerate(zip(chunk_ids, chunks))
+            if chunk_id not in stored_chunks
+        ]
+        relocate_chunks = [
+            {"id": chunk_id, "chunk_index": index, "chapter_title": title, "content": chunk_text}
+            for index, (chunk_id, chunk_text) in enumerate(zip(chunk_ids, chunks))
+            if chunk_id in stored_chunks
+            and (
+                stored_chunks[chunk_id].get("chunk_index") != index
+                or stored_chunks[chunk_id].get("chapter_title") != title
+            )
+        ]
+        current_ids = set(chunk_ids)
+        delete_chunk_ids = [chunk_id for chunk_id in stored_chunks if chunk_id not in current_ids]
+        stored_summary = stored.summary if stored else None
+        summary_changed = bool(cleaned_summary) and (
+            stored_summary is None
+            or stored_summary.get("summary") != cleaned_summary
+            or stored_summary.get("title") != title
+        )
 
         logger.info(
-            "开始写入章节向量: project=%s chapter=%s chunks=%d",
+            "开始写入章节向量: project=%s chapter=%s chunks=%d 新增=%d 未变=%d 移除=%d",
             project_id,
             chapter_number,
             len(chunks),
+            len(new_chunks),
+            len(chunks) - len(new_chunks),
+            len(delete_chunk_ids),
         )
-        await self._vector_store.delete_by_chapters(project_id, [chapter_number])
+
+        # 新增片段与变化的摘要合并为一次批量嵌入请求
+        texts = [chunk_text for _, _, chunk_text in new_chunks]
+        if summary_changed:
+            texts.append(cleaned_summary)
+        embeddings = await self._llm_service.get_embeddings(texts, user_id=user_id) if texts else []
 
         chunk_records = []
-        for index, chunk_text in enumerate(chunks):
-            embedding = await self._llm_service.get_embedding(
-                chunk_text,
-                user_id=user_id,
-            )
+        for position, (index, record_id, chunk_text) in enumerate(new_chunks):
+            embedding = embeddings[position] if position < len(embeddings) else []
             if not embedding:
                 logger.warning(
                     "生成章节片段向量失败，已跳过: project=%s chapter=%s chunk=%s",
@@ -79,7 +118,6 @@ class ChapterIngestionService:
                     index,
                 )
                 continue
-            record_id = f"{project_id}:{chapter_number}:{index}"
             chunk_records.append(
                 {
                     "id": record_id,
@@ -96,51 +134,73 @@ class ChapterIngestionService:
                 }
             )
 
-        if chunk_records:
-            await self._vector_store.upsert_chunks(records=chunk_records)
+        summary_records: Optional[List[Dict[str, object]]] = None
+        if summary_changed:
+            summary_embedding = embeddings[len(new_chunks)] if len(embeddings) > len(new_chunks) else []
+            if summary_embedding:
+                summary_records = [
+                    {
+                        "id": f"{project_id}:{chapter_number}:summary",
+                        "project_id": project_id,
+                        "chapter_number": chapter_number,
+                        "title": title,
+                        "summary": cleaned_summary,
+                        "embedding": summary_embedding,
+                    }
+                ]
+            else:
+                logger.warning(
+                    "生成章节摘要向量失败，已跳过: project=%s chapter=%s",
+                    project_id,
+                    chapter_number,
+                )
+        elif not cleaned_summary and stored_summary is not None:
+            summary_records = []
+
+        if stored is None:
+            # 无法获知已有数据时整章替换：旧向量删除与新向量写入在同一事务内完成
+            updated = await self._vector_store.replace_chapter(
+                project_id=project_id,
+                chapter_number=chapter_number,
+                chunks=chunk_records,
+                summaries=summary_records or [],
+            )
+        else:
+            # 只写入新增片段、调整未变片段的序号、删除已移除片段，同样在一个事务内完成
+            updated = await self._vector_store.update_chapter(
+                project_id=project_id,
+                chapter_number=chapter_number,
+                upsert_chunks=chunk_records,
+                relocate_chunks=relocate_chunks,
+                delete_chunk_ids=delete_chunk_ids,
+                summaries=summary_records,
+            )
+        if updated:
             logger.info(
-                "章节正文向量写入完成: project=%s chapter=%s 成功片段=%d",
+                "章节向量写入完成: project=%s chapter=%s 写入片段=%d 摘要=%s",
                 project_id,
                 chapter_number,
                 len(chunk_records),
+                "未变" if summary_records is None else len(summary_records),
             )
+        return updated
 
-        if summary:
-            cleaned_summary = summary.strip()
-            if cleaned_summary:
-                summary_embedding = await self._llm_service.get_embedding(
-                    cleaned_summary,
-                    user_id=user_id,
-                )
-                if summary_embedding:
-                    summary_id = f"{project_id}:{chapter_number}:summary"
-                    await self._vector_store.upsert_summaries(
-                        records=[
-                            {
-                                "id": summary_id,
-                                "project_id": project_id,
-                                "chapter_number": chapter_number,
-                                "title": title,
-                                "summary": cleaned_summary,
-                                "embedding": summary_embedding,
-                            }
-                        ]
-                    )
-                    logger.info(
-                        "章节摘要向量写入完成: project=%s chapter=%s",
-                        project_id,
-                        chapter_number,
-                    )
-                else:
-                    logger.warning(
-                        "生成章节摘要向量失败，已跳过: project=%s chapter=%s",
-                        project_id,
-                        chapter_number,
-                    )
+    @staticmethod
+    def _chunk_ids(project_id: str, chapter_number: int, chunks: Sequence[str]) -> List[str]:
+        """按片段内容哈希生成 id，内容不变的片段在重新入库时 id 保持不变；同章重复文本追加序号区分。"""
+        seen: Dict[str, int] = {}
+        chunk_ids: List[str] = []
+        for chunk_text in chunks:
+            digest = hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()[:16]
+            occurrence = seen.get(digest, 0)
+            seen[digest] = occurrence + 1
+            suffix = f"-{occurrence}" if occurrence else ""
+            chunk_ids.append(f"{project_id}:{chapter_number}:{digest}{suffix}")
+        return chunk_ids
 
     async def delete_chapters(self, project_id: str, chapter_numbers: Sequence[int]) -> None:
         """从向量库中删除指定章节的所有片段与摘要。"""
-        if not settings.vector_store_enabled or not chapter_numbers:
+        if not settings.vector_store_enabled or not self._vector_store or not chapter_numbers:
             return
         logger.info(
             "准备删除章节向量: project=%s chapters=%s",
@@ -0,0 +1,374 @@
+"""
+章节后台入库队列：选择版本或编辑章节后，摘要生成与向量入库在后台按项目顺序执行。
+
+进度记录在 chapters.summary_status / vector_status 上，进程重启后未完成的章节会被重新入队。
+同一项目内的任务严格按提交顺序执行，避免旧内容的入库结果覆盖新内容，或与章节删除交错。
+"""
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import selectinload
+
+from ..core.config import settings
+from ..db.session import AsyncSessionLocal
+from ..models.novel import Chapter, ChapterOutline, ChapterVersion, NovelProject
+from ..repositories.novel_repository import NovelRepository
+from ..schemas.novel import ChapterSyncStatus
+from ..utils.json_utils import remove_think_tags
+from .chapter_ingest_service import ChapterIngestionService
+from .llm_service import LLMService
+from .novel_service import project_payload_cache
+from .vector_store_service import get_vector_store
+
+logger = logging.getLogger(__name__)
+
+_UNFINISHED = (ChapterSyncStatus.PENDING.value, ChapterSyncStatus.RUNNING.value)
+
+
+@dataclass(frozen=True)
+class _IngestionTask:
+    """队列中的单个任务：ingest 为摘要与向量入库，delete 为删除章节向量。"""
+
+    kind: str
+    chapter_numbers: Tuple[int, ...]
+
+
+@dataclass
+class _ChapterSnapshot:
+    project_id: str
+    chapter_id: int
+    version_id: Optional[int]
+    user_id: int
+    title: str
+    content: str
+    real_summary: Optional[str]
+
+
+class ChapterIngestionQueue:
+    """进程内的章节入库队列：每个项目一个串行执行的 runner，失败时按指数退避重试。"""
+
+    def __init__(self, max_attempts: int, retry_base_seconds: float) -> None:
+        self._max_attempts = max_attempts
+        self._retry_base = retry_base_seconds
+        self._pending: Dict[str, Deque[_IngestionTask]] = {}
+        self._runners: Dict[str, asyncio.Task] = {}
+        self._started = False
+
+    async def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        await self._resume_unfinished()
+        logger.info("章节入库队列已启动")
+
+    async def stop(self) -> None:
+        # 正在处理的章节保持 running 状态，下次启动时会被重新入队
+        self._started = False
+        runners = list(self._runners.values())
+        for task in runners:
+            task.cancel()
+        await asyncio.gather(*runners, return_exceptions=True)
+        self._runners.clear()
+        self._pending.clear()
+        logger.info("章节入库队列已停止")
+
+    def enqueue_ingest(self, project_id: str, chapter_number: int) -> None:
+        """提交章节的摘要生成与向量入库，调用前需已将章节状态置为 pending 并提交事务。"""
+        self._submit(project_id, _IngestionTask(kind="ingest", chapter_numbers=(chapter_number,)))
+
+    async def requeue_chapters(self, chapters: Sequence[Tuple[str, int]]) -> None:
+        """将向量已失效的章节置回 pending 并重新入库，供向量库迁移丢弃旧向量时回调。
+
+        状态先提交再入队；队列尚未启动时由 start 中的 _resume_unfinished 统一恢复。
+        """
+        by_project: Dict[str, List[int]] = {}
+        for project_id, chapter_number in chapters:
+            by_project.setdefault(project_id, []).append(chapter_number)
+        marked: List[Tuple[str, int]] = []
+        async with AsyncSessionLocal() as session:
+            for project_id, chapter_numbers in by_project.items():
+                # 向量库中可能残留已删除章节的数据，只处理仍存在的章节
+                result = await session.execute(
+                    select(Chapter.chapter_number)
+                    .where(Chapter.project_id == project_id, Chapter.chapter_number.in_(chapter_numbers))
+                    .order_by(Chapter.chapter_number)
+                )
+                numbers = list(result.scalars().all())
+                if numbers:
+                    await session.execute(
+                        update(Chapter)
+                        .where(Chapter.project_id == project_id, Chapter.chapter_number.in_(numbers))
+                        .values(vector_status=ChapterSyncStatus.PENDING.value)
+                    )
+                    await NovelRepository(session).bump_revision(project_id)
+                    marked.extend((project_id, number) for number in numbers)
+            await session.commit()
+        for project_id in {project_id for project_id, _ in marked}:
+            project_payload_cache.invalidate(project_id)
+        if self._started:
+            for project_id, chapter_number in marked:
+                self.enqueue_ingest(project_id, chapter_number)
+        if marked:
+            logger.info("已将 %d 个向量失效的章节转入后台重新入库", len(marked))
+
+    async def delete_chapters(self, project_id: str, chapter_numbers: Sequence[int]) -> None:
+        """立即删除章节向量，不依赖队列是否运行。
+
+        章节行已删除，无法像入库任务那样在重启后恢复，因此删除直接执行；若该项目仍有排队或执行中的
+        入库任务（或本次删除失败），再排一次删除，保证在这些任务之后执行、失败时按退避重试。
+        """
+        if not chapter_numbers:
+            return
+        task = _IngestionTask(kind="delete", chapter_numbers=tuple(chapter_numbers))
+        try:
+            await self._delete(project_id, task.chapter_numbers)
+        except Exception as exc:
+            logger.warning("删除章节向量失败，转入后台重试: project=%s chapters=%s error=%s", project_id, chapter_numbers, exc)
+            self._submit(project_id, task)
+            return
+        if project_id in self._runners:
+            self._submit(project_id, task)
+
+    def _submit(self, project_id: str, task: _IngestionTask) -> None:
+        if not self._started:
+            if task.kind == "delete":
+                logger.error(
+                    "章节入库队列未启动，项目 %s 章节 %s 的向量删除未完成，需要重新删除",
+                    project_id,
+                    task.chapter_numbers,
+                )
+            else:
+                # 章节状态保持 pending，下次启动时由 _resume_unfinished 重新入队
+                logger.warning("章节入库队列未启动，项目 %s 第 %s 章将在下次启动时入库", project_id, task.chapter_numbers[0])
+            return
+        pending = self._pending.setdefault(project_id, deque())
+        # 尚未开始的相同任务无需重复排队：执行时总是读取章节的最新内容
+        if task.kind == "ingest" and task in pending:
+            return
+        pending.append(task)
+        if project_id not in self._runners:
+            self._runners[project_id] = asyncio.create_task(
+                self._drain(project_id), name=f"chapter-ingestion-{project_id}"
+            )
+
+    async def _drain(self, project_id: str) -> None:
+        pending = self._pending[project_id]
+        try:
+            while pending:
+                await self._run_with_retry(project_id, pending.popleft())
+        finally:
+            self._runners.pop(project_id, None)
+            if not pending:
+                self._pending.pop(project_id, None)
+
+    async def _run_with_retry(self, project_id: str, task: _IngestionTask) -> None:
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                if task.kind == "delete":
+                    await self._delete(project_id, task.chapter_numbers)
+                else:
+                    await self._ingest(project_id, task.chapter_numbers[0])
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if attempt >= self._max_attempts:
+                    logger.error(
+                        "章节入库任务失败，已放弃: project=%s task=%s chapters=%s error=%s",
+                        project_id,
+                        task.kind,
+                        task.chapter_numbers,
+                        exc,
+                    )
+                    if task.kind == "ingest":
+                        await self._mark_failed(project_id, task.chapter_numbers[0])
+                    return
+                delay = self._retry_base * 2 ** (attempt - 1)
+                logger.warning(
+                    "章节入库任务失败，%.1fs 后重试（第 %d/%d 次）: project=%s chapters=%s error=%s",
+                    delay,
+                    attempt,
+                    self._max_attempts,
+                    project_id,
+                    task.chapter_numbers,
+                    exc,
+                )
+                await asyncio.sleep(delay)
+
+    async def _ingest(self, project_id: str, chapter_number: int) -> None:
+        snapshot = await self._load_snapshot(project_id, chapter_number)
+        if snapshot is None:
+            return
+        if not snapshot.content.strip():
+            await self._set_status(snapshot, "summary_status", ChapterSyncStatus.SKIPPED)
+            await self._set_status(snapshot, "vector_status", ChapterSyncStatus.SKIPPED)
+            return
+
+        summary = snapshot.real_summary
+        if not summary:
+            await self._set_status(snapshot, "summary_status", ChapterSyncStatus.RUNNING)
+            async with AsyncSessionLocal() as session:
+                raw_summary = await LLMService(session).get_summary(
+                    snapshot.content,
+                    temperature=0.15,
+                    user_id=snapshot.user_id,
+                    timeout=180.0,
+                    cache=True,
+                )
+            summary = remove_think_tags(raw_summary)
+            # 生成期间章节可能被再次编辑或切换了版本，此时结果作废，由随后排队的任务处理
+            if not await self._save_summary(snapshot, summary):
+                logger.info("章节内容已变化，丢弃过期摘要: project=%s chapter=%s", project_id, chapter_number)
+                return
+        else:
+            await self._set_status(
+                snapshot, "summary_status", ChapterSyncStatus.SUCCEEDED, only_if=_UNFINISHED
+            )
+
+        vector_store = get_vector_store()
+        if vector_store is None:
+            await self._set_status(snapshot, "vector_status", ChapterSyncStatus.SKIPPED)
+            return
+
+        await self._set_status(snapshot, "vector_status", ChapterSyncStatus.RUNNING)
+        async with AsyncSessionLocal() as session:
+            ingestion_service = ChapterIngestionService(llm_service=LLMService(session), vector_store=vector_store)
+            written = await ingestion_service.ingest_chapter(
+                project_id=project_id,
+                chapter_number=chapter_number,
+                title=snapshot.title,
+                content=snapshot.content,
+                summary=summary,
+                user_id=snapshot.user_id,
+            )
+        if not written:
+            raise RuntimeError("章节向量写入失败")
+        # 若期间章节再次被修改，状态已被置回 pending，这里不覆盖
+        await self._set_status(
+            snapshot,
+            "vector_status",
+            ChapterSyncStatus.SUCCEEDED,
+            only_if=(ChapterSyncStatus.RUNNING.value,),
+        )
+        logger.info("项目 %s 第 %s 章已在后台同步至向量库", project_id, chapter_number)
+
+    async def _delete(self, project_id: str, chapter_numbers: Sequence[int]) -> None:
+        vector_store = get_vector_store()
+        if vector_store is None:
+            return
+        if not await vector_store.delete_by_chapters(project_id, list(chapter_numbers)):
+            raise RuntimeError("章节向量删除失败")
+
+    async def _load_snapshot(self, project_id: str, chapter_number: int) -> Optional[_ChapterSnapshot]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Chapter)
+                .options(selectinload(Chapter.selected_version).undefer(ChapterVersion.content))
+                .where(Chapter.project_id == project_id, Chapter.chapter_number == chapter_number)
+            )
+            chapter = result.scalars().first()
+            if chapter is None:
+                return None
+            user_id = await session.scalar(select(NovelProject.user_id).where(NovelProject.id == project_id))
+            title = await session.scalar(
+                select(ChapterOutline.title).where(
+                    ChapterOutline.project_id == project_id,
+                    ChapterOutline.chapter_number == chapter_number,
+                )
+            )
+            return _ChapterSnapshot(
+                project_id=project_id,
+                chapter_id=chapter.id,
+                version_id=chapter.selected_version_id,
+                user_id=user_id,
+                title=title or f"第{chapter_number}章",
+                content=chapter.selected_version.content if chapter.selected_version else "",
+                real_summary=chapter.real_summary,
+            )
+
+    async def _save_summary(self, snapshot: _ChapterSnapshot, summary: str) -> bool:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(Chapter)
+                .where(
+                    Chapter.id == snapshot.chapter_id,
+                    Chapter.selected_version_id == snapshot.version_id,
+                    Chapter.summary_status == ChapterSyncStatus.RUNNING.value,
+                )
+                .values(real_summary=summary, summary_status=ChapterSyncStatus.SUCCEEDED.value)
+            )
+            saved = result.rowcount == 1
+            if saved:
+                await NovelRepository(session).bump_revision(snapshot.project_id)
+            await session.commit()
+        if saved:
+            project_payload_cache.invalidate(snapshot.project_id)
+        return saved
+
+    async def _set_status(
+        self,
+        snapshot: _ChapterSnapshot,
+        column: str,
+        status: ChapterSyncStatus,
+        *,
+        only_if: Optional[Tuple[str, ...]] = None,
+    ) -> None:
+        """更新单个状态列；only_if 限定当前状态，避免覆盖用户再次修改后置回的 pending。"""
+        stmt = update(Chapter).where(Chapter.id == snapshot.chapter_id).values({column: status.value})
+        if only_if:
+            stmt = stmt.where(getattr(Chapter, column).in_(only_if))
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(stmt)
+            # 状态随章节接口返回，变化后递增项目修订号，客户端据此感知后台进度
+            changed = bool(result.rowcount)
+            if changed:
+                await NovelRepository(session).bump_revision(snapshot.project_id)
+            await session.commit()
+        if changed:
+            project_payload_cache.invalidate(snapshot.project_id)
+
+    async def _mark_failed(self, project_id: str, chapter_number: int) -> None:
+        async with AsyncSessionLocal() as session:
+            for column in (Chapter.summary_status, Chapter.vector_status):
+                await session.execute(
+                    update(Chapter)
+                    .where(
+                        Chapter.project_id == project_id,
+                        Chapter.chapter_number == chapter_number,
+                        column.in_(_UNFINISHED),
+                    )
+                    .values({column: ChapterSyncStatus.FAILED.value})
+                )
+            await NovelRepository(session).bump_revision(project_id)
+            await session.commit()
+        project_payload_cache.invalidate(project_id)
+
+    async def _resume_unfinished(self) -> None:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Chapter.project_id, Chapter.chapter_number)
+                .where(or_(Chapter.summary_status.in_(_UNFINISHED), Chapter.vector_status.in_(_UNFINISHED)))
+                .order_by(Chapter.project_id, Chapter.chapter_number)
+            )
+            unfinished = result.all()
+        for project_id, chapter_number in unfinished:
+            self.enqueue_ingest(project_id, chapter_number)
+        if unfinished:
+            logger.info("已恢复 %d 个未完成的章节入库任务", len(unfinished))
+
+
+chapter_ingestion_queue = ChapterIngestionQueue(
+    max_attempts=settings.chapter_ingestion_max_attempts,
+    retry_base_seconds=settings.chapter_ingestion_retry_base_seconds,
+)
+
+
+__all__ = [
+    "ChapterIngestionQueue",
+    "chapter_ingestion_queue",
+]
@@ -0,0 +1,138 @@
+"""
+嵌入向量缓存：以（模型, sha256(文本)）为键，将 float32 向量持久化在 libsql 向量库中。
+
+章节小幅修改后的重新入库、以及重复的检索查询都可以直接复用已有向量，避免重复调用嵌入模型。
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import Dict, List, Optional, Sequence
+
+from ..core.config import settings
+from .vector_store_service import VectorStoreService, get_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCacheStats:
+    """进程内的嵌入缓存命中统计。"""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.purged = 0
+
+    def snapshot(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "purged": self.purged,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+embedding_cache_stats = EmbeddingCacheStats()
+
+
+class EmbeddingCacheService:
+    """嵌入缓存的读写封装，读写失败均不影响主流程。"""
+
+    def __init__(self, vector_store: VectorStoreService) -> None:
+        self._vector_store = vector_store
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    async def lookup(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """返回与输入一一对应的缓存向量，未命中的位置为 None。"""
+        hashes = [self.text_hash(text) for text in texts]
+        found = await self._vector_store.get_cached_embeddings(model, hashes)
+        results: List[Optional[List[float]]] = []
+        for text, text_hash in zip(texts, hashes):
+            if not text.strip():
+                results.append(None)
+                continue
+            vector = found.get(text_hash)
+            if vector:
+                embedding_cache_stats.hits += 1
+            else:
+                embedding_cache_stats.misses += 1
+            results.append(vector)
+        return results
+
+    async def store(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        items = {
+            self.text_hash(text): vector
+            for text, vector in zip(texts, vectors)
+            if text.strip() and vector
+        }
+        if not items:
+            return
+        embedding_cache_stats.writes += await self._vector_store.put_cached_embeddings(model, items)
+
+
+class EmbeddingCachePurger:
+    """周期性清理嵌入缓存：先淘汰超龄条目，再按最近使用时间裁剪到容量上限。"""
+
+    def __init__(self, interval_seconds: int, max_entries: int, max_age_seconds: int) -> None:
+        self._interval = interval_seconds
+        self._max_entries = max_entries
+        self._max_age = max_age_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task or not settings.vector_store_enabled or not settings.embedding_cache_enabled:
+            return
+        self._task = asyncio.create_task(self._loop(), name="embedding-cache-purger")
+        logger.info("嵌入缓存清理任务已启动: interval=%ss", self._interval)
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def purge_once(self) -> int:
+        vector_store = get_vector_store()
+        if vector_store is None:
+            return 0
+        removed = await vector_store.purge_embedding_cache(
+            max_entries=self._max_entries,
+            max_age_seconds=self._max_age,
+        )
+        embedding_cache_stats.purged += removed
+        if removed:
+            logger.info("已清理嵌入缓存 %d 条", removed)
+        return removed
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.purge_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pragma: no cover - 兜底，防止清理任务退出
+                logger.error("嵌入缓存清理任务执行失败: %s", exc)
+            await asyncio.sleep(self._interval)
+
+
+embedding_cache_purger = EmbeddingCachePurger(
+    interval_seconds=settings.embedding_cache_purge_interval_seconds,
+    max_entries=settings.embedding_cache_max_entries,
+    max_age_seconds=settings.embedding_cache_max_age_seconds,
+)
+
+
+__all__ = [
+    "EmbeddingCacheService",
+    "EmbeddingCachePurger",
+    "EmbeddingCacheStats",
+    "embedding_cache_purger",
+    "embedding_cache_stats",
+]
@@ -0,0 +1,214 @@
+"""
+后台生成任务服务：负责任务入队、状态查询，以及进程内的异步 worker 池。
+
+任务持久化在 generation_jobs 表中，客户端断开不影响执行；进程重启后未完成的任务会被重新入队。
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..db.session import AsyncSessionLocal
+from ..models import GenerationJob
+from ..repositories.generation_job_repository import GenerationJobRepository
+from ..repositories.user_repository import UserRepository
+from ..schemas.generation_job import GenerationJobStatus, GenerationJobType
+from ..schemas.user import UserInDB
+
+logger = logging.getLogger(__name__)
+
+# 任务处理函数：(会话, 发起用户, 项目 ID, 任务参数) -> 任务结果
+JobHandler = Callable[[AsyncSession, UserInDB, str, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def register_job_handler(job_type: GenerationJobType, handler: JobHandler) -> None:
+    """注册任务处理函数，由各路由模块在导入时调用。"""
+    _HANDLERS[job_type.value] = handler
+
+
+class GenerationJobService:
+    """生成任务的入队与查询。"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.repo = GenerationJobRepository(session)
+
+    async def enqueue(
+        self,
+        *,
+        user_id: int,
+        project_id: str,
+        job_type: GenerationJobType,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> GenerationJob:
+        job = GenerationJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            project_id=project_id,
+            job_type=job_type.value,
+            status=GenerationJobStatus.PENDING.value,
+            payload=payload or {},
+        )
+        self.session.add(job)
+        await self.session.commit()
+        await self.session.refresh(job)
+        generation_job_worker.submit(job.id)
+        logger.info("用户 %s 提交后台任务 %s: type=%s project=%s", user_id, job.id, job.job_type, project_id)
+        return job
+
+    async def get_job_for_user(self, job_id: str, user_id: int) -> GenerationJob:
+        job = await self.repo.get(id=job_id)
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="任务不存在")
+        if job.user_id != user_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="无权访问该任务")
+        return job
+
+    async def list_jobs_for_user(
+        self,
+        user_id: int,
+        *,
+        project_id: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[GenerationJob]:
+        return list(await self.repo.list_by_user(user_id, project_id=project_id, limit=limit))
+
+
+class GenerationJobWorker:
+    """进程内异步 worker 池，从内存队列取任务 ID 并执行对应处理函数。"""
+
+    def __init__(self, worker_count: int, max_attempts: int) -> None:
+        self._worker_count = worker_count
+        self._max_attempts = max_attempts
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker_loop(idx), name=f"generation-job-worker-{idx}")
+            for idx in range(self._worker_count)
+        ]
+        await self._resume_unfinished()
+        logger.info("后台生成任务 worker 已启动: workers=%d", self._worker_count)
+
+    async def stop(self) -> None:
+        # 正在执行的任务保持 running 状态，下次启动时会被重新入队
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        logger.info("后台生成任务 worker 已停止")
+
+    def submit(self, job_id: str) -> None:
+        if self._queue is None:
+            logger.warning("后台任务 worker 未启动，任务 %s 将在下次启动时执行", job_id)
+            return
+        self._queue.put_nowait(job_id)
+
+    async def _resume_unfinished(self) -> None:
+        async with AsyncSessionLocal() as session:
+            repo = GenerationJobRepository(session)
+            jobs = list(await repo.list_unfinished())
+            resumed: List[str] = []
+            for job in jobs:
+                if job.status == GenerationJobStatus.RUNNING.value and job.attempts >= self._max_attempts:
+                    job.status = GenerationJobStatus.FAILED.value
+                    job.error = "任务多次因服务重启中断，已停止重试"
+                    job.finished_at = datetime.now(timezone.utc)
+                    continue
+                job.status = GenerationJobStatus.PENDING.value
+                resumed.append(job.id)
+            await session.commit()
+        for job_id in resumed:
+            self.submit(job_id)
+        if resumed:
+            logger.info("已恢复 %d 个未完成的后台任务", len(resumed))
+
+    async def _worker_loop(self, idx: int) -> None:
+        assert self._queue is not None
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pragma: no cover - 兜底，防止 worker 退出
+                logger.exception("后台任务 worker-%s 执行任务 %s 时发生未处理异常", idx, job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        async with AsyncSessionLocal() as session:
+            repo = GenerationJobRepository(session)
+            if not await repo.claim(job_id):
+                return
+            job = await repo.get(id=job_id)
+            job.started_at = datetime.now(timezone.utc)
+            await session.commit()
+            handler = _HANDLERS.get(job.job_type)
+            user = await UserRepository(session).get(id=job.user_id)
+            user_schema = UserInDB.model_validate(user) if user else None
+            project_id = job.project_id
+            payload = dict(job.payload or {})
+            job_type = job.job_type
+
+        result: Optional[Dict[str, Any]] = None
+        error: Optional[str] = None
+        if handler is None:
+            error = f"未知的任务类型: {job_type}"
+        elif user_schema is None:
+            error = "任务发起用户不存在"
+        else:
+            logger.info("开始执行后台任务 %s: type=%s project=%s", job_id, job_type, project_id)
+            try:
+                async with AsyncSessionLocal() as work_session:
+                    result = await handler(work_session, user_schema, project_id, payload)
+            except HTTPException as exc:
+                error = str(exc.detail)
+            except Exception as exc:
+                logger.exception("后台任务 %s 执行失败: %s", job_id, exc)
+                error = str(exc)[:500] or exc.__class__.__name__
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id)
+                .values(
+                    status=(GenerationJobStatus.FAILED if error else GenerationJobStatus.SUCCEEDED).value,
+                    result=result,
+                    error=error,
+                    finished_at=datetime.now(timezone.utc),
+                )
+            )
+            await session.commit()
+        if error:
+            logger.warning("后台任务 %s 失败: %s", job_id, error)
+        else:
+            logger.info("后台任务 %s 执行完成", job_id)
+
+
+generation_job_worker = GenerationJobWorker(
+    worker_count=settings.generation_job_workers,
+    max_attempts=settings.generation_job_max_attempts,
+)
+
+
+__all__ = [
+    "GenerationJobService",
+    "GenerationJobWorker",
+    "generation_job_worker",
+    "register_job_handler",
+]
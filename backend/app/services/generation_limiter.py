@@ -0,0 +1,51 @@
+"""章节生成并发控制：同时限制全局与单个用户的在途 LLM 生成数量。"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from ..core.config import settings
+
+
+class GenerationLimiter:
+    """基于信号量的两级并发闸门，先占用户名额再占全局名额，避免空占全局槽位。"""
+
+    def __init__(self, global_limit: int, per_user_limit: int) -> None:
+        self._global = asyncio.Semaphore(global_limit)
+        self._per_user_limit = per_user_limit
+        self._user_semaphores: Dict[int, asyncio.Semaphore] = {}
+        self._user_waiters: Dict[int, int] = {}
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[int]) -> AsyncIterator[None]:
+        if user_id is None:
+            async with self._global:
+                yield
+            return
+
+        semaphore = self._user_semaphores.get(user_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._per_user_limit)
+            self._user_semaphores[user_id] = semaphore
+        self._user_waiters[user_id] = self._user_waiters.get(user_id, 0) + 1
+        try:
+            async with semaphore:
+                async with self._global:
+                    yield
+        finally:
+            # 用户没有在途任务时回收信号量，防止字典无限增长
+            remaining = self._user_waiters[user_id] - 1
+            if remaining:
+                self._user_waiters[user_id] = remaining
+            else:
+                self._user_waiters.pop(user_id, None)
+                self._user_semaphores.pop(user_id, None)
+
+
+generation_limiter = GenerationLimiter(
+    global_limit=settings.writer_generation_concurrency,
+    per_user_limit=settings.writer_user_generation_concurrency,
+)
+
+
+__all__ = ["GenerationLimiter", "generation_limiter"]
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..db.session import AsyncSessionLocal
+from ..models import LLMResponseCache
+from ..repositories.llm_response_cache_repository import LLMResponseCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCacheService:
+    """基于内容哈希的 LLM 响应缓存，带 TTL 与条目数上限，由调用方按需开启。
+
+    读取使用调用方会话；命中统计与写入使用独立的短会话提交，不会提交或回滚调用方的事务。
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.repo = LLMResponseCacheRepository(session)
+
+    @staticmethod
+    def build_key(
+        *,
+        model: Optional[str],
+        base_url: Optional[str],
+        messages: List[Dict[str, str]],
+        temperature: float,
+        response_format: Optional[str],
+    ) -> str:
+        """对模型、消息（含系统提示词）、温度与输出格式做稳定序列化后取 sha256。"""
+        material = json.dumps(
+            {
+                "model": model,
+                "base_url": base_url,
+                "messages": messages,
+                "temperature": temperature,
+                "response_format": response_format,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def get(self, cache_key: str) -> Optional[str]:
+        if not settings.llm_cache_enabled:
+            return None
+        now = datetime.now(timezone.utc)
+        record = await self.repo.get_valid(cache_key, now)
+        if not record:
+            return None
+        try:
+            async with AsyncSessionLocal() as session:
+                await LLMResponseCacheRepository(session).touch(cache_key, now)
+                await session.commit()
+        except Exception as exc:  # pragma: no cover - 命中统计失败不影响返回缓存结果
+            logger.debug("更新 LLM 响应缓存命中统计失败: key=%s error=%s", cache_key[:12], exc)
+        return record.response
+
+    async def set(self, cache_key: str, *, model: Optional[str], response: str) -> None:
+        if not settings.llm_cache_enabled:
+            return
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as session:
+            repo = LLMResponseCacheRepository(session)
+            record = await session.get(LLMResponseCache, cache_key)
+            if record is None:
+                record = LLMResponseCache(cache_key=cache_key)
+                session.add(record)
+            record.model = model
+            record.response = response
+            record.hit_count = 0
+            record.last_accessed_at = now
+            record.expires_at = now + timedelta(seconds=settings.llm_cache_ttl_seconds)
+            try:
+                await session.flush()
+            except IntegrityError:
+                # 并发的相同调用已先写入同一条缓存，内容等价，直接忽略
+                await session.rollback()
+                logger.debug("LLM 响应缓存已由并发请求写入: key=%s", cache_key[:12])
+                return
+            # 写入时顺带清理过期与超量条目，避免额外的定时任务
+            expired = await repo.purge_expired(now)
+            trimmed = await repo.trim_to(settings.llm_cache_max_entries)
+            await session.commit()
+        if expired or trimmed:
+            logger.debug("LLM 响应缓存清理: expired=%d trimmed=%d", expired, trimmed)
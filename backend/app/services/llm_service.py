@@ -1,27 +1,25 @@
 import logging
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
 
 import httpx
 from fastapi import HTTPException, status
-from openai import APIConnectionError, APITimeoutError, AsyncOpenAI, InternalServerError
+from openai import APIConnectionError, APITimeoutError, InternalServerError
 
 from ..core.config import settings
 from ..repositories.llm_config_repository import LLMConfigRepository
 from ..repositories.system_config_repository import SystemConfigRepository
 from ..repositories.user_repository import UserRepository
 from ..services.admin_setting_service import AdminSettingService
+from ..services.embedding_cache_service import EmbeddingCacheService
+from ..services.llm_response_cache_service import LLMResponseCacheService
 from ..services.prompt_service import PromptService
 from ..services.usage_service import UsageService
-from ..utils.llm_tool import ChatMessage, LLMClient
+from ..services.vector_store_service import get_vector_store
+from ..utils.llm_tool import ChatMessage, LLMClient, OllamaAsyncClient, llm_client_registry
 
 logger = logging.getLogger(__name__)
 
-try:  # pragma: no cover - 运行环境未安装时兼容
-    from ollama import AsyncClient as OllamaAsyncClient
-except ImportError:  # pragma: no cover - Ollama 为可选依赖
-    OllamaAsyncClient = None
-
 
 class LLMService:
     """封装与大模型交互的所有逻辑，包括配额控制与配置选择。"""
@@ -33,7 +31,9 @@ class LLMService:
         self.user_repo = UserRepository(session)
         self.admin_setting_service = AdminSettingService(session)
         self.usage_service = UsageService(session)
+        self.response_cache = LLMResponseCacheService(session)
         self._embedding_dimensions: Dict[str, int] = {}
+        self._embedding_cache: Optional[EmbeddingCacheService] = None
 
     async def get_llm_response(
         self,
@@ -44,7 +44,9 @@ class LLMService:
         user_id: Optional[int] = None,
         timeout: float = 300.0,
         response_format: Optional[str] = "json_object",
+        cache: bool = False,
     ) -> str:
+        """cache=True 时按请求内容复用历史响应，仅适用于低温度、结果可复用的调用。"""
         messages = [{"role": "system", "content": system_prompt}, *conversation_history]
         return await self._stream_and_collect(
             messages,
@@ -52,6 +54,7 @@ class LLMService:
             user_id=user_id,
             timeout=timeout,
             response_format=response_format,
+            cache=cache,
         )
 
     async def get_summary(
@@ -62,6 +65,7 @@ class LLMService:
         user_id: Optional[int] = None,
         timeout: float = 180.0,
         system_prompt: Optional[str] = None,
+        cache: bool = False,
     ) -> str:
         if not system_prompt:
             prompt_service = PromptService(self.session)
@@ -73,7 +77,34 @@ class LLMService:
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": chapter_content},
         ]
-        return await self._stream_and_collect(messages, temperature=temperature, user_id=user_id, timeout=timeout)
+        return await self._stream_and_collect(
+            messages,
+            temperature=temperature,
+            user_id=user_id,
+            timeout=timeout,
+            cache=cache,
+        )
+
+    async def stream_llm_response(
+        self,
+        system_prompt: str,
+        conversation_history: List[Dict[str, str]],
+        *,
+        temperature: float = 0.7,
+        user_id: Optional[int] = None,
+        timeout: float = 300.0,
+        response_format: Optional[str] = "json_object",
+    ) -> AsyncIterator[str]:
+        """逐段产出模型输出的增量文本，供 SSE 等流式接口直接转发。"""
+        messages = [{"role": "system", "content": system_prompt}, *conversation_history]
+        async for delta in self._stream_deltas(
+            messages,
+            temperature=temperature,
+            user_id=user_id,
+            timeout=timeout,
+            response_format=response_format,
+        ):
+            yield delta
 
     async def _stream_and_collect(
         self,
@@ -83,13 +114,68 @@ class LLMService:
         user_id: Optional[int],
         timeout: float,
         response_format: Optional[str] = None,
+        cache: bool = False,
     ) -> str:
-        config = await self._resolve_llm_config(user_id)
+        config: Optional[Dict[str, Optional[str]]] = None
+        cache_key: Optional[str] = None
+        if cache and settings.llm_cache_enabled:
+            # 先在不计入每日配额的前提下确定模型，命中缓存时不消耗额度
+            lookup_config = await self._resolve_llm_config(user_id, enforce_limit=False)
+            cache_key = LLMResponseCacheService.build_key(
+                model=lookup_config.get("model"),
+                base_url=lookup_config.get("base_url"),
+                messages=messages,
+                temperature=temperature,
+                response_format=response_format,
+            )
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info(
+                    "LLM response cache hit: model=%s user_id=%s key=%s",
+                    lookup_config.get("model"),
+                    user_id,
+                    cache_key[:12],
+                )
+                return cached
+            config = await self._resolve_llm_config(user_id)
+
+        parts: List[str] = []
+        async for delta in self._stream_deltas(
+            messages,
+            temperature=temperature,
+            user_id=user_id,
+            timeout=timeout,
+            response_format=response_format,
+            config=config,
+        ):
+            parts.append(delta)
+        response = "".join(parts)
+
+        if cache_key and config is not None:
+            try:
+                await self.response_cache.set(cache_key, model=config.get("model"), response=response)
+            except Exception as exc:  # pragma: no cover - 缓存写入失败不影响主流程
+                logger.warning("写入 LLM 响应缓存失败: key=%s error=%s", cache_key[:12], exc)
+        return response
+
+    async def _stream_deltas(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        temperature: float,
+        user_id: Optional[int],
+        timeout: float,
+        response_format: Optional[str] = None,
+        config: Optional[Dict[str, Optional[str]]] = None,
+    ) -> AsyncIterator[str]:
+        if config is None:
+            config = await self._resolve_llm_config(user_id)
         client = LLMClient(api_key=config["api_key"], base_url=config.get("base_url"))
 
         chat_messages = [ChatMessage(role=msg["role"], content=msg["content"]) for msg in messages]
 
-        full_response = ""
+        response_length = 0
+        preview = ""
         finish_reason = None
 
         logger.info(
@@ -108,7 +194,11 @@ class LLMService:
                 response_format=response_format,
             ):
                 if part.get("content"):
-                    full_response += part["content"]
+                    content = part["content"]
+                    response_length += len(content)
+                    if len(preview) < 500:
+                        preview += content
+                    yield content
                 if part.get("finish_reason"):
                     finish_reason = part["finish_reason"]
         except InternalServerError as exc:
@@ -152,7 +242,7 @@ class LLMService:
             config.get("model"),
             user_id,
             finish_reason,
-            full_response[:500],
+            preview[:500],
         )
 
         if finish_reason == "length":
@@ -160,14 +250,14 @@ class LLMService:
                 "LLM response truncated: model=%s user_id=%s response_length=%d",
                 config.get("model"),
                 user_id,
-                len(full_response),
+                response_length,
             )
             raise HTTPException(
                 status_code=500,
-                detail=f"AI 响应因长度限制被截断（已生成 {len(full_response)} 字符），请缩短输入内容或调整模型参数"
+                detail=f"AI 响应因长度限制被截断（已生成 {response_length} 字符），请缩短输入内容或调整模型参数"
             )
 
-        if not full_response:
+        if not response_length:
             logger.error(
                 "LLM returned empty response: model=%s user_id=%s finish_reason=%s",
                 config.get("model"),
@@ -184,11 +274,15 @@ class LLMService:
             "LLM response success: model=%s user_id=%s chars=%d",
             config.get("model"),
             user_id,
-            len(full_response),
+            response_length,
         )
-        return full_response
 
-    async def _resolve_llm_config(self, user_id: Optional[int]) -> Dict[str, Optional[str]]:
+    async def _resolve_llm_config(
+        self,
+        user_id: Optional[int],
+        *,
+        enforce_limit: bool = True,
+    ) -> Dict[str, Optional[str]]:
         if user_id:
             config = await self.llm_repo.get_by_user(user_id)
             if config and config.llm_provider_api_key:
@@ -199,7 +293,7 @@ class LLMService:
                 }
 
         # 检查每日使用次数限制
-        if user_id:
+        if user_id and enforce_limit:
             await self._enforce_daily_limit(user_id)
 
         api_key = await self._get_config_value("llm.api_key")
@@ -223,13 +317,42 @@ class LLMService:
         model: Optional[str] = None,
     ) -> List[float]:
         """生成文本向量，用于章节 RAG 检索，支持 openai 与 ollama 双提供方。"""
+        embeddings = await self.get_embeddings([text], user_id=user_id, model=model)
+        return embeddings[0] if embeddings else []
+
+    async def get_embeddings(
+        self,
+        texts: Sequence[str],
+        *,
+        user_id: Optional[int] = None,
+        model: Optional[str] = None,
+    ) -> List[List[float]]:
+        """批量生成文本向量，结果与输入一一对应，失败的条目返回空列表。
+
+        配置只读取一次，文本按 `EMBEDDING_BATCH_SIZE` 与 `EMBEDDING_BATCH_MAX_TOKENS` 分批后
+        分别使用 OpenAI 的 input 列表与 Ollama `/api/embed` 的批量形式请求。
+        """
+        if not texts:
+            return []
         provider = await self._get_config_value("embedding.provider") or "openai"
-        default_model = (
-            await self._get_config_value("ollama.embedding_model") or "nomic-embed-text:latest"
-            if provider == "ollama"
-            else await self._get_config_value("embedding.model") or "text-embedding-3-large"
-        )
-        target_model = model or default_model
+        target_model = model or await self._default_embedding_model(provider)
+        results: List[List[float]] = [[] for _ in texts]
+
+        # 先查嵌入缓存，只有未命中的文本才需要请求提供方
+        embedding_cache = self._get_embedding_cache()
+        if embedding_cache:
+            cached = await embedding_cache.lookup(target_model, texts)
+            for idx, vector in enumerate(cached):
+                if vector:
+                    results[idx] = vector
+        pending = [idx for idx, vector in enumerate(results) if not vector]
+        batches = [
+            [pending[pos] for pos in batch]
+            for batch in self._plan_embedding_batches([texts[idx] for idx in pending])
+        ]
+        if not batches:
+            self._remember_embedding_dimension(target_model, results)
+            return results
 
         if provider == "ollama":
             if OllamaAsyncClient is None:
@@ -240,74 +363,171 @@ class LLMService:
                 await self._get_config_value("ollama.embedding_base_url")
                 or await self._get_config_value("embedding.base_url")
             )
-            client = OllamaAsyncClient(host=base_url)
-            try:
-                response = await client.embeddings(model=target_model, prompt=text)
-            except Exception as exc:  # pragma: no cover - 本地服务调用失败
-                logger.error(
-                    "Ollama 嵌入请求失败: model=%s base_url=%s error=%s",
-                    target_model,
-                    base_url,
-                    exc,
-                    exc_info=True,
+            ollama_client = llm_client_registry.get_ollama_client(host=base_url)
+            for batch in batches:
+                vectors = await self._embed_batch_ollama(
+                    ollama_client,
+                    [texts[idx] for idx in batch],
+                    model=target_model,
+                    base_url=base_url,
                 )
-                return []
-            embedding: Optional[List[float]]
-            if isinstance(response, dict):
-                embedding = response.get("embedding")
-            else:
-                embedding = getattr(response, "embedding", None)
-            if not embedding:
-                logger.warning("Ollama 返回空向量: model=%s", target_model)
-                return []
-            if not isinstance(embedding, list):
-                embedding = list(embedding)
+                for idx, vector in zip(batch, vectors):
+                    results[idx] = vector
         else:
             config = await self._resolve_llm_config(user_id)
             api_key = await self._get_config_value("embedding.api_key") or config["api_key"]
             base_url = await self._get_config_value("embedding.base_url") or config.get("base_url")
-            client = AsyncOpenAI(api_key=api_key, base_url=base_url)
-            try:
-                response = await client.embeddings.create(
-                    input=text,
+            openai_client = llm_client_registry.get_openai_client(api_key=api_key, base_url=base_url)
+            for batch in batches:
+                vectors = await self._embed_batch_openai(
+                    openai_client,
+                    [texts[idx] for idx in batch],
                     model=target_model,
+                    base_url=base_url,
+                    user_id=user_id,
                 )
-            except Exception as exc:  # pragma: no cover - 网络或鉴权失败
-                logger.error(
-                    "OpenAI 嵌入请求失败: model=%s base_url=%s user_id=%s error=%s",
-                    target_model,
-                    base_url,
-                    user_id,
-                    exc,
-                    exc_info=True,
-                )
-                return []
-            if not response.data:
-                logger.warning("OpenAI 嵌入请求返回空数据: model=%s user_id=%s", target_model, user_id)
-                return []
-            embedding = response.data[0].embedding
-
-        if not isinstance(embedding, list):
-            embedding = list(embedding)
-
-        dimension = len(embedding)
-        if not dimension:
-            vector_size_str = await self._get_config_value("embedding.model_vector_size")
-            if vector_size_str:
-                dimension = int(vector_size_str)
-        if dimension:
-            self._embedding_dimensions[target_model] = dimension
-        return embedding
+                for idx, vector in zip(batch, vectors):
+                    results[idx] = vector
+
+        if embedding_cache:
+            fetched = [idx for batch in batches for idx in batch]
+            await embedding_cache.store(
+                target_model,
+                [texts[idx] for idx in fetched],
+                [results[idx] for idx in fetched],
+            )
+
+        self._remember_embedding_dimension(target_model, results)
+        logger.debug(
+            "批量嵌入完成: provider=%s model=%s texts=%d cached=%d batches=%d",
+            provider,
+            target_model,
+            len(texts),
+            len(texts) - len(pending),
+            len(batches),
+        )
+        return results
+
+    def _remember_embedding_dimension(self, model: str, vectors: Sequence[Sequence[float]]) -> None:
+        for vector in vectors:
+            if vector:
+                self._embedding_dimensions[model] = len(vector)
+                return
+
+    def _get_embedding_cache(self) -> Optional[EmbeddingCacheService]:
+        if not settings.embedding_cache_enabled or not settings.vector_store_enabled:
+            return None
+        if self._embedding_cache is None:
+            vector_store = get_vector_store()
+            if vector_store is None:
+                return None
+            self._embedding_cache = EmbeddingCacheService(vector_store)
+        return self._embedding_cache
+
+    @staticmethod
+    def _plan_embedding_batches(texts: Sequence[str]) -> List[List[int]]:
+        """按条数与估算 token 数切分批次，返回每批对应的输入下标；空文本直接跳过。"""
+        max_items = settings.embedding_batch_size
+        max_tokens = settings.embedding_batch_max_tokens
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for idx, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            # 中文约一字一 token，按字符数估算可保证不超过提供方上限
+            estimated = len(text)
+            if current and (len(current) >= max_items or current_tokens + estimated > max_tokens):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(idx)
+            current_tokens += estimated
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch_openai(
+        self,
+        client: Any,
+        batch_texts: List[str],
+        *,
+        model: str,
+        base_url: Optional[str],
+        user_id: Optional[int],
+    ) -> List[List[float]]:
+        try:
+            response = await client.embeddings.create(input=batch_texts, model=model)
+        except Exception as exc:  # pragma: no cover - 网络或鉴权失败
+            logger.error(
+                "OpenAI 嵌入请求失败: model=%s base_url=%s user_id=%s batch=%d error=%s",
+                model,
+                base_url,
+                user_id,
+                len(batch_texts),
+                exc,
+                exc_info=True,
+            )
+            return [[] for _ in batch_texts]
+        if not response.data:
+            logger.warning("OpenAI 嵌入请求返回空数据: model=%s user_id=%s", model, user_id)
+            return [[] for _ in batch_texts]
+
+        vectors: List[List[float]] = [[] for _ in batch_texts]
+        for position, item in enumerate(response.data):
+            index = getattr(item, "index", position)
+            if 0 <= index < len(vectors) and item.embedding:
+                vectors[index] = list(item.embedding)
+        return vectors
+
+    async def _embed_batch_ollama(
+        self,
+        client: Any,
+        batch_texts: List[str],
+        *,
+        model: str,
+        base_url: Optional[str],
+    ) -> List[List[float]]:
+        try:
+            response = await client.embed(model=model, input=batch_texts)
+        except Exception as exc:  # pragma: no cover - 本地服务调用失败
+            logger.error(
+                "Ollama 嵌入请求失败: model=%s base_url=%s batch=%d error=%s",
+                model,
+                base_url,
+                len(batch_texts),
+                exc,
+                exc_info=True,
+            )
+            return [[] for _ in batch_texts]
+        if isinstance(response, dict):
+            embeddings = response.get("embeddings")
+        else:
+            embeddings = getattr(response, "embeddings", None)
+        if not embeddings or len(embeddings) != len(batch_texts):
+            logger.warning(
+                "Ollama 返回的向量数量异常: model=%s expected=%d actual=%d",
+                model,
+                len(batch_texts),
+                len(embeddings or []),
+            )
+            return [[] for _ in batch_texts]
+        return [list(vector) if vector else [] for vector in embeddings]
+
+    async def resolve_embedding_model(self) -> str:
+        """返回当前配置下实际使用的嵌入模型名称。"""
+        provider = await self._get_config_value("embedding.provider") or "openai"
+        return await self._default_embedding_model(provider)
+
+    async def _default_embedding_model(self, provider: str) -> str:
+        if provider == "ollama":
+            return await self._get_config_value("ollama.embedding_model") or "nomic-embed-text:latest"
+        return await self._get_config_value("embedding.model") or "text-embedding-3-large"
 
     async def get_embedding_dimension(self, model: Optional[str] = None) -> Optional[int]:
         """获取嵌入向量维度，优先返回缓存结果，其次读取配置。"""
         provider = await self._get_config_value("embedding.provider") or "openai"
-        default_model = (
-            await self._get_config_value("ollama.embedding_model") or "nomic-embed-text:latest"
-            if provider == "ollama"
-            else await self._get_config_value("embedding.model") or "text-embedding-3-large"
-        )
-        target_model = model or default_model
+        target_model = model or await self._default_embedding_model(provider)
         if target_model in self._embedding_dimensions:
             return self._embedding_dimensions[target_model]
         vector_size_str = await self._get_config_value("embedding.model_vector_size")
@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import json
 import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 _PREFERRED_CONTENT_KEYS: tuple[str, ...] = (
     "content",
@@ -70,9 +72,12 @@ def _clean_string(text: str) -> str:
     )
 
 from fastapi import HTTPException, status
+from pydantic import BaseModel
 from sqlalchemy import delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 
+from ..core.config import settings
 from ..models import (
     BlueprintCharacter,
     BlueprintRelationship,
@@ -91,13 +96,86 @@ from ..schemas.novel import (
     Chapter as ChapterSchema,
     ChapterGenerationStatus,
     ChapterOutline as ChapterOutlineSchema,
+    ChapterSyncStatus,
     NovelProject as NovelProjectSchema,
+    NovelProjectDelta,
     NovelProjectSummary,
     NovelSectionResponse,
     NovelSectionType,
 )
 
 
+@dataclass
+class ChapterGenerationContext:
+    """章节生成所需的数据：蓝图相关的项目数据、目标章节之前已完成的章节及上一章正文。"""
+
+    project: NovelProject
+    written_chapters: List[Chapter]
+    previous_content: str
+
+    @property
+    def previous_chapter(self) -> Optional[Chapter]:
+        return self.written_chapters[-1] if self.written_chapters else None
+
+
+class ProjectPayloadCache:
+    """项目与分区序列化结果的进程内 LRU 缓存，按编码后的字节数控制内存占用。
+
+    键为 (project_id, revision, 视图)，项目数据变化后修订号递增，旧条目不会再被命中；
+    写入路径仍会主动清理该项目的条目，尽早释放内存。
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, int, str], bytes]" = OrderedDict()
+        self._keys_by_project: Dict[str, Set[Tuple[str, int, str]]] = {}
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, int, str]) -> Optional[bytes]:
+        payload = self._entries.get(key)
+        if payload is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def set(self, key: Tuple[str, int, str], payload: bytes) -> None:
+        if len(payload) > self._max_bytes:
+            return
+        self._discard(key)
+        self._entries[key] = payload
+        self._keys_by_project.setdefault(key[0], set()).add(key)
+        self._size += len(payload)
+        while self._size > self._max_bytes:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate(self, project_id: str) -> None:
+        for key in list(self._keys_by_project.get(project_id, ())):
+            self._discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_project.clear()
+        self._size = 0
+
+    def _discard(self, key: Tuple[str, int, str]) -> None:
+        payload = self._entries.pop(key, None)
+        if payload is None:
+            return
+        self._size -= len(payload)
+        keys = self._keys_by_project.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_project[key[0]]
+
+
+project_payload_cache = ProjectPayloadCache(settings.project_payload_cache_max_bytes)
+
+
 class NovelService:
     """小说项目服务，基于拆表后的结构提供聚合与业务操作。"""
 
@@ -121,13 +199,84 @@ class NovelService:
         await self.session.refresh(project)
         return project
 
-    async def ensure_project_owner(self, project_id: str, user_id: int) -> NovelProject:
-        project = await self.repo.get_by_id(project_id)
-        if not project:
+    async def ensure_project_owner(
+        self,
+        project_id: str,
+        user_id: int,
+        *,
+        include_content: bool = True,
+    ) -> NovelProject:
+        project = await self.repo.get_by_id(project_id, include_content=include_content)
+        self._check_owner(project.user_id if project else None, user_id)
+        return project
+
+    async def assert_project_owner(self, project_id: str, user_id: int) -> None:
+        """仅校验项目归属，不加载项目内容。"""
+        self._check_owner(await self.repo.get_owner_id(project_id), user_id)
+
+    async def get_project_revision(self, project_id: str, user_id: Optional[int] = None) -> int:
+        """读取项目修订号，用于生成 ETag；user_id 为空时（管理员）只校验项目存在。"""
+        row = await self.repo.get_owner_and_revision(project_id)
+        if row is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
-        if project.user_id != user_id:
+        owner_id, revision = row
+        if user_id is not None:
+            self._check_owner(owner_id, user_id)
+        return revision or 0
+
+    async def get_cached_payload(
+        self,
+        project_id: str,
+        revision: int,
+        view: str,
+        build: Callable[[], Awaitable[BaseModel]],
+    ) -> bytes:
+        """返回编码后的 JSON：命中 (project_id, revision, view) 时直接复用，否则调用 build 序列化后缓存。
+
+        revision 需在 build 之前读取，保证缓存内容不会比键中的修订号更旧。
+        """
+        key = (project_id, revision, view)
+        payload = project_payload_cache.get(key)
+        if payload is None:
+            payload = (await build()).model_dump_json().encode("utf-8")
+            project_payload_cache.set(key, payload)
+        return payload
+
+    async def get_blueprint_schema(self, project_id: str, user_id: int) -> Blueprint:
+        project = await self.repo.get_with_blueprint(project_id)
+        self._check_owner(project.user_id if project else None, user_id)
+        return self._build_blueprint_schema(project)
+
+    async def get_owned_chapter(self, project_id: str, user_id: int, chapter_number: int) -> Optional[Chapter]:
+        """校验归属后加载单个章节及其版本，不存在时返回 None。"""
+        await self.assert_project_owner(project_id, user_id)
+        return await self.repo.get_chapter(project_id, chapter_number)
+
+    async def load_generation_context(
+        self,
+        project_id: str,
+        user_id: int,
+        chapter_number: int,
+    ) -> ChapterGenerationContext:
+        """加载生成第 chapter_number 章所需的数据：历史章节只取摘要，正文只读取上一章。"""
+        project = await self.repo.get_with_blueprint(project_id)
+        self._check_owner(project.user_id if project else None, user_id)
+        written_chapters = await self.repo.list_written_chapters(project_id, chapter_number)
+        previous_content = ""
+        if written_chapters:
+            previous_content = await self.repo.get_selected_content(written_chapters[-1].id) or ""
+        return ChapterGenerationContext(
+            project=project,
+            written_chapters=written_chapters,
+            previous_content=previous_content,
+        )
+
+    @staticmethod
+    def _check_owner(owner_id: Optional[int], user_id: int) -> None:
+        if owner_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
+        if owner_id != user_id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="无权访问该项目")
-        return project
 
     async def get_project_schema(self, project_id: str, user_id: int) -> NovelProjectSchema:
         project = await self.ensure_project_owner(project_id, user_id)
@@ -139,7 +288,8 @@ class NovelService:
         user_id: int,
         section: NovelSectionType,
     ) -> NovelSectionResponse:
-        project = await self.ensure_project_owner(project_id, user_id)
+        # 各分区均不展示对话与章节正文，无需读取正文列
+        project = await self.ensure_project_owner(project_id, user_id, include_content=False)
         return self._build_section_response(project, section)
 
     async def get_chapter_schema(
@@ -200,9 +350,11 @@ class NovelService:
 
     async def delete_projects(self, project_ids: List[str], user_id: int) -> None:
         for pid in project_ids:
-            project = await self.ensure_project_owner(pid, user_id)
+            project = await self.ensure_project_owner(pid, user_id, include_content=False)
             await self.repo.delete(project)
         await self.session.commit()
+        for pid in project_ids:
+            project_payload_cache.invalidate(pid)
 
     async def count_projects(self) -> int:
         result = await self.session.execute(select(func.count(NovelProject.id)))
@@ -214,6 +366,7 @@ class NovelService:
     async def list_conversations(self, project_id: str) -> List[NovelConversation]:
         stmt = (
             select(NovelConversation)
+            .options(undefer(NovelConversation.content))
             .where(NovelConversation.project_id == project_id)
             .order_by(NovelConversation.seq.asc())
         )
@@ -394,7 +547,9 @@ class NovelService:
             return chapter
         chapter = Chapter(project_id=project_id, chapter_number=chapter_number)
         self.session.add(chapter)
+        await self.repo.bump_revision(project_id)
         await self.session.commit()
+        project_payload_cache.invalidate(project_id)
         await self.session.refresh(chapter)
         return chapter
 
@@ -474,7 +629,7 @@ class NovelService:
         project_id: str,
         section: NovelSectionType,
     ) -> NovelSectionResponse:
-        project = await self.repo.get_by_id(project_id)
+        project = await self.repo.get_by_id(project_id, include_content=False)
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
         return self._build_section_response(project, section)
@@ -518,15 +673,61 @@ class NovelService:
             conversation_history=conversations,
             blueprint=blueprint_schema,
             chapters=chapters_schema,
+            revision=project.revision or 0,
+        )
+
+    async def get_project_delta(
+        self,
+        project_id: str,
+        *,
+        chapter_numbers: Iterable[int] = (),
+        deleted_chapters: Iterable[int] = (),
+    ) -> NovelProjectDelta:
+        """构建增量返回体：只加载受影响章节的大纲、版本与评审，调用方需已完成权限校验。"""
+        numbers = sorted(set(chapter_numbers))
+        outlines_map: Dict[int, ChapterOutline] = {}
+        chapters_map: Dict[int, Chapter] = {}
+        if numbers:
+            outlines_map = {item.chapter_number: item for item in await self.repo.list_outlines(project_id, numbers)}
+            chapters_map = {item.chapter_number: item for item in await self.repo.list_chapters(project_id, numbers)}
+        return NovelProjectDelta(
+            project_id=project_id,
+            revision=await self.repo.get_revision(project_id) or 0,
+            chapters=[
+                self._build_chapter_schema(
+                    None,
+                    number,
+                    outlines_map=outlines_map,
+                    chapters_map=chapters_map,
+                )
+                for number in numbers
+                if number in outlines_map or number in chapters_map
+            ],
+            chapter_outline=[
+                ChapterOutlineSchema(
+                    chapter_number=outline.chapter_number,
+                    title=outline.title,
+                    summary=outline.summary or "",
+                )
+                for outline in outlines_map.values()
+            ],
+            deleted_chapters=sorted(set(deleted_chapters)),
         )
 
+    async def commit_project_changes(self, project_id: str) -> None:
+        """提交当前事务并递增项目修订号，用于不经过 _touch_project 的写入（生成状态、大纲等）。"""
+        await self.repo.bump_revision(project_id)
+        await self.session.commit()
+        project_payload_cache.invalidate(project_id)
+
     async def _touch_project(self, project_id: str) -> None:
         await self.session.execute(
             update(NovelProject)
             .where(NovelProject.id == project_id)
-            .values(updated_at=datetime.now(timezone.utc))
+            .values(updated_at=datetime.now(timezone.utc), revision=NovelProject.revision + 1)
         )
         await self.session.commit()
+        project_payload_cache.invalidate(project_id)
 
     def _build_blueprint_schema(self, project: NovelProject) -> Blueprint:
         blueprint_obj = project.blueprint
@@ -646,17 +847,19 @@ class NovelService:
 
     def _build_chapter_schema(
         self,
-        project: NovelProject,
+        project: Optional[NovelProject],
         chapter_number: int,
         *,
         outlines_map: Optional[Dict[int, ChapterOutline]] = None,
         chapters_map: Optional[Dict[int, Chapter]] = None,
         include_content: bool = True,
     ) -> ChapterSchema:
-        outlines = outlines_map or {outline.chapter_number: outline for outline in project.outlines}
-        chapters = chapters_map or {chapter.chapter_number: chapter for chapter in project.chapters}
-        outline = outlines.get(chapter_number)
-        chapter = chapters.get(chapter_number)
+        if outlines_map is None:
+            outlines_map = {outline.chapter_number: outline for outline in project.outlines}
+        if chapters_map is None:
+            chapters_map = {chapter.chapter_number: chapter for chapter in project.chapters}
+        outline = outlines_map.get(chapter_number)
+        chapter = chapters_map.get(chapter_number)
 
         if not outline and not chapter:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="章节不存在")
@@ -668,10 +871,13 @@ class NovelService:
         versions: Optional[List[str]] = None
         evaluation_text: Optional[str] = None
         status_value = ChapterGenerationStatus.NOT_GENERATED.value
+        summary_status = vector_status = ChapterSyncStatus.NONE.value
         word_count = 0
 
         if chapter:
             status_value = chapter.status or ChapterGenerationStatus.NOT_GENERATED.value
+            summary_status = chapter.summary_status or ChapterSyncStatus.NONE.value
+            vector_status = chapter.vector_status or ChapterSyncStatus.NONE.value
             word_count = chapter.word_count or 0
 
             # 只有在 include_content=True 时才包含完整内容
@@ -696,5 +902,7 @@ class NovelService:
             versions=versions,
             evaluation=evaluation_text,
             generation_status=ChapterGenerationStatus(status_value),
+            summary_status=ChapterSyncStatus(summary_status),
+            vector_status=ChapterSyncStatus(vector_status),
             word_count=word_count,
         )
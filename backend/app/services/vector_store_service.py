@@ -6,15 +6,24 @@ from __future__ import annotations
 本文件中的注释均使用中文，便于团队成员快速理解 RAG 相关逻辑。
 """
 
+import asyncio
 import json
 import logging
 import math
+import re
 from array import array
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from ..core.config import settings
+from ..utils.search_terms import build_match_query, build_search_text
+
+try:  # noqa: SIM105 - numpy 缺失时回退到纯 Python 相似度计算
+    import numpy as np
+except ImportError:  # pragma: no cover - 未安装时使用逐行计算
+    np = None  # type: ignore[assignment]
 
 try:  # noqa: SIM105 - 明确区分依赖缺失的情况
     import libsql_client
@@ -23,6 +32,57 @@ except ImportError:  # pragma: no cover - 在未安装依赖时提供友好提
 
 logger = logging.getLogger(__name__)
 
+# 迁移丢弃旧向量时的回调，参数为受影响的 (项目, 章节号) 列表
+DroppedChaptersHandler = Callable[[List[Tuple[str, int]]], Awaitable[None]]
+
+# 向量表结构定义，列定义中的 {embedding} 按是否启用原生索引替换为 BLOB 或 F32_BLOB(dim)
+_VECTOR_TABLES: Dict[str, Dict[str, Any]] = {
+    "rag_chunks": {
+        "columns": [
+            "id TEXT PRIMARY KEY",
+            "project_id TEXT NOT NULL",
+            "chapter_number INTEGER NOT NULL",
+            "chunk_index INTEGER NOT NULL",
+            "chapter_title TEXT",
+            "content TEXT NOT NULL",
+            "embedding {embedding} NOT NULL",
+            "metadata TEXT",
+            "created_at INTEGER DEFAULT (unixepoch())",
+        ],
+        "project_index": """
+            CREATE INDEX IF NOT EXISTS idx_rag_chunks_project
+            ON rag_chunks(project_id, chapter_number)
+            """,
+        "vector_index": "idx_rag_chunks_embedding",
+        "select_columns": (
+            "t.id AS id, t.content, t.chapter_number, t.chunk_index, t.chapter_title, "
+            "COALESCE(t.metadata, '{}') AS metadata"
+        ),
+        "keyword_table": "rag_chunks_fts",
+        "keyword_sources": ("content", "chapter_title"),
+    },
+    "rag_summaries": {
+        "columns": [
+            "id TEXT PRIMARY KEY",
+            "project_id TEXT NOT NULL",
+            "chapter_number INTEGER NOT NULL",
+            "title TEXT NOT NULL",
+            "summary TEXT NOT NULL",
+            "embedding {embedding} NOT NULL",
+            "created_at INTEGER DEFAULT (unixepoch())",
+        ],
+        "project_index": """
+            CREATE INDEX IF NOT EXISTS idx_rag_summaries_project
+            ON rag_summaries(project_id, chapter_number)
+            """,
+        "vector_index": "idx_rag_summaries_embedding",
+        "select_columns": "t.id AS id, t.chapter_number, t.title, t.summary",
+        "keyword_table": "rag_summaries_fts",
+        "keyword_sources": ("summary", "title"),
+    },
+}
+
+
 
 @dataclass
 class RetrievedChunk:
@@ -33,6 +93,10 @@ class RetrievedChunk:
     chapter_title: Optional[str]
     score: float
     metadata: Dict[str, Any]
+    chunk_index: Optional[int] = None
+    # 检索排序使用的相关度（越大越靠前）：纯向量检索为 1 - 带远近加权的排序分，混合检索为归一化的 RRF 分；
+    # score 始终保留原始余弦距离，仅用于展示与日志
+    relevance: Optional[float] = None
 
 
 @dataclass
@@ -45,10 +109,100 @@ class RetrievedSummary:
     score: float
 
 
+@dataclass(frozen=True)
+class RetrievalFilter:
+    """检索时在 SQL 中生效的章节过滤条件，可选按章节远近加权排序。"""
+
+    before_chapter: Optional[int] = None
+    exclude_chapters: Tuple[int, ...] = ()
+    # 大于 0 时，距离 before_chapter 越远的章节排序分越高（越靠后）
+    recency_weight: float = 0.0
+
+    def sql_conditions(self) -> Tuple[str, Dict[str, Any]]:
+        """返回追加在 WHERE 之后的 AND 条件及其参数，表别名固定为 t。"""
+        clauses: List[str] = []
+        params: Dict[str, Any] = {}
+        if self.before_chapter is not None:
+            clauses.append("t.chapter_number < :before_chapter")
+            params["before_chapter"] = self.before_chapter
+        if self.exclude_chapters:
+            placeholders = ",".join(f":exclude_{idx}" for idx in range(len(self.exclude_chapters)))
+            clauses.append(f"t.chapter_number NOT IN ({placeholders})")
+            params.update({f"exclude_{idx}": number for idx, number in enumerate(self.exclude_chapters)})
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def order_expression(self) -> Tuple[str, Dict[str, Any]]:
+        """返回 ORDER BY 使用的排序表达式，distance 为查询中的距离列别名。"""
+        if not self.has_recency_boost:
+            return "distance", {}
+        return (
+            "distance + :recency_weight * (:before_chapter - t.chapter_number) / CAST(:before_chapter AS REAL)",
+            {"recency_weight": self.recency_weight, "before_chapter": self.before_chapter},
+        )
+
+    def rank_score(self, distance: float, chapter_number: Any) -> float:
+        """与 order_expression 一致的应用层排序分。"""
+        if not self.has_recency_boost:
+            return distance
+        gap = self.before_chapter - int(chapter_number or 0)  # type: ignore[operator]
+        return distance + self.recency_weight * gap / float(self.before_chapter)  # type: ignore[arg-type]
+
+    def allows(self, chapter_number: Any) -> bool:
+        if self.before_chapter is not None and int(chapter_number or 0) >= self.before_chapter:
+            return False
+        return int(chapter_number or 0) not in self.exclude_chapters
+
+    @property
+    def has_recency_boost(self) -> bool:
+        return self.recency_weight > 0 and bool(self.before_chapter)
+
+
+_NO_FILTER = RetrievalFilter()
+
+# 原生索引候选不足时，每轮将 candidate_k 扩大的倍数
+_INDEX_WIDEN_FACTOR = 4
+
+
+@dataclass
+class StoredChapterVectors:
+    """向量库中某一章节已有的片段与摘要（不含向量本身），用于增量入库时比对差异。"""
+
+    # 片段 id -> {"chunk_index", "chapter_title"}
+    chunks: Dict[str, Dict[str, Any]]
+    # {"title", "summary"}，章节尚无摘要时为 None
+    summary: Optional[Dict[str, Any]]
+
+
+@dataclass
+class RetrievedContext:
+    """一次检索同时得到的剧情片段与章节摘要。"""
+
+    chunks: List[RetrievedChunk]
+    summaries: List[RetrievedSummary]
+
+
 class VectorStoreService:
     """libsql 向量库操作工具，确保不同小说项目的数据隔离。"""
 
     def __init__(self) -> None:
+        # 向量维度优先取配置，未配置时在首次写入或查询时根据向量长度确定
+        self._vector_dimension: Optional[int] = settings.embedding_model_vector_size
+        # None 表示尚未检测原生向量索引是否可用
+        self._vector_index_ready: Optional[bool] = None
+        self._vector_index_lock = asyncio.Lock()
+        # None 表示尚未检测 FTS5 关键词索引是否可用
+        self._keyword_index_ready: Optional[bool] = None
+        self._keyword_index_lock = asyncio.Lock()
+        # None 表示尚未确认 vector_distance_cosine 是否可用
+        self._distance_function_available: Optional[bool] = None
+        # 原生索引候选不足而改走精确扫描的次数，用于观察多项目共库时索引是否被绕过
+        self.index_fallbacks = 0
+        # 项目向量数据版本号（进程内），写入或删除后递增
+        self._index_versions: Dict[str, int] = {}
+        # 无向量函数时的内存相似度矩阵，按 (表名, 项目) 缓存
+        self._similarity_matrices: "OrderedDict[Tuple[str, str], _SimilarityMatrix]" = OrderedDict()
+        # 迁移丢弃旧向量前的回调，由入库队列将对应章节重新入库
+        self.on_vectors_dropped: Optional[DroppedChaptersHandler] = None
         if not settings.vector_store_enabled:
             logger.warning("未开启向量库配置，RAG 检索将被跳过。")
             self._client = None
@@ -85,38 +239,26 @@ class VectorStoreService:
         if not self._client or self._schema_ready:
             return
 
+        embedding_type = self._embedding_column_type(self._vector_dimension)
         statements = [
+            self._table_ddl("rag_chunks", embedding_type),
+            _VECTOR_TABLES["rag_chunks"]["project_index"],
+            self._table_ddl("rag_summaries", embedding_type),
+            _VECTOR_TABLES["rag_summaries"]["project_index"],
             """
-            CREATE TABLE IF NOT EXISTS rag_chunks (
-                id TEXT PRIMARY KEY,
-                project_id TEXT NOT NULL,
-                chapter_number INTEGER NOT NULL,
-                chunk_index INTEGER NOT NULL,
-                chapter_title TEXT,
-                content TEXT NOT NULL,
-                embedding BLOB NOT NULL,
-                metadata TEXT,
-                created_at INTEGER DEFAULT (unixepoch())
-            )
-            """,
-            """
-            CREATE INDEX IF NOT EXISTS idx_rag_chunks_project
-            ON rag_chunks(project_id, chapter_number)
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS rag_summaries (
-                id TEXT PRIMARY KEY,
-                project_id TEXT NOT NULL,
-                chapter_number INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                summary TEXT NOT NULL,
+            CREATE TABLE IF NOT EXISTS rag_embedding_cache (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
                 embedding BLOB NOT NULL,
-                created_at INTEGER DEFAULT (unixepoch())
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                created_at INTEGER DEFAULT (unixepoch()),
+                last_used_at INTEGER DEFAULT (unixepoch()),
+                PRIMARY KEY (model, text_hash)
             )
             """,
             """
-            CREATE INDEX IF NOT EXISTS idx_rag_summaries_project
-            ON rag_summaries(project_id, chapter_number)
+            CREATE INDEX IF NOT EXISTS idx_rag_embedding_cache_used
+            ON rag_embedding_cache(last_used_at)
             """,
         ]
 
@@ -129,127 +271,396 @@ class VectorStoreService:
         else:
             self._schema_ready = True
 
+    async def initialize(self) -> None:
+        """启动时校验表结构与关键词索引；已配置向量维度时同时完成原生索引的检测与迁移。"""
+        await self.ensure_schema()
+        if self._vector_dimension:
+            await self._ensure_vector_index(self._vector_dimension)
+        await self._ensure_keyword_index()
+
+    async def close(self) -> None:
+        """关闭 libsql 客户端连接。"""
+        if not self._client:
+            return
+        try:
+            await self._client.close()  # type: ignore[union-attr]
+        except Exception as exc:  # pragma: no cover - 关闭失败仅记录日志
+            logger.warning("关闭 libsql 客户端失败: %s", exc)
+        self._client = None
+
     async def query_chunks(
         self,
         *,
         project_id: str,
         embedding: Sequence[float],
         top_k: Optional[int] = None,
+        retrieval_filter: Optional[RetrievalFilter] = None,
     ) -> List[RetrievedChunk]:
         """根据查询向量检索剧情片段，结果已按相似度排序。"""
+        context = await self.query_context(
+            project_id=project_id,
+            embedding=embedding,
+            top_k_chunks=top_k or settings.vector_top_k_chunks,
+            top_k_summaries=0,
+            retrieval_filter=retrieval_filter,
+        )
+        return context.chunks
+
+    async def query_summaries(
+        self,
+        *,
+        project_id: str,
+        embedding: Sequence[float],
+        top_k: Optional[int] = None,
+        retrieval_filter: Optional[RetrievalFilter] = None,
+    ) -> List[RetrievedSummary]:
+        """根据查询向量检索章节摘要列表。"""
+        context = await self.query_context(
+            project_id=project_id,
+            embedding=embedding,
+            top_k_chunks=0,
+            top_k_summaries=top_k or settings.vector_top_k_summaries,
+            retrieval_filter=retrieval_filter,
+        )
+        return context.summaries
+
+    async def query_context(
+        self,
+        *,
+        project_id: str,
+        embedding: Sequence[float],
+        top_k_chunks: Optional[int] = None,
+        top_k_summaries: Optional[int] = None,
+        query_text: Optional[str] = None,
+        retrieval_filter: Optional[RetrievalFilter] = None,
+    ) -> RetrievedContext:
+        """同时检索剧情片段与章节摘要：两条查询放在同一个 batch 中，一次往返完成。
+
+        传入 query_text 且启用混合检索时，会额外做 BM25 关键词检索，并与向量结果按 RRF 融合。
+        retrieval_filter 的章节范围、排除章节与远近加权均在 SQL 内生效，减少参与打分的行数。
+        """
         if not self._client or not embedding:
-            return []
+            return RetrievedContext(chunks=[], summaries=[])
 
         await self.ensure_schema()
-        top_k = top_k or settings.vector_top_k_chunks
-        if top_k <= 0:
-            return []
+        plan = {
+            "rag_chunks": settings.vector_top_k_chunks if top_k_chunks is None else top_k_chunks,
+            "rag_summaries": settings.vector_top_k_summaries if top_k_summaries is None else top_k_summaries,
+        }
+        plan = {table: top_k for table, top_k in plan.items() if top_k > 0}
+        chapter_filter = retrieval_filter or _NO_FILTER
+        if query_text and await self._ensure_keyword_index():
+            rows = await self._query_tables_hybrid(project_id, embedding, query_text, plan, chapter_filter)
+        else:
+            rows = await self._query_tables(project_id, embedding, plan, chapter_filter)
+        return RetrievedContext(
+            chunks=[self._row_to_chunk(row) for row in rows.get("rag_chunks", [])],
+            summaries=[self._row_to_summary(row) for row in rows.get("rag_summaries", [])],
+        )
+
+    async def _query_tables(
+        self,
+        project_id: str,
+        embedding: Sequence[float],
+        plan: Dict[str, int],
+        chapter_filter: RetrievalFilter = _NO_FILTER,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """按（表 -> Top-K）计划检索，依次尝试原生索引、vector_distance_cosine 扫描与应用层计算。"""
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        pending = dict(plan)
+        if not pending:
+            return results
 
         blob = self._to_f32_blob(embedding)
-        sql = """
-        SELECT
-            content,
-            chapter_number,
-            chapter_title,
-            COALESCE(metadata, '{}') AS metadata,
-            vector_distance_cosine(embedding, :query) AS distance
-        FROM rag_chunks
-        WHERE project_id = :project_id
-        ORDER BY distance ASC
-        LIMIT :limit
-        """
-        try:
-            result = await self._client.execute(  # type: ignore[union-attr]
-                sql,
-                {
-                    "project_id": project_id,
-                    "query": blob,
-                    "limit": top_k,
-                },
-            )
-        except Exception as exc:  # pragma: no cover - 查询异常时仅记录
-            if "no such function: vector_distance_cosine" in str(exc).lower():
-                logger.warning("向量库缺少 vector_distance_cosine 函数，回退至应用层相似度计算。")
-                return await self._query_chunks_with_python_similarity(
-                    project_id=project_id,
-                    embedding=embedding,
-                    top_k=top_k,
+        if await self._ensure_vector_index(len(embedding)):
+            results.update(await self._query_index(project_id, blob, pending, chapter_filter))
+            pending = {table: top_k for table, top_k in pending.items() if table not in results}
+
+        if pending and self._distance_function_available is not False:
+            tables = list(pending)
+            try:
+                result_sets = await self._client.batch(  # type: ignore[union-attr]
+                    [
+                        self._scan_statement(table, project_id, blob, pending[table], chapter_filter)
+                        for table in tables
+                    ]
                 )
-            logger.warning("向量检索剧情片段失败: %s", exc)
-            return []
+            except Exception as exc:  # pragma: no cover - 查询异常时仅记录
+                if "no such function: vector_distance_cosine" in str(exc).lower():
+                    logger.warning("向量库缺少 vector_distance_cosine 函数，回退至应用层相似度计算。")
+                    self._distance_function_available = False
+                else:
+                    logger.warning("向量检索失败: tables=%s error=%s", tables, exc)
+                    results.update({table: [] for table in tables})
+                    pending.clear()
+            else:
+                self._distance_function_available = True
+                for table, result in zip(tables, result_sets):
+                    results[table] = list(self._iter_rows(result))
+                    del pending[table]
 
-        items: List[RetrievedChunk] = []
-        for row in self._iter_rows(result):
-            items.append(
-                RetrievedChunk(
-                    content=row.get("content", ""),
-                    chapter_number=row.get("chapter_number", 0),
-                    chapter_title=row.get("chapter_title"),
-                    score=row.get("distance", 0.0),
-                    metadata=self._parse_metadata(row.get("metadata")),
+        if pending:
+            # 无法批量时并发执行各表的应用层相似度计算
+            tables = list(pending)
+            fallback = await asyncio.gather(
+                *(
+                    self._query_with_python_similarity(table, project_id, embedding, pending[table], chapter_filter)
+                    for table in tables
                 )
             )
-        return items
+            results.update(zip(tables, fallback))
+        for rows in results.values():
+            for row in rows:
+                row["relevance"] = 1.0 - chapter_filter.rank_score(row.get("distance", 0.0), row.get("chapter_number"))
+        return results
 
-    async def query_summaries(
+    async def _query_tables_hybrid(
         self,
-        *,
         project_id: str,
         embedding: Sequence[float],
-        top_k: Optional[int] = None,
-    ) -> List[RetrievedSummary]:
-        """根据查询向量检索章节摘要列表。"""
-        if not self._client or not embedding:
-            return []
+        query_text: str,
+        plan: Dict[str, int],
+        chapter_filter: RetrievalFilter = _NO_FILTER,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """关键词（BM25）与向量两路召回后按倒数排名融合（RRF）。"""
+        match = build_match_query(query_text, settings.vector_keyword_max_terms)
+        if not match or not plan:
+            return await self._query_tables(project_id, embedding, plan, chapter_filter)
 
-        await self.ensure_schema()
-        top_k = top_k or settings.vector_top_k_summaries
-        if top_k <= 0:
-            return []
+        candidates = settings.vector_keyword_candidates
+        tables = list(plan)
+        statements: List[Tuple[str, Dict[str, Any]]] = []
+        for table in tables:
+            statements.append(
+                self._keyword_statement(table, project_id, match, max(candidates, plan[table]), chapter_filter)
+            )
+            statements.append(self._count_statement(table, project_id, chapter_filter))
+        try:
+            result_sets = await self._client.batch(statements)  # type: ignore[union-attr]
+        except Exception as exc:  # pragma: no cover - 关键词检索失败时退回纯向量检索
+            logger.warning("关键词检索失败，仅使用向量检索: %s", exc)
+            return await self._query_tables(project_id, embedding, plan, chapter_filter)
 
-        blob = self._to_f32_blob(embedding)
-        sql = """
+        keyword_rows: Dict[str, List[Dict[str, Any]]] = {}
+        totals: Dict[str, int] = {}
+        for idx, table in enumerate(tables):
+            keyword_rows[table] = self._attach_distances(embedding, list(self._iter_rows(result_sets[2 * idx])))
+            totals[table] = self._read_total(result_sets[2 * idx + 1])
+
+        # 无原生索引的大项目且关键词命中充足时，只对关键词候选做向量打分，跳过全量扫描
+        use_index = await self._ensure_vector_index(len(embedding))
+        prefiltered = {
+            table
+            for table in tables
+            if not use_index
+            and totals[table] > settings.vector_keyword_prefilter_threshold
+            and len(keyword_rows[table]) >= plan[table]
+        }
+        vector_plan = {table: max(candidates, plan[table]) for table in tables if table not in prefiltered}
+        vector_rows = (
+            await self._query_tables(project_id, embedding, vector_plan, chapter_filter) if vector_plan else {}
+        )
+
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for table in tables:
+            if table in prefiltered:
+                vector_ranking = sorted(
+                    keyword_rows[table],
+                    key=lambda row: chapter_filter.rank_score(row["distance"], row.get("chapter_number")),
+                )
+            else:
+                vector_ranking = vector_rows.get(table, [])
+            results[table] = self._fuse_rankings([vector_ranking, keyword_rows[table]], plan[table])
+        logger.debug(
+            "混合检索完成: project=%s keyword_hits=%s prefiltered=%s",
+            project_id,
+            {table: len(rows) for table, rows in keyword_rows.items()},
+            sorted(prefiltered),
+        )
+        return results
+
+    @staticmethod
+    def _keyword_statement(
+        table: str,
+        project_id: str,
+        match: str,
+        limit: int,
+        chapter_filter: RetrievalFilter = _NO_FILTER,
+    ) -> Tuple[str, Dict[str, Any]]:
+        definition = _VECTOR_TABLES[table]
+        fts = definition["keyword_table"]
+        conditions, filter_params = chapter_filter.sql_conditions()
+        sql = f"""
         SELECT
-            chapter_number,
-            title,
-            summary,
-            vector_distance_cosine(embedding, :query) AS distance
-        FROM rag_summaries
-        WHERE project_id = :project_id
-        ORDER BY distance ASC
+            {definition["select_columns"]},
+            t.embedding AS embedding,
+            bm25({fts}) AS bm25
+        FROM {fts}
+        JOIN {table} AS t ON t.rowid = {fts}.rowid
+        WHERE {fts} MATCH :match
+          AND t.project_id = :project_id{conditions}
+        ORDER BY bm25 ASC
         LIMIT :limit
         """
-        try:
-            result = await self._client.execute(  # type: ignore[union-attr]
-                sql,
-                {
-                    "project_id": project_id,
-                    "query": blob,
-                    "limit": top_k,
-                },
-            )
-        except Exception as exc:  # pragma: no cover - 查询异常时仅记录
-            if "no such function: vector_distance_cosine" in str(exc).lower():
-                logger.warning("向量库缺少 vector_distance_cosine 函数，回退至应用层相似度计算。")
-                return await self._query_summaries_with_python_similarity(
-                    project_id=project_id,
-                    embedding=embedding,
-                    top_k=top_k,
-                )
-            logger.warning("向量检索章节摘要失败: %s", exc)
+        return sql, {"match": match, "project_id": project_id, "limit": limit, **filter_params}
+
+    def _attach_distances(self, embedding: Sequence[float], rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """为关键词命中的行计算与查询向量的余弦距离，便于融合后仍以距离作为 score。"""
+        for row in rows:
+            stored = row.pop("embedding", None)
+            if np is not None and stored:
+                if isinstance(stored, memoryview):
+                    stored = stored.tobytes()
+                vector = np.frombuffer(bytes(stored), dtype=np.float32)
+                query = np.asarray(embedding, dtype=np.float32)
+                denominator = float(np.linalg.norm(vector) * np.linalg.norm(query))
+                if vector.shape == query.shape and denominator:
+                    row["distance"] = 1.0 - float(vector @ query) / denominator
+                else:
+                    row["distance"] = 1.0
+            else:
+                row["distance"] = self._cosine_distance(embedding, self._from_f32_blob(stored))
+        return rows
+
+    @staticmethod
+    def _fuse_rankings(rankings: Sequence[List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+        """倒数排名融合：score = Σ 1 / (k + rank)，对两路召回的分值尺度不敏感。"""
+        rrf_k = settings.vector_rrf_k
+        rows_by_id: Dict[Any, Dict[str, Any]] = {}
+        scores: Dict[Any, float] = {}
+        for ranking in rankings:
+            for rank, row in enumerate(ranking, start=1):
+                key = row.get("id")
+                rows_by_id.setdefault(key, row)
+                scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+        ordered = sorted(scores, key=lambda key: scores[key], reverse=True)
+        if not ordered:
             return []
+        # 相关度取归一化后的 RRF 分，后续合并与 MMR 按融合顺序而非单路的向量距离排序
+        top_score = scores[ordered[0]]
+        fused: List[Dict[str, Any]] = []
+        for key in ordered[:top_k]:
+            row = rows_by_id[key]
+            row["relevance"] = scores[key] / top_score
+            fused.append(row)
+        return fused
 
-        items: List[RetrievedSummary] = []
-        for row in self._iter_rows(result):
-            items.append(
-                RetrievedSummary(
-                    chapter_number=row.get("chapter_number", 0),
-                    title=row.get("title", ""),
-                    summary=row.get("summary", ""),
-                    score=row.get("distance", 0.0),
-                )
-            )
-        return items
+    async def _query_index(
+        self,
+        project_id: str,
+        blob: bytes,
+        plan: Dict[str, int],
+        chapter_filter: RetrievalFilter = _NO_FILTER,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """通过原生索引检索，只返回已确定结果的表。
+
+        vector_top_k 在全库范围取近邻，回表后才按项目与章节过滤。候选不足时按倍数逐轮扩大
+        candidate_k，直到凑满 Top-K 或覆盖项目内全部符合条件的行；达到 VECTOR_INDEX_MAX_CANDIDATES
+        仍不足时放弃该表，由调用方改走精确扫描，并累计 index_fallbacks。
+        """
+        resolved: Dict[str, List[Dict[str, Any]]] = {}
+        candidate_k = {table: top_k * settings.vector_index_oversample for table, top_k in plan.items()}
+        totals: Dict[str, int] = {}
+        pending = list(plan)
+        while pending:
+            # 首轮同时统计各表中本项目符合过滤条件的行数，用于判断候选是否已覆盖全部结果
+            count_tables = [table for table in pending if table not in totals]
+            statements = [
+                self._index_statement(table, project_id, blob, candidate_k[table], chapter_filter) for table in pending
+            ] + [self._count_statement(table, project_id, chapter_filter) for table in count_tables]
+            try:
+                result_sets = await self._client.batch(statements)  # type: ignore[union-attr]
+            except Exception as exc:  # pragma: no cover - 索引查询失败时回退
+                logger.warning("原生向量索引查询失败，回退至全量扫描: tables=%s error=%s", pending, exc)
+                return resolved
+            for table, result in zip(count_tables, result_sets[len(pending) :]):
+                totals[table] = self._read_total(result)
+
+            widened: List[str] = []
+            for table, result in zip(pending, result_sets):
+                rows = self._pick_index_rows(list(self._iter_rows(result)), plan[table], totals[table], chapter_filter)
+                if rows is not None:
+                    resolved[table] = rows
+                elif candidate_k[table] < settings.vector_index_max_candidates:
+                    candidate_k[table] = min(
+                        candidate_k[table] * _INDEX_WIDEN_FACTOR, settings.vector_index_max_candidates
+                    )
+                    widened.append(table)
+                else:
+                    self.index_fallbacks += 1
+                    logger.info(
+                        "原生向量索引候选不足，回退至精确扫描: table=%s project=%s candidate_k=%d fallbacks=%d",
+                        table,
+                        project_id,
+                        candidate_k[table],
+                        self.index_fallbacks,
+                    )
+            pending = widened
+        return resolved
+
+    @staticmethod
+    def _index_statement(
+        table: str,
+        project_id: str,
+        blob: bytes,
+        candidate_k: int,
+        chapter_filter: RetrievalFilter = _NO_FILTER,
+    ) -> Tuple[str, Dict[str, Any]]:
+        definition = _VECTOR_TABLES[table]
+        conditions, filter_params = chapter_filter.sql_conditions()
+        sql = f"""
+        SELECT
+            {definition["select_columns"]},
+            vector_distance_cosine(t.embedding, :query) AS distance
+        FROM vector_top_k('{definition["vector_index"]}', :query, :candidate_k) AS v
+        JOIN {table} AS t ON t.rowid = v.id
+        WHERE t.project_id = :project_id{conditions}
+        """
+        return sql, {"project_id": project_id, "query": blob, "candidate_k": candidate_k, **filter_params}
+
+    @staticmethod
+    def _count_statement(
+        table: str,
+        project_id: str,
+        chapter_filter: RetrievalFilter = _NO_FILTER,
+    ) -> Tuple[str, Dict[str, Any]]:
+        conditions, filter_params = chapter_filter.sql_conditions()
+        sql = f"SELECT COUNT(*) AS total FROM {table} AS t WHERE t.project_id = :project_id{conditions}"
+        return sql, {"project_id": project_id, **filter_params}
+
+    @staticmethod
+    def _scan_statement(
+        table: str,
+        project_id: str,
+        blob: bytes,
+        top_k: int,
+        chapter_filter: RetrievalFilter = _NO_FILTER,
+    ) -> Tuple[str, Dict[str, Any]]:
+        conditions, filter_params = chapter_filter.sql_conditions()
+        order_by, order_params = chapter_filter.order_expression()
+        sql = f"""
+        SELECT
+            {_VECTOR_TABLES[table]["select_columns"]},
+            vector_distance_cosine(t.embedding, :query) AS distance
+        FROM {table} AS t
+        WHERE t.project_id = :project_id{conditions}
+        ORDER BY {order_by} ASC
+        LIMIT :limit
+        """
+        return sql, {"project_id": project_id, "query": blob, "limit": top_k, **filter_params, **order_params}
+
+    @staticmethod
+    def _pick_index_rows(
+        rows: List[Dict[str, Any]],
+        top_k: int,
+        total: int,
+        chapter_filter: RetrievalFilter = _NO_FILTER,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """候选已凑满 Top-K 或覆盖项目内全部符合条件的行时返回排序结果，否则返回 None 以扩大候选。"""
+        if len(rows) < min(top_k, total):
+            return None
+        rows.sort(key=lambda row: chapter_filter.rank_score(row.get("distance", 0.0), row.get("chapter_number")))
+        return rows[:top_k]
 
     async def upsert_chunks(
         self,
@@ -261,6 +672,278 @@ class VectorStoreService:
             return
 
         await self.ensure_schema()
+        statements = self._chunk_upsert_statements(records)
+        if not statements:
+            return
+
+        await self._ensure_vector_index(self._statements_dimension(statements))
+        keyword_ready = await self._ensure_keyword_index()
+        written = await self._execute_in_batches(
+            self._with_keyword_statements("rag_chunks", statements, keyword_ready),
+            "rag_chunks",
+        )
+        self._mark_projects_changed("rag_chunks", (params["project_id"] for _, params in statements))
+        logger.debug("已写入章节片段: count=%d", written)
+
+    async def upsert_summaries(
+        self,
+        *,
+        records: Iterable[Dict[str, Any]],
+    ) -> None:
+        """同步章节摘要向量，供摘要层检索使用。"""
+        if not self._client:
+            return
+
+        await self.ensure_schema()
+        statements = self._summary_upsert_statements(records)
+        if not statements:
+            return
+
+        await self._ensure_vector_index(self._statements_dimension(statements))
+        keyword_ready = await self._ensure_keyword_index()
+        written = await self._execute_in_batches(
+            self._with_keyword_statements("rag_summaries", statements, keyword_ready),
+            "rag_summaries",
+        )
+        self._mark_projects_changed("rag_summaries", (params["project_id"] for _, params in statements))
+        logger.debug("已写入章节摘要: count=%d", written)
+
+    async def replace_chapter(
+        self,
+        *,
+        project_id: str,
+        chapter_number: int,
+        chunks: Sequence[Dict[str, Any]],
+        summaries: Sequence[Dict[str, Any]] = (),
+    ) -> bool:
+        """在同一事务内删除章节旧向量并写入新片段与摘要，读方不会看到写了一半的章节。"""
+        if not self._client:
+            return False
+
+        await self.ensure_schema()
+        chunk_statements = self._chunk_upsert_statements(chunks)
+        summary_statements = self._summary_upsert_statements(summaries)
+        await self._ensure_vector_index(self._statements_dimension([*chunk_statements, *summary_statements]))
+        keyword_ready = await self._ensure_keyword_index()
+        statements = self._delete_statements(project_id, [chapter_number], keyword_ready)
+        for table, table_statements in (("rag_chunks", chunk_statements), ("rag_summaries", summary_statements)):
+            for group in self._with_keyword_statements(table, table_statements, keyword_ready):
+                statements.extend(group)
+        try:
+            await self._client.batch(statements)  # type: ignore[union-attr]
+        except Exception as exc:  # pragma: no cover - 事务失败时整体回滚
+            logger.error(
+                "替换章节向量失败，已回滚: project=%s chapter=%s error=%s",
+                project_id,
+                chapter_number,
+                exc,
+            )
+            return False
+        finally:
+            self._mark_projects_changed(None, [project_id])
+        logger.info(
+            "已替换章节向量: project=%s chapter=%s chunks=%d summaries=%d",
+            project_id,
+            chapter_number,
+            len(chunk_statements),
+            len(summary_statements),
+        )
+        return True
+
+    async def get_chapter_vectors(self, project_id: str, chapter_number: int) -> Optional[StoredChapterVectors]:
+        """读取章节已入库的片段 id 与摘要文本，读取失败时返回 None。"""
+        if not self._client:
+            return None
+
+        await self.ensure_schema()
+        params = {"project_id": project_id, "chapter_number": chapter_number}
+        try:
+            chunk_result, summary_result = await self._client.batch(  # type: ignore[union-attr]
+                [
+                    (
+                        "SELECT id, chunk_index, chapter_title FROM rag_chunks "
+                        "WHERE project_id = :project_id AND chapter_number = :chapter_number",
+                        params,
+                    ),
+                    (
+                        "SELECT title, summary FROM rag_summaries "
+                        "WHERE project_id = :project_id AND chapter_number = :chapter_number",
+                        params,
+                    ),
+                ]
+            )
+        except Exception as exc:  # pragma: no cover - 读取失败时由调用方走全量替换
+            logger.warning("读取章节已有向量失败: project=%s chapter=%s error=%s", project_id, chapter_number, exc)
+            return None
+        summaries = list(self._iter_rows(summary_result))
+        return StoredChapterVectors(
+            chunks={
+                str(row["id"]): {"chunk_index": row.get("chunk_index"), "chapter_title": row.get("chapter_title")}
+                for row in self._iter_rows(chunk_result)
+            },
+            summary=summaries[0] if summaries else None,
+        )
+
+    async def update_chapter(
+        self,
+        *,
+        project_id: str,
+        chapter_number: int,
+        upsert_chunks: Sequence[Dict[str, Any]] = (),
+        relocate_chunks: Sequence[Dict[str, Any]] = (),
+        delete_chunk_ids: Sequence[str] = (),
+        summaries: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> bool:
+        """在同一事务内对章节做增量更新。
+
+        upsert_chunks 为需要写入向量的新片段；relocate_chunks 只更新未变片段的序号与标题
+        （需包含 id、chunk_index、chapter_title、content）；delete_chunk_ids 为已移除的片段。
+        summaries 为 None 表示摘要保持不变，空序列表示删除摘要。
+        """
+        if not self._client:
+            return False
+
+        await self.ensure_schema()
+        chunk_statements = self._chunk_upsert_statements(upsert_chunks)
+        summary_statements = self._summary_upsert_statements(summaries or ())
+        await self._ensure_vector_index(self._statements_dimension([*chunk_statements, *summary_statements]))
+        keyword_ready = await self._ensure_keyword_index()
+
+        statements: List[Tuple[str, Dict[str, Any]]] = []
+        if delete_chunk_ids:
+            statements.extend(self._delete_ids_statements("rag_chunks", delete_chunk_ids, keyword_ready))
+        if summaries is not None:
+            summary_params = {"project_id": project_id, "chapter_number": chapter_number}
+            if keyword_ready:
+                statements.append(
+                    (
+                        "DELETE FROM rag_summaries_fts WHERE rowid IN (SELECT rowid FROM rag_summaries "
+                        "WHERE project_id = :project_id AND chapter_number = :chapter_number)",
+                        summary_params,
+                    )
+                )
+            statements.append(
+                (
+                    "DELETE FROM rag_summaries WHERE project_id = :project_id AND chapter_number = :chapter_number",
+                    summary_params,
+                )
+            )
+        relocate_sql = """
+        UPDATE rag_chunks
+        SET chunk_index = :chunk_index,
+            chapter_title = :chapter_title
+        WHERE id = :id
+        """
+        relocate_statements = [
+            (
+                relocate_sql,
+                {
+                    "id": item["id"],
+                    "chunk_index": item["chunk_index"],
+                    "chapter_title": item.get("chapter_title"),
+                    "content": item["content"],
+                },
+            )
+            for item in relocate_chunks
+        ]
+        for table, table_statements in (
+            ("rag_chunks", [*chunk_statements, *relocate_statements]),
+            ("rag_summaries", summary_statements),
+        ):
+            for group in self._with_keyword_statements(table, table_statements, keyword_ready):
+                statements.extend(group)
+        if not statements:
+            return True
+
+        try:
+            await self._client.batch(statements)  # type: ignore[union-attr]
+        except Exception as exc:  # pragma: no cover - 事务失败时整体回滚
+            logger.error(
+                "增量更新章节向量失败，已回滚: project=%s chapter=%s error=%s",
+                project_id,
+                chapter_number,
+                exc,
+            )
+            return False
+        finally:
+            self._mark_projects_changed(None, [project_id])
+        logger.info(
+            "已增量更新章节向量: project=%s chapter=%s 写入=%d 调整=%d 删除=%d 摘要=%s",
+            project_id,
+            chapter_number,
+            len(chunk_statements),
+            len(relocate_statements),
+            len(delete_chunk_ids),
+            "保持" if summaries is None else len(summary_statements),
+        )
+        return True
+
+    async def delete_by_chapters(self, project_id: str, chapter_numbers: Sequence[int]) -> bool:
+        """根据章节编号批量删除对应的上下文数据，返回是否删除成功。"""
+        if not self._client or not chapter_numbers:
+            return True
+
+        await self.ensure_schema()
+        keyword_ready = await self._ensure_keyword_index()
+        try:
+            await self._client.batch(  # type: ignore[union-attr]
+                self._delete_statements(project_id, chapter_numbers, keyword_ready)
+            )
+            logger.info(
+                "已删除章节向量: project=%s chapters=%s",
+                project_id,
+                list(chapter_numbers),
+            )
+        except Exception as exc:  # pragma: no cover - 删除失败时记录日志
+            logger.error("删除章节向量失败: project=%s chapters=%s error=%s", project_id, chapter_numbers, exc)
+            return False
+        finally:
+            self._mark_projects_changed(None, [project_id])
+        return True
+
+    async def _execute_in_batches(self, groups: List[List[Tuple[str, Dict[str, Any]]]], table: str) -> int:
+        """按 VECTOR_WRITE_BATCH_SIZE 条记录分批提交，每批在一个事务内完成，返回成功写入的条数。
+
+        每条记录对应一组语句（行写入及其关键词索引维护），同组语句总是落在同一批内。
+        """
+        batch_size = settings.vector_write_batch_size
+        written = 0
+        for start in range(0, len(groups), batch_size):
+            batch = groups[start : start + batch_size]
+            try:
+                await self._client.batch([statement for group in batch for statement in group])  # type: ignore[union-attr]
+            except Exception as exc:  # pragma: no cover - 单批写入失败时记录日志
+                logger.error("批量写入 %s 失败: size=%d error=%s", table, len(batch), exc)
+            else:
+                written += len(batch)
+        return written
+
+    @staticmethod
+    def _with_keyword_statements(
+        table: str,
+        statements: List[Tuple[str, Dict[str, Any]]],
+        keyword_ready: bool,
+    ) -> List[List[Tuple[str, Dict[str, Any]]]]:
+        """为每条行写入语句附加 FTS5 关键词索引的同步语句（FTS rowid 与正表 rowid 一致）。"""
+        if not keyword_ready:
+            return [[statement] for statement in statements]
+        definition = _VECTOR_TABLES[table]
+        fts = definition["keyword_table"]
+        delete_sql = f"DELETE FROM {fts} WHERE rowid = (SELECT rowid FROM {table} WHERE id = :id)"
+        insert_sql = f"INSERT INTO {fts} (rowid, terms) SELECT rowid, :terms FROM {table} WHERE id = :id"
+        groups: List[List[Tuple[str, Dict[str, Any]]]] = []
+        for sql, params in statements:
+            terms = build_search_text(*(params.get(column) for column in definition["keyword_sources"]))
+            groups.append(
+                [
+                    (sql, params),
+                    (delete_sql, {"id": params["id"]}),
+                    (insert_sql, {"id": params["id"], "terms": terms}),
+                ]
+            )
+        return groups
+
+    def _chunk_upsert_statements(self, records: Iterable[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
         sql = """
         INSERT INTO rag_chunks (
             id,
@@ -287,43 +970,22 @@ class VectorStoreService:
             metadata=excluded.metadata,
             chapter_title=excluded.chapter_title
         """
-        payload = []
+        statements: List[Tuple[str, Dict[str, Any]]] = []
         for item in records:
-            embedding = item.get("embedding", [])
-            payload.append(
-                {
-                    **item,
-                    "embedding": self._to_f32_blob(embedding),
-                    "metadata": json.dumps(item.get("metadata") or {}, ensure_ascii=False),
-                }
-            )
-
-        if not payload:
-            return
-
-        for item in payload:
-            try:
-                await self._client.execute(sql, item)  # type: ignore[union-attr]
-            except Exception as exc:  # pragma: no cover - 单条写入失败时记录日志
-                logger.error("写入 rag_chunks 失败: %s", exc)
-            else:
-                logger.debug(
-                    "已写入章节片段: project=%s chapter=%s chunk=%s",
-                    item.get("project_id"),
-                    item.get("chapter_number"),
-                    item.get("chunk_index"),
-                )
+            params = {
+                "id": item["id"],
+                "project_id": item["project_id"],
+                "chapter_number": item["chapter_number"],
+                "chunk_index": item["chunk_index"],
+                "chapter_title": item.get("chapter_title"),
+                "content": item["content"],
+                "embedding": self._to_f32_blob(item.get("embedding", [])),
+                "metadata": json.dumps(item.get("metadata") or {}, ensure_ascii=False),
+            }
+            statements.append((sql, params))
+        return statements
 
-    async def upsert_summaries(
-        self,
-        *,
-        records: Iterable[Dict[str, Any]],
-    ) -> None:
-        """同步章节摘要向量，供摘要层检索使用。"""
-        if not self._client:
-            return
-
-        await self.ensure_schema()
+    def _summary_upsert_statements(self, records: Iterable[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
         sql = """
         INSERT INTO rag_summaries (
             id,
@@ -345,38 +1007,25 @@ class VectorStoreService:
             embedding=excluded.embedding,
             title=excluded.title
         """
-
-        payload = []
+        statements: List[Tuple[str, Dict[str, Any]]] = []
         for item in records:
-            embedding = item.get("embedding", [])
-            payload.append(
-                {
-                    **item,
-                    "embedding": self._to_f32_blob(embedding),
-                }
-            )
-
-        if not payload:
-            return
-
-        for item in payload:
-            try:
-                await self._client.execute(sql, item)  # type: ignore[union-attr]
-            except Exception as exc:  # pragma: no cover - 单条写入失败时记录日志
-                logger.error("写入 rag_summaries 失败: %s", exc)
-            else:
-                logger.debug(
-                    "已写入章节摘要: project=%s chapter=%s",
-                    item.get("project_id"),
-                    item.get("chapter_number"),
-                )
+            params = {
+                "id": item["id"],
+                "project_id": item["project_id"],
+                "chapter_number": item["chapter_number"],
+                "title": item["title"],
+                "summary": item["summary"],
+                "embedding": self._to_f32_blob(item.get("embedding", [])),
+            }
+            statements.append((sql, params))
+        return statements
 
-    async def delete_by_chapters(self, project_id: str, chapter_numbers: Sequence[int]) -> None:
-        """根据章节编号批量删除对应的上下文数据。"""
-        if not self._client or not chapter_numbers:
-            return
-
-        await self.ensure_schema()
+    @staticmethod
+    def _delete_statements(
+        project_id: str,
+        chapter_numbers: Sequence[int],
+        keyword_ready: bool = False,
+    ) -> List[Tuple[str, Dict[str, Any]]]:
         placeholders = ",".join(":chapter_" + str(idx) for idx in range(len(chapter_numbers)))
         params = {
             "project_id": project_id,
@@ -392,16 +1041,362 @@ class VectorStoreService:
         WHERE project_id = :project_id
           AND chapter_number IN ({placeholders})
         """
+        statements: List[Tuple[str, Dict[str, Any]]] = []
+        if keyword_ready:
+            # 关键词索引需在正表行删除前按 rowid 清理
+            for table, definition in _VECTOR_TABLES.items():
+                statements.append(
+                    (
+                        f"""
+        DELETE FROM {definition["keyword_table"]}
+        WHERE rowid IN (
+            SELECT rowid FROM {table}
+            WHERE project_id = :project_id
+              AND chapter_number IN ({placeholders})
+        )
+        """,
+                        params,
+                    )
+                )
+        statements.extend([(chunk_sql, params), (summary_sql, params)])
+        return statements
+
+    @staticmethod
+    def _delete_ids_statements(
+        table: str,
+        record_ids: Sequence[str],
+        keyword_ready: bool = False,
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        placeholders = ",".join(f":id_{idx}" for idx in range(len(record_ids)))
+        params = {f"id_{idx}": record_id for idx, record_id in enumerate(record_ids)}
+        statements: List[Tuple[str, Dict[str, Any]]] = []
+        if keyword_ready:
+            statements.append(
+                (
+                    f"DELETE FROM {_VECTOR_TABLES[table]['keyword_table']} "
+                    f"WHERE rowid IN (SELECT rowid FROM {table} WHERE id IN ({placeholders}))",
+                    params,
+                )
+            )
+        statements.append((f"DELETE FROM {table} WHERE id IN ({placeholders})", params))
+        return statements
+
+    async def get_cached_embeddings(self, model: str, text_hashes: Sequence[str]) -> Dict[str, List[float]]:
+        """按（模型, 文本哈希）读取嵌入缓存，并刷新命中条目的访问时间。"""
+        if not self._client or not text_hashes:
+            return {}
+
+        await self.ensure_schema()
+        unique_hashes = list(dict.fromkeys(text_hashes))
+        placeholders = ",".join(":hash_" + str(idx) for idx in range(len(unique_hashes)))
+        params: Dict[str, Any] = {
+            "model": model,
+            **{f"hash_{idx}": value for idx, value in enumerate(unique_hashes)},
+        }
+        select_sql = f"""
+        SELECT text_hash, embedding
+        FROM rag_embedding_cache
+        WHERE model = :model
+          AND text_hash IN ({placeholders})
+        """
         try:
-            await self._client.execute(chunk_sql, params)  # type: ignore[union-attr]
-            await self._client.execute(summary_sql, params)  # type: ignore[union-attr]
-            logger.info(
-                "已删除章节向量: project=%s chapters=%s",
-                project_id,
-                list(chapter_numbers),
+            result = await self._client.execute(select_sql, params)  # type: ignore[union-attr]
+        except Exception as exc:  # pragma: no cover - 缓存读取失败视为未命中
+            logger.warning("读取嵌入缓存失败: model=%s error=%s", model, exc)
+            return {}
+
+        found: Dict[str, List[float]] = {}
+        for row in self._iter_rows(result):
+            vector = self._from_f32_blob(row.get("embedding"))
+            if vector:
+                found[row.get("text_hash")] = vector
+        if not found:
+            return found
+
+        hit_hashes = list(found)
+        touch_placeholders = ",".join(":hash_" + str(idx) for idx in range(len(hit_hashes)))
+        touch_sql = f"""
+        UPDATE rag_embedding_cache
+        SET hit_count = hit_count + 1,
+            last_used_at = unixepoch()
+        WHERE model = :model
+          AND text_hash IN ({touch_placeholders})
+        """
+        try:
+            await self._client.execute(  # type: ignore[union-attr]
+                touch_sql,
+                {"model": model, **{f"hash_{idx}": value for idx, value in enumerate(hit_hashes)}},
             )
-        except Exception as exc:  # pragma: no cover - 删除失败时记录日志
-            logger.error("删除章节向量失败: project=%s chapters=%s error=%s", project_id, chapter_numbers, exc)
+        except Exception as exc:  # pragma: no cover - 访问时间更新失败不影响结果
+            logger.debug("刷新嵌入缓存访问时间失败: model=%s error=%s", model, exc)
+        return found
+
+    async def put_cached_embeddings(self, model: str, items: Dict[str, Sequence[float]]) -> int:
+        """写入嵌入缓存，返回成功写入的条数。"""
+        if not self._client or not items:
+            return 0
+
+        await self.ensure_schema()
+        sql = """
+        INSERT INTO rag_embedding_cache (model, text_hash, embedding)
+        VALUES (:model, :text_hash, :embedding)
+        ON CONFLICT(model, text_hash) DO UPDATE SET
+            embedding=excluded.embedding,
+            last_used_at=unixepoch()
+        """
+        statements = [
+            [(sql, {"model": model, "text_hash": text_hash, "embedding": self._to_f32_blob(embedding)})]
+            for text_hash, embedding in items.items()
+            if embedding
+        ]
+        return await self._execute_in_batches(statements, "rag_embedding_cache")
+
+    async def purge_embedding_cache(self, *, max_entries: int, max_age_seconds: int) -> int:
+        """淘汰长期未使用的嵌入缓存，并按最近使用时间保留至多 max_entries 条。"""
+        if not self._client:
+            return 0
+
+        await self.ensure_schema()
+        age_sql = """
+        DELETE FROM rag_embedding_cache
+        WHERE last_used_at < unixepoch() - :max_age
+        """
+        size_sql = """
+        DELETE FROM rag_embedding_cache
+        WHERE rowid NOT IN (
+            SELECT rowid FROM rag_embedding_cache
+            ORDER BY last_used_at DESC
+            LIMIT :max_entries
+        )
+        """
+        removed = 0
+        try:
+            result = await self._client.execute(age_sql, {"max_age": max_age_seconds})  # type: ignore[union-attr]
+            removed += getattr(result, "rows_affected", 0) or 0
+            result = await self._client.execute(size_sql, {"max_entries": max_entries})  # type: ignore[union-attr]
+            removed += getattr(result, "rows_affected", 0) or 0
+        except Exception as exc:  # pragma: no cover - 清理失败时记录日志
+            logger.error("清理嵌入缓存失败: %s", exc)
+        return removed
+
+    async def count_cached_embeddings(self) -> int:
+        """统计嵌入缓存条目数。"""
+        if not self._client:
+            return 0
+
+        await self.ensure_schema()
+        try:
+            result = await self._client.execute(  # type: ignore[union-attr]
+                "SELECT COUNT(*) AS total FROM rag_embedding_cache"
+            )
+        except Exception as exc:  # pragma: no cover - 统计失败时记录日志
+            logger.warning("统计嵌入缓存失败: %s", exc)
+            return 0
+        rows = list(self._iter_rows(result))
+        return int(rows[0].get("total") or 0) if rows else 0
+
+    async def _ensure_vector_index(self, dimension: int) -> bool:
+        """确保正文与摘要表使用 F32_BLOB(dim) 列并建有 libsql 原生向量索引，不可用时返回 False。"""
+        if not self._client or not settings.vector_index_enabled or dimension <= 0:
+            return False
+        if self._vector_index_ready is None:
+            async with self._vector_index_lock:
+                if self._vector_index_ready is None:
+                    self._vector_index_ready = await self._prepare_vector_index(dimension)
+        return bool(self._vector_index_ready) and dimension == self._vector_dimension
+
+    async def _prepare_vector_index(self, dimension: int) -> bool:
+        await self.ensure_schema()
+        try:
+            await self._client.execute("SELECT vector32('[0]')")  # type: ignore[union-attr]
+        except Exception:
+            logger.info("当前 libsql 不支持原生向量索引，检索将使用全量扫描。")
+            return False
+
+        try:
+            for table, definition in _VECTOR_TABLES.items():
+                if not await self._migrate_vector_column(table, dimension):
+                    return False
+                await self._client.execute(  # type: ignore[union-attr]
+                    f"CREATE INDEX IF NOT EXISTS {definition['vector_index']} "
+                    f"ON {table}(libsql_vector_idx(embedding, 'metric=cosine'))"
+                )
+        except Exception as exc:  # pragma: no cover - 建索引失败时回退至全量扫描
+            logger.warning("创建原生向量索引失败，检索将使用全量扫描: %s", exc)
+            return False
+
+        self._vector_dimension = dimension
+        logger.info("已启用 libsql 原生向量索引: dimension=%d", dimension)
+        return True
+
+    async def _migrate_vector_column(self, table: str, dimension: int) -> bool:
+        """将旧版无类型 BLOB 向量列迁移为 F32_BLOB(dim)，维度不匹配的旧数据会被丢弃并通知重新入库。"""
+        result = await self._client.execute(  # type: ignore[union-attr]
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name",
+            {"name": table},
+        )
+        rows = list(self._iter_rows(result))
+        ddl = str(rows[0].get("sql") or "") if rows else ""
+        match = re.search(r"F32_BLOB\((\d+)\)", ddl, re.IGNORECASE)
+        if match:
+            existing = int(match.group(1))
+            if existing != dimension:
+                logger.warning(
+                    "向量表 %s 的维度为 %d，与当前嵌入维度 %d 不一致，跳过原生索引",
+                    table,
+                    existing,
+                    dimension,
+                )
+                return False
+            return True
+
+        byte_length = dimension * 4
+        result = await self._client.execute(  # type: ignore[union-attr]
+            f"SELECT COUNT(*) AS total, COALESCE(SUM(length(embedding) = {byte_length}), 0) AS valid FROM {table}"
+        )
+        counts = list(self._iter_rows(result))
+        total = int(counts[0].get("total") or 0) if counts else 0
+        valid = int(counts[0].get("valid") or 0) if counts else 0
+        dropped: List[Tuple[str, int]] = []
+        if total != valid:
+            result = await self._client.execute(  # type: ignore[union-attr]
+                f"SELECT DISTINCT project_id, chapter_number FROM {table} "
+                f"WHERE length(embedding) != {byte_length} ORDER BY project_id, chapter_number"
+            )
+            dropped = [
+                (str(row.get("project_id")), int(row.get("chapter_number") or 0))
+                for row in self._iter_rows(result)
+            ]
+        # 先持久化章节的待入库状态再删除旧数据，迁移中途退出时最多多入库一次，不会丢失章节
+        if dropped and self.on_vectors_dropped is not None:
+            await self.on_vectors_dropped(dropped)
+
+        columns = ", ".join(column.split()[0] for column in _VECTOR_TABLES[table]["columns"])
+        legacy = f"{table}_legacy"
+        # 在同一事务内完成改名、建新表、拷贝数据与删除旧表
+        await self._client.batch(  # type: ignore[union-attr]
+            [
+                f"ALTER TABLE {table} RENAME TO {legacy}",
+                self._table_ddl(table, f"F32_BLOB({dimension})"),
+                f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {legacy} "
+                f"WHERE length(embedding) = {byte_length}",
+                f"DROP TABLE {legacy}",
+                _VECTOR_TABLES[table]["project_index"],
+            ]
+        )
+        # 重建表后 rowid 会变化，已存在的关键词索引需要随之重建
+        if self._keyword_index_ready:
+            await self._rebuild_keyword_index(table)
+        if dropped:
+            if self.on_vectors_dropped is not None:
+                logger.warning(
+                    "向量表 %s 中有 %d 条旧向量维度与当前模型不一致，已丢弃，%d 个章节已转入后台重新入库",
+                    table,
+                    total - valid,
+                    len(dropped),
+                )
+            else:
+                logger.warning(
+                    "向量表 %s 中有 %d 条旧向量维度与当前模型不一致，已丢弃，请重新入库对应章节: %s",
+                    table,
+                    total - valid,
+                    dropped,
+                )
+        logger.info("向量表 %s 已迁移为 F32_BLOB(%d)，保留 %d 条记录", table, dimension, valid)
+        return True
+
+    async def _ensure_keyword_index(self) -> bool:
+        """确保正文与摘要表建有 FTS5 关键词索引，未启用混合检索或不支持 FTS5 时返回 False。"""
+        if not self._client or not settings.vector_hybrid_search:
+            return False
+        if self._keyword_index_ready is None:
+            async with self._keyword_index_lock:
+                if self._keyword_index_ready is None:
+                    self._keyword_index_ready = await self._prepare_keyword_index()
+        return bool(self._keyword_index_ready)
+
+    async def _prepare_keyword_index(self) -> bool:
+        await self.ensure_schema()
+        try:
+            for table, definition in _VECTOR_TABLES.items():
+                await self._client.execute(  # type: ignore[union-attr]
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {definition['keyword_table']} "
+                    "USING fts5(terms, tokenize='unicode61')"
+                )
+                # 新建索引或曾关闭混合检索期间有写入时，行数会与正表不一致，此时从正表重建
+                result = await self._client.execute(  # type: ignore[union-attr]
+                    f"SELECT (SELECT COUNT(*) FROM {table}) AS total, "
+                    f"(SELECT COUNT(*) FROM {definition['keyword_table']}) AS indexed"
+                )
+                counts = list(self._iter_rows(result))
+                if counts and int(counts[0].get("total") or 0) != int(counts[0].get("indexed") or 0):
+                    await self._rebuild_keyword_index(table)
+        except Exception as exc:  # pragma: no cover - 不支持 FTS5 时回退至纯向量检索
+            logger.warning("创建 FTS5 关键词索引失败，检索将仅使用向量: %s", exc)
+            return False
+        logger.info("已启用 FTS5 关键词索引，检索模式为关键词 + 向量混合检索")
+        return True
+
+    async def _rebuild_keyword_index(self, table: str) -> None:
+        """从正表全量重建关键词索引，在同一事务内完成清空与写入。"""
+        definition = _VECTOR_TABLES[table]
+        fts = definition["keyword_table"]
+        sources = ", ".join(definition["keyword_sources"])
+        result = await self._client.execute(f"SELECT rowid AS row_id, {sources} FROM {table}")  # type: ignore[union-attr]
+        statements: List[Any] = [f"DELETE FROM {fts}"]
+        for row in self._iter_rows(result):
+            terms = build_search_text(*(row.get(column) for column in definition["keyword_sources"]))
+            statements.append(
+                (f"INSERT INTO {fts} (rowid, terms) VALUES (:rowid, :terms)", {"rowid": row["row_id"], "terms": terms})
+            )
+        await self._client.batch(statements)  # type: ignore[union-attr]
+        logger.info("已重建关键词索引 %s: rows=%d", fts, len(statements) - 1)
+
+    @staticmethod
+    def _embedding_column_type(dimension: Optional[int]) -> str:
+        if dimension and settings.vector_index_enabled:
+            return f"F32_BLOB({dimension})"
+        return "BLOB"
+
+    @staticmethod
+    def _table_ddl(table: str, embedding_type: str) -> str:
+        columns = ",\n                ".join(
+            column.format(embedding=embedding_type) for column in _VECTOR_TABLES[table]["columns"]
+        )
+        return f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {columns}
+            )
+            """
+
+    @staticmethod
+    def _statements_dimension(statements: Sequence[Tuple[str, Dict[str, Any]]]) -> int:
+        """根据写入语句中已编码的 float32 向量推算维度。"""
+        for _, params in statements:
+            blob = params.get("embedding")
+            if blob:
+                return len(blob) // 4
+        return 0
+
+    def _row_to_chunk(self, row: Dict[str, Any]) -> RetrievedChunk:
+        return RetrievedChunk(
+            content=row.get("content", ""),
+            chapter_number=row.get("chapter_number", 0),
+            chapter_title=row.get("chapter_title"),
+            score=row.get("distance", 0.0),
+            metadata=self._parse_metadata(row.get("metadata")),
+            chunk_index=row.get("chunk_index"),
+            relevance=row.get("relevance"),
+        )
+
+    @staticmethod
+    def _row_to_summary(row: Dict[str, Any]) -> RetrievedSummary:
+        return RetrievedSummary(
+            chapter_number=row.get("chapter_number", 0),
+            title=row.get("title", ""),
+            summary=row.get("summary", ""),
+            score=row.get("distance", 0.0),
+        )
 
     @staticmethod
     def _to_f32_blob(embedding: Sequence[float]) -> bytes:
@@ -432,71 +1427,73 @@ class VectorStoreService:
         similarity = dot / (norm_a * norm_b)
         return 1.0 - similarity
 
-    async def _query_chunks_with_python_similarity(
+    async def _query_with_python_similarity(
         self,
-        *,
+        table: str,
         project_id: str,
         embedding: Sequence[float],
         top_k: int,
-    ) -> List[RetrievedChunk]:
-        sql = """
+        chapter_filter: RetrievalFilter = _NO_FILTER,
+    ) -> List[Dict[str, Any]]:
+        sql = f"""
         SELECT
-            content,
-            chapter_number,
-            chapter_title,
-            COALESCE(metadata, '{}') AS metadata,
-            embedding
-        FROM rag_chunks
-        WHERE project_id = :project_id
+            {_VECTOR_TABLES[table]["select_columns"]},
+            t.embedding AS embedding
+        FROM {table} AS t
+        WHERE t.project_id = :project_id
         """
-        result = await self._client.execute(sql, {"project_id": project_id})  # type: ignore[union-attr]
-        scored: List[RetrievedChunk] = []
+        if np is not None:
+            # 矩阵按项目缓存，章节过滤与远近加权在矩阵打分时以掩码方式应用
+            matrix = await self._get_similarity_matrix(table, sql, project_id)
+            return [
+                {**row, "distance": distance}
+                for row, distance in matrix.top_k(embedding, top_k, chapter_filter)
+            ]
+
+        conditions, filter_params = chapter_filter.sql_conditions()
+        result = await self._client.execute(  # type: ignore[union-attr]
+            sql + conditions, {"project_id": project_id, **filter_params}
+        )
+        scored: List[Dict[str, Any]] = []
         for row in self._iter_rows(result):
             stored_embedding = self._from_f32_blob(row.get("embedding"))
             distance = self._cosine_distance(embedding, stored_embedding)
-            scored.append(
-                RetrievedChunk(
-                    content=row.get("content", ""),
-                    chapter_number=row.get("chapter_number", 0),
-                    chapter_title=row.get("chapter_title"),
-                    score=distance,
-                    metadata=self._parse_metadata(row.get("metadata")),
-                )
-            )
-        scored.sort(key=lambda item: item.score)
+            scored.append({**row, "distance": distance})
+        scored.sort(key=lambda item: chapter_filter.rank_score(item["distance"], item.get("chapter_number")))
         return scored[:top_k]
 
-    async def _query_summaries_with_python_similarity(
-        self,
-        *,
-        project_id: str,
-        embedding: Sequence[float],
-        top_k: int,
-    ) -> List[RetrievedSummary]:
-        sql = """
-        SELECT
-            chapter_number,
-            title,
-            summary,
-            embedding
-        FROM rag_summaries
-        WHERE project_id = :project_id
-        """
+    async def _get_similarity_matrix(self, table: str, sql: str, project_id: str) -> "_SimilarityMatrix":
+        """读取（或复用）项目的归一化向量矩阵，写入与删除时会被失效。"""
+        key = (table, project_id)
+        cached = self._similarity_matrices.get(key)
+        if cached is not None:
+            self._similarity_matrices.move_to_end(key)
+            return cached
+
         result = await self._client.execute(sql, {"project_id": project_id})  # type: ignore[union-attr]
-        scored: List[RetrievedSummary] = []
-        for row in self._iter_rows(result):
-            stored_embedding = self._from_f32_blob(row.get("embedding"))
-            distance = self._cosine_distance(embedding, stored_embedding)
-            scored.append(
-                RetrievedSummary(
-                    chapter_number=row.get("chapter_number", 0),
-                    title=row.get("title", ""),
-                    summary=row.get("summary", ""),
-                    score=distance,
-                )
-            )
-        scored.sort(key=lambda item: item.score)
-        return scored[:top_k]
+        matrix = _SimilarityMatrix.build(list(self._iter_rows(result)))
+        self._similarity_matrices[key] = matrix
+        while len(self._similarity_matrices) > settings.vector_fallback_cache_projects:
+            self._similarity_matrices.popitem(last=False)
+        logger.debug(
+            "已构建项目向量矩阵: table=%s project=%s rows=%d",
+            table,
+            project_id,
+            len(matrix.rows),
+        )
+        return matrix
+
+    def index_version(self, project_id: str) -> int:
+        """返回项目向量数据的版本号，每次写入或删除后递增，供检索结果缓存作为失效依据。"""
+        return self._index_versions.get(project_id, 0)
+
+    def _mark_projects_changed(self, table: Optional[str], project_ids: Iterable[str]) -> None:
+        """写入或删除完成后递增项目版本号，并失效对应项目的内存向量矩阵。"""
+        tables = [table] if table else list(_VECTOR_TABLES)
+        for project_id in set(project_ids):
+            self._index_versions[project_id] = self._index_versions.get(project_id, 0) + 1
+            for name in tables:
+                self._similarity_matrices.pop((name, project_id), None)
 
     @staticmethod
     def _parse_metadata(raw: Any) -> Dict[str, Any]:
@@ -515,6 +1512,11 @@ class VectorStoreService:
                 return {}
         return {}
 
+    @classmethod
+    def _read_total(cls, result: Any) -> int:
+        rows = list(cls._iter_rows(result))
+        return int(rows[0].get("total") or 0) if rows else 0
+
     @staticmethod
     def _iter_rows(result: Any) -> Iterable[Dict[str, Any]]:
         """统一处理 libsql 返回的行数据，确保以 dict 形式迭代。"""
@@ -537,8 +1539,127 @@ class VectorStoreService:
         return normalized
 
 
+class _SimilarityMatrix:
+    """单个项目的向量矩阵：行向量预先归一化，查询时一次矩阵乘法即可得到全部余弦相似度。"""
+
+    def __init__(self, rows: List[Dict[str, Any]], matrix: Any) -> None:
+        self.rows = rows
+        self.matrix = matrix
+        self.chapters = np.asarray([int(row.get("chapter_number") or 0) for row in rows], dtype=np.int64)
+
+    @classmethod
+    def build(cls, raw_rows: List[Dict[str, Any]]) -> "_SimilarityMatrix":
+        rows: List[Dict[str, Any]] = []
+        vectors: List[Any] = []
+        dimension = 0
+        for row in raw_rows:
+            blob = row.get("embedding")
+            if not blob:
+                continue
+            if isinstance(blob, memoryview):
+                blob = blob.tobytes()
+            vector = np.frombuffer(bytes(blob), dtype=np.float32)
+            if not dimension:
+                dimension = vector.shape[0]
+            if vector.shape[0] != dimension:
+                continue
+            rows.append({key: value for key, value in row.items() if key != "embedding"})
+            vectors.append(vector)
+
+        if not vectors:
+            return cls([], np.empty((0, 0), dtype=np.float32))
+        matrix = np.vstack(vectors)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return cls(rows, matrix / norms)
+
+    def top_k(
+        self,
+        embedding: Sequence[float],
+        top_k: int,
+        chapter_filter: RetrievalFilter = _NO_FILTER,
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """返回 (行数据, 余弦距离) 列表，按距离（或带远近加权的排序分）升序排列。"""
+        if not self.rows or top_k <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        if query.shape[0] != self.matrix.shape[1]:
+            logger.warning(
+                "查询向量维度与已存储向量不一致: query=%d stored=%d",
+                query.shape[0],
+                self.matrix.shape[1],
+            )
+            return []
+        allowed = np.ones(len(self.rows), dtype=bool)
+        if chapter_filter.before_chapter is not None:
+            allowed &= self.chapters < chapter_filter.before_chapter
+        if chapter_filter.exclude_chapters:
+            allowed &= ~np.isin(self.chapters, chapter_filter.exclude_chapters)
+        indexes = np.flatnonzero(allowed)
+        if indexes.shape[0] == 0:
+            return []
+        norm = float(np.linalg.norm(query))
+        if norm == 0:
+            return [(self.rows[idx], 1.0) for idx in indexes[:top_k]]
+
+        distances = 1.0 - self.matrix[indexes] @ (query / norm)
+        ranks = distances
+        if chapter_filter.has_recency_boost:
+            before = float(chapter_filter.before_chapter)  # type: ignore[arg-type]
+            ranks = distances + chapter_filter.recency_weight * (before - self.chapters[indexes]) / before
+        k = min(top_k, ranks.shape[0])
+        candidates = np.argpartition(ranks, k - 1)[:k]
+        ordered = candidates[np.argsort(ranks[candidates])]
+        return [(self.rows[indexes[pos]], float(distances[pos])) for pos in ordered]
+
+
+_shared_vector_store: Optional[VectorStoreService] = None
+
+
+async def init_vector_store(
+    on_vectors_dropped: Optional[DroppedChaptersHandler] = None,
+) -> Optional[VectorStoreService]:
+    """在应用启动时创建进程内共享的向量库实例并校验表结构。
+
+    on_vectors_dropped 在迁移丢弃维度不匹配的旧向量前调用，用于将对应章节重新入库。
+    """
+    store = get_vector_store()
+    if store:
+        store.on_vectors_dropped = on_vectors_dropped
+        await store.initialize()
+    return store
+
+
+def get_vector_store() -> Optional[VectorStoreService]:
+    """返回共享的向量库实例，可直接作为 FastAPI 依赖使用；未启用或初始化失败时返回 None。"""
+    global _shared_vector_store
+    if not settings.vector_store_enabled:
+        return None
+    if _shared_vector_store is None:
+        try:
+            _shared_vector_store = VectorStoreService()
+        except RuntimeError as exc:
+            logger.warning("向量库初始化失败，RAG 检索被禁用: %s", exc)
+            return None
+    return _shared_vector_store
+
+
+async def close_vector_store() -> None:
+    """应用退出时关闭共享的向量库连接。"""
+    global _shared_vector_store
+    if _shared_vector_store is not None:
+        await _shared_vector_store.close()
+        _shared_vector_store = None
+
+
 __all__ = [
     "VectorStoreService",
     "RetrievedChunk",
+    "RetrievalFilter",
+    "RetrievedContext",
     "RetrievedSummary",
+    "StoredChapterVectors",
+    "close_vector_store",
+    "get_vector_store",
+    "init_vector_store",
 ]
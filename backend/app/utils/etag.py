@@ -0,0 +1,47 @@
+"""基于项目修订号的 ETag 与条件请求辅助函数。"""
+
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# 允许客户端缓存，但每次使用前必须携带 If-None-Match 重新验证
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+
+def project_etag(project_id: str, revision: int, view: str) -> str:
+    """生成强 ETag：同一项目、同一修订号、同一视图的返回体逐字节一致。"""
+    return f'"{project_id}.{revision}.{view}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """按 If-None-Match 的弱比较规则判断是否命中，支持 * 与逗号分隔的多个 ETag。"""
+    if not if_none_match:
+        return False
+    candidates = [item.strip() for item in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    return any(item.removeprefix("W/") == etag for item in candidates)
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """请求的 ETag 仍然有效时返回 304 响应，否则返回 None。"""
+    if not etag_matches(request.headers.get("if-none-match"), etag):
+        return None
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = ETAG_CACHE_CONTROL
+
+
+def etag_json_response(payload: bytes, etag: str) -> Response:
+    """以已编码的 JSON 字节直接构造响应，跳过 FastAPI 的再次校验与序列化。"""
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL},
+    )
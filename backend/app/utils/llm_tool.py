@@ -1,11 +1,31 @@
 # -*- coding: utf-8 -*-
 """OpenAI 兼容型 LLM 工具封装，保持与旧项目一致的接口体验。"""
 
+import asyncio
+import importlib.util
+import logging
 import os
+from collections import OrderedDict
 from dataclasses import asdict, dataclass
-from typing import AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
-from openai import AsyncOpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from ..core.config import settings
+
+try:  # pragma: no cover - 运行环境未安装时兼容
+    from ollama import AsyncClient as OllamaAsyncClient
+except ImportError:  # pragma: no cover - Ollama 为可选依赖
+    OllamaAsyncClient = None
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 依赖 h2 包，未安装时自动回退到 HTTP/1.1
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 被淘汰的客户端可能仍有在途请求，延迟到最长调用超时之后再关闭连接池
+_EVICTED_CLIENT_CLOSE_DELAY_SECONDS = 600.0
 
 
 @dataclass
@@ -25,7 +45,10 @@ class LLMClient:
         if not key:
             raise ValueError("缺少 OPENAI_API_KEY 配置，请在数据库或环境变量中补全。")
 
-        self._client = AsyncOpenAI(api_key=key, base_url=base_url or os.environ.get("OPENAI_API_BASE"))
+        self._client = llm_client_registry.get_openai_client(
+            api_key=key,
+            base_url=base_url or os.environ.get("OPENAI_API_BASE"),
+        )
 
     async def stream_chat(
         self,
@@ -63,3 +86,116 @@ class LLMClient:
                 "content": choice.delta.content,
                 "finish_reason": choice.finish_reason,
             }
+
+
+class LLMClientRegistry:
+    """进程级客户端注册表，按 (provider, api_key, base_url) 复用带长连接池的客户端。"""
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        self._max_size = max_size or settings.llm_client_registry_size
+        self._clients: "OrderedDict[Tuple[str, str, Optional[str]], Any]" = OrderedDict()
+        self._evicted: Dict[Any, Optional[asyncio.Task]] = {}
+
+    def get_openai_client(self, *, api_key: str, base_url: Optional[str] = None) -> AsyncOpenAI:
+        """获取 OpenAI 兼容客户端，同一组凭据共享一个连接池。"""
+        key = ("openai", api_key, base_url or None)
+        client = self._lookup(key)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url or None,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=self._build_limits(),
+                    http2=self._http2_enabled(),
+                ),
+            )
+            self._store(key, client)
+        return client
+
+    def get_ollama_client(self, *, host: Optional[str] = None) -> Any:
+        """获取 Ollama 客户端，本地服务同样复用连接池。"""
+        if OllamaAsyncClient is None:
+            raise RuntimeError("缺少 ollama 依赖，请先安装 ollama 包。")
+        key = ("ollama", "", host or None)
+        client = self._lookup(key)
+        if client is None:
+            client = OllamaAsyncClient(host=host, limits=self._build_limits())
+            self._store(key, client)
+        return client
+
+    async def aclose(self) -> None:
+        """关闭全部客户端连接池，在应用退出时调用。"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client, task in list(self._evicted.items()):
+            if task is not None:
+                task.cancel()
+            clients.append(client)
+        self._evicted.clear()
+        for client in clients:
+            try:
+                await self._close_client(client)
+            except Exception as exc:  # pragma: no cover - 关闭失败仅记录日志
+                logger.warning("关闭 LLM 客户端失败: %s", exc)
+        if clients:
+            logger.info("已关闭 %d 个 LLM 客户端连接池", len(clients))
+
+    def _lookup(self, key: Tuple[str, str, Optional[str]]) -> Any:
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+        return client
+
+    def _store(self, key: Tuple[str, str, Optional[str]], client: Any) -> None:
+        self._clients[key] = client
+        while len(self._clients) > self._max_size:
+            evicted_key, evicted = self._clients.popitem(last=False)
+            self._schedule_close(evicted)
+            logger.debug("LLM 客户端注册表已满，淘汰: provider=%s base_url=%s", evicted_key[0], evicted_key[2])
+        logger.debug("创建 LLM 客户端: provider=%s base_url=%s", key[0], key[2])
+
+    def _schedule_close(self, client: Any) -> None:
+        """在后台延迟关闭被淘汰的客户端，避免其连接池与套接字一直占用。"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 没有运行中的事件循环时无法异步关闭，留待 aclose 统一处理
+            self._evicted[client] = None
+            return
+        self._evicted[client] = loop.create_task(self._close_evicted(client))
+
+    async def _close_evicted(self, client: Any) -> None:
+        try:
+            await asyncio.sleep(_EVICTED_CLIENT_CLOSE_DELAY_SECONDS)
+            await self._close_client(client)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # pragma: no cover - 关闭失败仅记录日志
+            logger.warning("关闭被淘汰的 LLM 客户端失败: %s", exc)
+        finally:
+            self._evicted.pop(client, None)
+
+    @staticmethod
+    def _build_limits() -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+            keepalive_expiry=settings.llm_http_keepalive_expiry,
+        )
+
+    @staticmethod
+    def _http2_enabled() -> bool:
+        return settings.llm_http2_enabled and _HTTP2_AVAILABLE
+
+    @staticmethod
+    async def _close_client(client: Any) -> None:
+        if isinstance(client, AsyncOpenAI):
+            await client.close()
+            return
+        # Ollama 客户端未暴露关闭方法，直接关闭其内部 httpx 客户端
+        http_client = getattr(client, "_client", None)
+        if isinstance(http_client, httpx.AsyncClient):
+            await http_client.aclose()
+
+
+llm_client_registry = LLMClientRegistry()
@@ -0,0 +1,37 @@
+import re
+from typing import List, Optional
+
+# 连续的中日韩字符，或连续的字母数字
+_TOKEN_PATTERN = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[A-Za-z0-9]+")
+_CJK_PATTERN = re.compile(r"[㐀-䶿一-鿿豈-﫿]")
+
+
+def extract_terms(text: Optional[str]) -> List[str]:
+    """将文本切分为检索词：中文按相邻二字切分（单字保留原样），英文与数字按单词小写。
+
+    两字人名、地名在三字切分下无法命中，二字切分可以覆盖这类专有名词。
+    """
+    if not text:
+        return []
+    terms: List[str] = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group(0)
+        if _CJK_PATTERN.match(token):
+            if len(token) == 1:
+                terms.append(token)
+            else:
+                terms.extend(token[idx : idx + 2] for idx in range(len(token) - 1))
+        else:
+            terms.append(token.lower())
+    return terms
+
+
+def build_search_text(*parts: Optional[str]) -> str:
+    """生成写入 FTS5 表的检索文本，词之间以空格分隔，交给 unicode61 分词器逐词索引。"""
+    return " ".join(term for part in parts for term in extract_terms(part))
+
+
+def build_match_query(text: Optional[str], max_terms: int) -> str:
+    """生成 FTS5 MATCH 表达式：去重后的检索词以 OR 连接，由 BM25 负责按命中程度排序。"""
+    unique_terms = list(dict.fromkeys(extract_terms(text)))[:max_terms]
+    return " OR ".join(f'"{term}"' for term in unique_terms)
@@ -0,0 +1,14 @@
+"""Server-Sent Events 辅助函数。"""
+
+import json
+from typing import Any, Dict
+
+# SSE 心跳间隔，需小于 nginx 等代理的空闲超时
+SSE_HEARTBEAT_SECONDS = 15.0
+SSE_HEARTBEAT = ": ping\n\n"
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse_event(event: str, payload: Dict[str, Any]) -> str:
+    """按 SSE 协议编码一条带事件名的 JSON 消息。"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
@@ -19,6 +19,7 @@ CREATE TABLE IF NOT EXISTS novel_projects (
     title VARCHAR(255) NOT NULL,
     initial_prompt TEXT,
     status VARCHAR(32) DEFAULT 'draft',
+    revision INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     CONSTRAINT fk_novel_projects_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
@@ -92,6 +93,8 @@ CREATE TABLE IF NOT EXISTS chapters (
     real_summary TEXT NULL,
     status VARCHAR(32) DEFAULT 'not_generated',
     word_count INT DEFAULT 0,
+    summary_status VARCHAR(16) NOT NULL DEFAULT 'none',
+    vector_status VARCHAR(16) NOT NULL DEFAULT 'none',
     selected_version_id BIGINT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -107,7 +110,8 @@ CREATE TABLE IF NOT EXISTS chapter_versions (
     content LONGTEXT NOT NULL,
     metadata JSON NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    CONSTRAINT fk_versions_chapter FOREIGN KEY (chapter_id) REFERENCES chapters(id) ON DELETE CASCADE
+    CONSTRAINT fk_versions_chapter FOREIGN KEY (chapter_id) REFERENCES chapters(id) ON DELETE CASCADE,
+    INDEX idx_chapter_versions_chapter (chapter_id, created_at)
 );
 
 ALTER TABLE chapters
@@ -124,7 +128,8 @@ CREATE TABLE IF NOT EXISTS chapter_evaluations (
     score DECIMAL(5,2) NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT fk_evaluations_chapter FOREIGN KEY (chapter_id) REFERENCES chapters(id) ON DELETE CASCADE,
-    CONSTRAINT fk_evaluations_version FOREIGN KEY (version_id) REFERENCES chapter_versions(id) ON DELETE CASCADE
+    CONSTRAINT fk_evaluations_version FOREIGN KEY (version_id) REFERENCES chapter_versions(id) ON DELETE CASCADE,
+    INDEX idx_chapter_evaluations_chapter (chapter_id, created_at)
 );
 
 CREATE TABLE IF NOT EXISTS llm_configs (
@@ -177,3 +182,36 @@ CREATE TABLE IF NOT EXISTS update_logs (
     created_by VARCHAR(64) NULL,
     is_pinned TINYINT(1) DEFAULT 0
 );
+
+CREATE TABLE IF NOT EXISTS generation_jobs (
+    id CHAR(36) PRIMARY KEY,
+    user_id INT NOT NULL,
+    project_id CHAR(36) NOT NULL,
+    job_type VARCHAR(32) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    payload JSON NULL,
+    result JSON NULL,
+    error TEXT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_generation_jobs_user (user_id),
+    INDEX idx_generation_jobs_project (project_id),
+    INDEX idx_generation_jobs_status (status),
+    CONSTRAINT fk_generation_jobs_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT fk_generation_jobs_project FOREIGN KEY (project_id) REFERENCES novel_projects(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    model VARCHAR(255) NULL,
+    response LONGTEXT NOT NULL,
+    hit_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_accessed_at TIMESTAMP NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    INDEX idx_llm_response_cache_accessed (last_accessed_at),
+    INDEX idx_llm_response_cache_expires (expires_at)
+);
@@ -0,0 +1,53 @@
+"""测试公共配置：在导入应用模块之前注入最小化的环境变量，避免读写开发环境的数据库。"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+_TEST_DB_PATH = Path(tempfile.mkdtemp(prefix="arboris-tests-")) / "test.db"
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ["DB_PROVIDER"] = "sqlite"
+os.environ["DEBUG"] = "false"
+# DATABASE_URL 会去掉库路径开头的 /，因此使用相对当前目录的路径指向临时数据库
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.relpath(_TEST_DB_PATH)}"
+os.environ.pop("VECTOR_DB_URL", None)
+
+
+@pytest.fixture(scope="session")
+def admin_user_id() -> int:
+    """初始化临时数据库（建表并创建默认管理员），返回管理员 ID。"""
+    from sqlalchemy import select
+
+    from app.db.init_db import init_db
+    from app.db.session import AsyncSessionLocal
+    from app.models import User
+
+    async def _setup() -> int:
+        await init_db()
+        async with AsyncSessionLocal() as session:
+            return await session.scalar(select(User.id).where(User.is_admin.is_(True)))
+
+    return asyncio.run(_setup())
+
+
+@pytest.fixture
+def project_id(admin_user_id: int) -> str:
+    """为每个用例创建一个独立的小说项目。"""
+    from app.db.session import AsyncSessionLocal
+    from app.services.novel_service import NovelService
+
+    async def _create() -> str:
+        async with AsyncSessionLocal() as session:
+            project = await NovelService(session).create_project(admin_user_id, "测试项目", "测试")
+            return project.id
+
+    return asyncio.run(_create())
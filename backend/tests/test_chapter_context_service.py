@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import chapter_context_service
+from app.services.chapter_context_service import ChapterContextService, ChapterRAGContext, RetrievalResultCache
+from app.services.vector_store_service import RetrievedChunk, RetrievedContext, VectorStoreService
+
+
+def _chunk(chapter: int, index, content: str, score: float) -> RetrievedChunk:
+    return RetrievedChunk(
+        content=content,
+        chapter_number=chapter,
+        chapter_title=f"第{chapter}章",
+        score=score,
+        metadata={},
+        chunk_index=index,
+    )
+
+
+def test_join_without_overlap_removes_shared_text():
+    assert ChapterContextService._join_without_overlap("林风走进山门", "山门前站着苏瑶") == "林风走进山门前站着苏瑶"
+
+
+def test_join_without_overlap_falls_back_to_newline():
+    assert ChapterContextService._join_without_overlap("第一段", "第二段") == "第一段\n第二段"
+
+
+def test_merge_adjacent_chunks_joins_consecutive_indexes():
+    merged = ChapterContextService._merge_adjacent_chunks(
+        [
+            _chunk(1, 1, "山门前站着苏瑶", 0.3),
+            _chunk(1, 0, "林风走进山门", 0.2),
+            _chunk(1, 3, "夜深了", 0.5),
+        ]
+    )
+    assert [chunk.content for chunk in merged] == ["林风走进山门前站着苏瑶", "夜深了"]
+    assert merged[0].score == 0.2
+    assert merged[0].chunk_index == 1
+    assert merged[0].metadata["merged_chunks"] == [0, 1]
+
+
+def test_merge_adjacent_chunks_keeps_chapters_apart_and_sorts_by_score():
+    merged = ChapterContextService._merge_adjacent_chunks(
+        [
+            _chunk(2, 0, "第二章开头", 0.4),
+            _chunk(1, 0, "第一章开头", 0.6),
+            _chunk(1, 0, "第一章开头", 0.6),
+            _chunk(3, None, "无编号片段", 0.1),
+        ]
+    )
+    assert [chunk.content for chunk in merged] == ["无编号片段", "第二章开头", "第一章开头"]
+
+
+def test_select_with_mmr_prefers_diverse_chunks():
+    chunks = [
+        _chunk(1, 0, "林风与苏瑶在山门前比剑", 0.10),
+        _chunk(2, 0, "林风与苏瑶在山门前比剑", 0.11),
+        _chunk(3, 0, "魔教长老夜袭藏经阁", 0.30),
+    ]
+    selected = ChapterContextService._select_with_mmr(chunks, 2, 0.5)
+    assert [chunk.chapter_number for chunk in selected] == [1, 3]
+
+
+def test_select_with_mmr_with_lambda_one_ranks_by_relevance():
+    chunks = [
+        _chunk(1, 0, "甲乙丙", 0.4),
+        _chunk(2, 0, "甲乙丙", 0.1),
+        _chunk(3, 0, "丁戊己", 0.2),
+    ]
+    selected = ChapterContextService._select_with_mmr(chunks, 3, 1.0)
+    assert [chunk.chapter_number for chunk in selected] == [2, 3, 1]
+
+
+def test_select_with_mmr_handles_empty_input():
+    assert ChapterContextService._select_with_mmr([], 3, 0.5) == []
+    assert ChapterContextService._select_with_mmr([_chunk(1, 0, "甲", 0.1)], 0, 0.5) == []
+
+
+def test_retrieval_cache_returns_copies():
+    cache = RetrievalResultCache(max_entries=2)
+    context = ChapterRAGContext(query="q", chunks=[_chunk(1, 0, "林风", 0.1)], summaries=[])
+    cache.set(("key",), context)
+    context.chunks.clear()
+
+    first = cache.get(("key",))
+    first.chunks[0].content = "被修改"
+    first.chunks.append(_chunk(2, 0, "苏瑶", 0.2))
+
+    second = cache.get(("key",))
+    assert [chunk.content for chunk in second.chunks] == ["林风"]
+
+
+def test_retrieval_cache_evicts_least_recently_used():
+    cache = RetrievalResultCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.set((key,), ChapterRAGContext(query=key, chunks=[], summaries=[]))
+    cache.get(("a",))
+    cache.set(("c",), ChapterRAGContext(query="c", chunks=[], summaries=[]))
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) is not None
+
+
+class _FakeLLMService:
+    def __init__(self):
+        self.model = "embed-a"
+        self.embedding_models = []
+
+    async def resolve_embedding_model(self):
+        return self.model
+
+    async def get_embedding(self, text, *, user_id=None, model=None):
+        self.embedding_models.append(model)
+        return [1.0, 0.0]
+
+
+class _FakeVectorStore:
+    def index_version(self, project_id):
+        return 0
+
+    async def query_context(self, **kwargs):
+        return RetrievedContext(chunks=[_chunk(1, 0, "林风走进山门", 0.1)], summaries=[])
+
+
+def test_retrieval_cache_key_includes_embedding_model(monkeypatch):
+    monkeypatch.setattr(settings, "vector_db_url", "file:unused.db")
+    monkeypatch.setattr(chapter_context_service, "retrieval_result_cache", RetrievalResultCache(max_entries=8))
+    llm_service = _FakeLLMService()
+    service = ChapterContextService(llm_service=llm_service, vector_store=_FakeVectorStore())
+
+    async def _retrieve():
+        return await service.retrieve_for_generation(project_id="p", query_text="林风", user_id=1)
+
+    asyncio.run(_retrieve())
+    asyncio.run(_retrieve())
+    assert llm_service.embedding_models == ["embed-a"]
+
+    llm_service.model = "embed-b"
+    asyncio.run(_retrieve())
+    assert llm_service.embedding_models == ["embed-a", "embed-b"]
+
+
+def _unit_vector(distance: float):
+    """返回与查询向量 [1, 0] 余弦距离为 distance 的二维单位向量。"""
+    cosine = 1.0 - distance
+    return [cosine, (1.0 - cosine**2) ** 0.5]
+
+
+def test_recency_boost_survives_merge_and_mmr(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_db_url", f"file:{tmp_path / 'vectors.db'}")
+    monkeypatch.setattr(settings, "vector_hybrid_search", False)
+    monkeypatch.setattr(settings, "vector_recency_weight", 0.1)
+    monkeypatch.setattr(settings, "vector_mmr_lambda", 0.7)
+    monkeypatch.setattr(chapter_context_service, "retrieval_result_cache", RetrievalResultCache(max_entries=8))
+
+    async def _scenario():
+        vector_store = VectorStoreService()
+        try:
+            await vector_store.upsert_chunks(
+                records=[
+                    {
+                        "id": f"p:{chapter}:0",
+                        "project_id": "p",
+                        "chapter_number": chapter,
+                        "chunk_index": 0,
+                        "chapter_title": f"第{chapter}章",
+                        "content": content,
+                        "embedding": _unit_vector(distance),
+                        "metadata": {},
+                    }
+                    for chapter, content, distance in ((1, "林风初入山门拜师", 0.20), (9, "苏瑶夜探藏经阁", 0.22))
+                ]
+            )
+            service = ChapterContextService(llm_service=_FakeLLMService(), vector_store=vector_store)
+            return await service.retrieve_for_generation(
+                project_id="p", query_text="剑", user_id=1, top_k_chunks=1, target_chapter=10
+            )
+        finally:
+            await vector_store.close()
+
+    context = asyncio.run(_scenario())
+    # 第 1 章距离更近，但加权后（0.20 + 0.1 × 9/10 > 0.22 + 0.1 × 1/10）临近的第 9 章应排在前面
+    assert [chunk.chapter_number for chunk in context.chunks] == [9]
+    assert context.chunks[0].score == pytest.approx(0.22, abs=1e-4)
+
+
+def test_mmr_keeps_fused_keyword_order():
+    store = VectorStoreService()
+    near = {"id": "a", "content": "林风在山门前练剑", "chapter_number": 1, "chunk_index": 0, "distance": 0.10}
+    keyword = {"id": "c", "content": "苏瑶手持玄冰剑", "chapter_number": 2, "chunk_index": 0, "distance": 0.50}
+    # 关键词召回只命中 c，向量召回中 c 排第二；融合后 c 排在首位
+    fused = VectorStoreService._fuse_rankings([[near, keyword], [keyword]], 2)
+    chunks = [store._row_to_chunk(row) for row in fused]
+    assert [chunk.chapter_number for chunk in chunks] == [2, 1]
+
+    selected = ChapterContextService._select_with_mmr(ChapterContextService._merge_adjacent_chunks(chunks), 2, 0.7)
+    assert [chunk.chapter_number for chunk in selected] == [2, 1]
+    # score 仍为原始余弦距离
+    assert selected[0].score == 0.50
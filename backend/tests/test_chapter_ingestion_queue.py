@@ -0,0 +1,144 @@
+import asyncio
+
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models import Chapter, ChapterVersion, NovelProject
+from app.schemas.novel import ChapterSyncStatus
+from app.services import chapter_ingestion_queue
+from app.services.chapter_ingestion_queue import ChapterIngestionQueue
+from app.services.llm_service import LLMService
+
+
+async def _create_chapter(project_id: str) -> int:
+    async with AsyncSessionLocal() as session:
+        chapter = Chapter(
+            project_id=project_id,
+            chapter_number=1,
+            summary_status=ChapterSyncStatus.PENDING.value,
+            vector_status=ChapterSyncStatus.PENDING.value,
+        )
+        session.add(chapter)
+        await session.flush()
+        version = ChapterVersion(chapter_id=chapter.id, content="旧版本正文", version_label="v1")
+        session.add(version)
+        await session.flush()
+        chapter.selected_version_id = version.id
+        await session.commit()
+        return chapter.id
+
+
+async def _edit_chapter(chapter_id: int) -> None:
+    """模拟用户在摘要生成期间编辑章节：切换到新版本并将状态置回 pending。"""
+    async with AsyncSessionLocal() as session:
+        chapter = await session.get(Chapter, chapter_id)
+        version = ChapterVersion(chapter_id=chapter_id, content="新版本正文", version_label="v2")
+        session.add(version)
+        await session.flush()
+        chapter.selected_version_id = version.id
+        chapter.summary_status = ChapterSyncStatus.PENDING.value
+        chapter.vector_status = ChapterSyncStatus.PENDING.value
+        await session.commit()
+
+
+async def _load_state(project_id: str, chapter_id: int):
+    async with AsyncSessionLocal() as session:
+        chapter = await session.get(Chapter, chapter_id)
+        revision = await session.scalar(select(NovelProject.revision).where(NovelProject.id == project_id))
+        return chapter, revision
+
+
+def _queue() -> ChapterIngestionQueue:
+    return ChapterIngestionQueue(max_attempts=1, retry_base_seconds=0)
+
+
+def test_stale_summary_does_not_overwrite_newer_edit(project_id, monkeypatch):
+    async def _scenario():
+        chapter_id = await _create_chapter(project_id)
+
+        async def _summary_during_edit(self, content, **kwargs):
+            await _edit_chapter(chapter_id)
+            return f"摘要：{content}"
+
+        monkeypatch.setattr(LLMService, "get_summary", _summary_during_edit)
+        await _queue()._ingest(project_id, 1)
+        return await _load_state(project_id, chapter_id)
+
+    chapter, _ = asyncio.run(_scenario())
+    assert chapter.real_summary is None
+    assert chapter.summary_status == ChapterSyncStatus.PENDING.value
+    assert chapter.vector_status == ChapterSyncStatus.PENDING.value
+
+
+def test_summary_saved_when_chapter_unchanged(project_id, monkeypatch):
+    async def _summary(self, content, **kwargs):
+        return f"摘要：{content}"
+
+    monkeypatch.setattr(LLMService, "get_summary", _summary)
+
+    async def _scenario():
+        chapter_id = await _create_chapter(project_id)
+        _, revision_before = await _load_state(project_id, chapter_id)
+        await _queue()._ingest(project_id, 1)
+        chapter, revision_after = await _load_state(project_id, chapter_id)
+        return chapter, revision_before, revision_after
+
+    chapter, revision_before, revision_after = asyncio.run(_scenario())
+    assert chapter.real_summary == "摘要：旧版本正文"
+    assert chapter.summary_status == ChapterSyncStatus.SUCCEEDED.value
+    # 测试环境未配置向量库，向量入库被跳过
+    assert chapter.vector_status == ChapterSyncStatus.SKIPPED.value
+    assert revision_after > revision_before
+
+
+class _FakeVectorStore:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.deleted = []
+
+    async def delete_by_chapters(self, project_id, chapter_numbers):
+        if self.failures:
+            self.failures -= 1
+            return False
+        self.deleted.append((project_id, list(chapter_numbers)))
+        return True
+
+
+def test_delete_runs_inline_when_queue_not_started(monkeypatch):
+    store = _FakeVectorStore()
+    monkeypatch.setattr(chapter_ingestion_queue, "get_vector_store", lambda: store)
+
+    asyncio.run(_queue().delete_chapters("p", [3, 4]))
+    assert store.deleted == [("p", [3, 4])]
+
+
+def test_failed_delete_is_retried_in_background(monkeypatch):
+    store = _FakeVectorStore(failures=1)
+    monkeypatch.setattr(chapter_ingestion_queue, "get_vector_store", lambda: store)
+    queue = ChapterIngestionQueue(max_attempts=2, retry_base_seconds=0)
+
+    async def _scenario():
+        queue._started = True
+        await queue.delete_chapters("p", [5])
+        await asyncio.gather(*queue._runners.values())
+
+    asyncio.run(_scenario())
+    assert store.deleted == [("p", [5])]
+
+
+def test_requeue_marks_existing_chapters_pending(project_id):
+    async def _scenario():
+        chapter_id = await _create_chapter(project_id)
+        async with AsyncSessionLocal() as session:
+            chapter = await session.get(Chapter, chapter_id)
+            chapter.vector_status = ChapterSyncStatus.SUCCEEDED.value
+            await session.commit()
+        _, revision_before = await _load_state(project_id, chapter_id)
+        # 第 99 章已被删除，仅在向量库中残留
+        await _queue().requeue_chapters([(project_id, 1), (project_id, 99)])
+        chapter, revision_after = await _load_state(project_id, chapter_id)
+        return chapter, revision_before, revision_after
+
+    chapter, revision_before, revision_after = asyncio.run(_scenario())
+    assert chapter.vector_status == ChapterSyncStatus.PENDING.value
+    assert revision_after > revision_before
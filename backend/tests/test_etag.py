@@ -0,0 +1,45 @@
+from starlette.requests import Request
+
+from app.utils.etag import etag_matches, not_modified, project_etag
+
+ETAG = project_etag("p1", 3, "full")
+
+
+def _request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_project_etag_is_quoted_and_view_specific():
+    assert ETAG == '"p1.3.full"'
+    assert project_etag("p1", 3, "section") != ETAG
+
+
+def test_etag_matches_exact_and_weak():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches(f"W/{ETAG}", ETAG)
+
+
+def test_etag_matches_lists_and_wildcard():
+    assert etag_matches(f'"other", {ETAG}', ETAG)
+    assert etag_matches("*", ETAG)
+
+
+def test_etag_does_not_match_other_revisions():
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches("", ETAG)
+    assert not etag_matches(project_etag("p1", 2, "full"), ETAG)
+    # 未加引号的值不是合法的 ETag
+    assert not etag_matches("p1.3.full", ETAG)
+
+
+def test_not_modified_returns_304_with_headers():
+    response = not_modified(_request(ETAG), ETAG)
+    assert response.status_code == 304
+    assert response.headers["etag"] == ETAG
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+def test_not_modified_returns_none_on_mismatch():
+    assert not_modified(_request(), ETAG) is None
+    assert not_modified(_request('"stale"'), ETAG) is None
@@ -0,0 +1,89 @@
+import asyncio
+import uuid
+
+from app.db.session import AsyncSessionLocal
+from app.models import GenerationJob
+from app.repositories.generation_job_repository import GenerationJobRepository
+from app.schemas.generation_job import GenerationJobStatus, GenerationJobType
+from app.services import generation_job_service
+from app.services.generation_job_service import GenerationJobWorker
+
+
+async def _create_job(user_id: int, project_id: str) -> str:
+    async with AsyncSessionLocal() as session:
+        job = GenerationJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            project_id=project_id,
+            job_type=GenerationJobType.CHAPTER_EVALUATION.value,
+            status=GenerationJobStatus.PENDING.value,
+            payload={"chapter_number": 1},
+        )
+        session.add(job)
+        await session.commit()
+        return job.id
+
+
+async def _load_job(job_id: str) -> GenerationJob:
+    async with AsyncSessionLocal() as session:
+        return await GenerationJobRepository(session).get(id=job_id)
+
+
+def test_claim_only_succeeds_once(admin_user_id, project_id):
+    async def _scenario():
+        job_id = await _create_job(admin_user_id, project_id)
+        claims = []
+        for _ in range(2):
+            async with AsyncSessionLocal() as session:
+                claims.append(await GenerationJobRepository(session).claim(job_id))
+                await session.commit()
+        return claims, await _load_job(job_id)
+
+    claims, job = asyncio.run(_scenario())
+    assert claims == [True, False]
+    assert job.status == GenerationJobStatus.RUNNING.value
+    assert job.attempts == 1
+
+
+def test_concurrent_runs_execute_handler_once(admin_user_id, project_id, monkeypatch):
+    calls = []
+
+    async def _handler(session, user, handler_project_id, payload):
+        calls.append((user.id, handler_project_id, payload))
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    monkeypatch.setitem(
+        generation_job_service._HANDLERS, GenerationJobType.CHAPTER_EVALUATION.value, _handler
+    )
+    worker = GenerationJobWorker(worker_count=1, max_attempts=3)
+
+    async def _scenario():
+        job_id = await _create_job(admin_user_id, project_id)
+        await asyncio.gather(worker._run(job_id), worker._run(job_id))
+        return await _load_job(job_id)
+
+    job = asyncio.run(_scenario())
+    assert calls == [(admin_user_id, project_id, {"chapter_number": 1})]
+    assert job.status == GenerationJobStatus.SUCCEEDED.value
+    assert job.result == {"ok": True}
+    assert job.attempts == 1
+    assert job.finished_at is not None
+
+
+def test_failed_handler_records_error(admin_user_id, project_id, monkeypatch):
+    async def _handler(session, user, handler_project_id, payload):
+        raise RuntimeError("生成失败")
+
+    monkeypatch.setitem(
+        generation_job_service._HANDLERS, GenerationJobType.CHAPTER_EVALUATION.value, _handler
+    )
+
+    async def _scenario():
+        job_id = await _create_job(admin_user_id, project_id)
+        await GenerationJobWorker(worker_count=1, max_attempts=3)._run(job_id)
+        return await _load_job(job_id)
+
+    job = asyncio.run(_scenario())
+    assert job.status == GenerationJobStatus.FAILED.value
+    assert job.error == "生成失败"
@@ -0,0 +1,57 @@
+import asyncio
+
+from app.services.generation_limiter import GenerationLimiter
+
+
+async def _run_tasks(limiter: GenerationLimiter, user_ids):
+    active = 0
+    peak = 0
+
+    async def _task(user_id):
+        nonlocal active, peak
+        async with limiter.slot(user_id):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(_task(user_id) for user_id in user_ids))
+    return peak
+
+
+def test_per_user_limit():
+    limiter = GenerationLimiter(global_limit=10, per_user_limit=2)
+    assert asyncio.run(_run_tasks(limiter, [1] * 5)) == 2
+
+
+def test_global_limit_across_users():
+    limiter = GenerationLimiter(global_limit=3, per_user_limit=2)
+    assert asyncio.run(_run_tasks(limiter, [1, 1, 2, 2, 3, 3])) == 3
+
+
+def test_anonymous_calls_only_use_global_limit():
+    limiter = GenerationLimiter(global_limit=2, per_user_limit=1)
+    assert asyncio.run(_run_tasks(limiter, [None] * 4)) == 2
+
+
+def test_user_semaphores_are_released():
+    limiter = GenerationLimiter(global_limit=4, per_user_limit=1)
+    asyncio.run(_run_tasks(limiter, [1, 1, 2]))
+    assert limiter._user_semaphores == {}
+    assert limiter._user_waiters == {}
+
+
+def test_user_slot_released_on_error():
+    limiter = GenerationLimiter(global_limit=1, per_user_limit=1)
+
+    async def _scenario():
+        try:
+            async with limiter.slot(1):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        # 异常退出后名额已归还，下一次获取不会阻塞
+        await asyncio.wait_for(_run_tasks(limiter, [1]), timeout=1)
+
+    asyncio.run(_scenario())
+    assert limiter._user_semaphores == {}
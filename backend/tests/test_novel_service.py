@@ -0,0 +1,129 @@
+import asyncio
+
+from app.db.session import AsyncSessionLocal
+from app.models import Chapter, ChapterOutline, ChapterVersion, NovelProject
+from app.schemas.novel import NovelProjectDelta
+from app.services import novel_service
+from app.services.novel_service import NovelService, ProjectPayloadCache
+
+
+async def _add_chapters(project_id: str, numbers) -> None:
+    async with AsyncSessionLocal() as session:
+        for number in numbers:
+            chapter = Chapter(project_id=project_id, chapter_number=number)
+            session.add(chapter)
+            session.add(
+                ChapterOutline(project_id=project_id, chapter_number=number, title=f"第{number}章", summary="大纲")
+            )
+            await session.flush()
+            version = ChapterVersion(chapter_id=chapter.id, content=f"第{number}章正文", version_label="v1")
+            session.add(version)
+            await session.flush()
+            chapter.selected_version_id = version.id
+        await session.commit()
+
+
+def test_project_delta_only_contains_requested_chapters(project_id):
+    async def _scenario():
+        await _add_chapters(project_id, [1, 2, 3])
+        async with AsyncSessionLocal() as session:
+            service = NovelService(session)
+            revision = await service.repo.get_revision(project_id)
+            delta = await service.get_project_delta(
+                project_id, chapter_numbers=[3, 1, 3, 9], deleted_chapters=[5, 4]
+            )
+            return revision, delta
+
+    revision, delta = asyncio.run(_scenario())
+    assert delta.revision == revision
+    assert [chapter.chapter_number for chapter in delta.chapters] == [1, 3]
+    assert delta.chapters[1].content == "第3章正文"
+    assert sorted(outline.chapter_number for outline in delta.chapter_outline) == [1, 3]
+    assert delta.deleted_chapters == [4, 5]
+
+
+def test_commit_project_changes_bumps_revision_without_touching_updated_at(project_id):
+    async def _scenario():
+        async with AsyncSessionLocal() as session:
+            before = await session.get(NovelProject, project_id)
+            revision, updated_at = before.revision, before.updated_at
+        async with AsyncSessionLocal() as session:
+            await NovelService(session).commit_project_changes(project_id)
+        async with AsyncSessionLocal() as session:
+            after = await session.get(NovelProject, project_id)
+            return revision, updated_at, after.revision, after.updated_at
+
+    revision, updated_at, new_revision, new_updated_at = asyncio.run(_scenario())
+    assert new_revision == revision + 1
+    assert new_updated_at == updated_at
+
+
+def test_payload_cache_evicts_by_byte_budget():
+    cache = ProjectPayloadCache(max_bytes=10)
+    cache.set(("a", 1, "full"), b"1234")
+    cache.set(("b", 1, "full"), b"5678")
+    cache.get(("a", 1, "full"))
+    cache.set(("c", 1, "full"), b"90ab")
+    assert cache.get(("b", 1, "full")) is None
+    assert cache.get(("a", 1, "full")) == b"1234"
+    assert cache.get(("c", 1, "full")) == b"90ab"
+    assert cache._size == 8
+
+
+def test_payload_cache_skips_oversized_and_replaces_same_key():
+    cache = ProjectPayloadCache(max_bytes=4)
+    cache.set(("a", 1, "full"), b"too large")
+    assert cache.get(("a", 1, "full")) is None
+    cache.set(("a", 1, "full"), b"12")
+    cache.set(("a", 1, "full"), b"345")
+    assert cache.get(("a", 1, "full")) == b"345"
+    assert cache._size == 3
+
+
+def test_payload_cache_invalidate_drops_only_that_project():
+    cache = ProjectPayloadCache(max_bytes=100)
+    cache.set(("a", 1, "full"), b"x")
+    cache.set(("a", 1, "section:overview"), b"y")
+    cache.set(("b", 1, "full"), b"z")
+    cache.invalidate("a")
+    assert cache.get(("a", 1, "full")) is None
+    assert cache.get(("a", 1, "section:overview")) is None
+    assert cache.get(("b", 1, "full")) == b"z"
+    assert "a" not in cache._keys_by_project
+    assert cache._size == 1
+
+
+def test_cached_payload_is_keyed_by_revision(project_id, monkeypatch):
+    monkeypatch.setattr(novel_service, "project_payload_cache", ProjectPayloadCache(max_bytes=1 << 20))
+    builds = []
+
+    async def _scenario():
+        async with AsyncSessionLocal() as session:
+            service = NovelService(session)
+
+            async def _build():
+                builds.append(1)
+                return NovelProjectDelta(project_id=project_id, revision=len(builds))
+
+            first = await service.get_cached_payload(project_id, 1, "full", _build)
+            again = await service.get_cached_payload(project_id, 1, "full", _build)
+            newer = await service.get_cached_payload(project_id, 2, "full", _build)
+            return first, again, newer
+
+    first, again, newer = asyncio.run(_scenario())
+    assert first == again
+    assert newer != first
+    assert len(builds) == 2
+
+
+def test_project_writes_invalidate_cached_payloads(project_id, monkeypatch):
+    cache = ProjectPayloadCache(max_bytes=1 << 20)
+    monkeypatch.setattr(novel_service, "project_payload_cache", cache)
+    cache.set((project_id, 0, "full"), b"{}")
+
+    async def _write():
+        async with AsyncSessionLocal() as session:
+            await NovelService(session).commit_project_changes(project_id)
+
+    asyncio.run(_write())
+    assert cache.get((project_id, 0, "full")) is None
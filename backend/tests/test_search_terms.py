@@ -0,0 +1,39 @@
+from app.utils.search_terms import build_match_query, build_search_text, extract_terms
+
+
+def test_extract_terms_splits_cjk_into_bigrams():
+    assert extract_terms("苏瑶出剑") == ["苏瑶", "瑶出", "出剑"]
+
+
+def test_extract_terms_keeps_single_cjk_character():
+    assert extract_terms("剑") == ["剑"]
+
+
+def test_extract_terms_lowercases_words_and_drops_punctuation():
+    assert extract_terms("Hello, 林风！GPT4 来了") == ["hello", "林风", "gpt4", "来了"]
+
+
+def test_extract_terms_handles_empty_input():
+    assert extract_terms(None) == []
+    assert extract_terms("，。！") == []
+
+
+def test_build_search_text_joins_all_parts():
+    assert build_search_text("林风", None, "Sword") == "林风 sword"
+
+
+def test_build_match_query_deduplicates_and_quotes_terms():
+    assert build_match_query("林风林风", 10) == '"林风" OR "风林"'
+
+
+def test_build_match_query_respects_max_terms():
+    assert build_match_query("一二三四五", 2) == '"一二" OR "二三"'
+
+
+def test_build_match_query_quotes_fts_operators():
+    # 检索词总是加引号，用户文本中的 AND / NEAR 等不会被当作 FTS5 运算符
+    assert build_match_query("near AND or", 5) == '"near" OR "and" OR "or"'
+
+
+def test_build_match_query_empty_text():
+    assert build_match_query("", 5) == ""
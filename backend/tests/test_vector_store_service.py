@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.vector_store_service import RetrievalFilter, VectorStoreService
+
+
+def test_empty_filter_has_no_conditions():
+    assert RetrievalFilter().sql_conditions() == ("", {})
+
+
+def test_before_chapter_and_exclusions_are_parameterized():
+    conditions, params = RetrievalFilter(before_chapter=5, exclude_chapters=(2, 3)).sql_conditions()
+    assert conditions == (
+        " AND t.chapter_number < :before_chapter"
+        " AND t.chapter_number NOT IN (:exclude_0,:exclude_1)"
+    )
+    assert params == {"before_chapter": 5, "exclude_0": 2, "exclude_1": 3}
+
+
+def test_order_expression_without_recency_boost():
+    assert RetrievalFilter(before_chapter=5).order_expression() == ("distance", {})
+    # 未指定 before_chapter 时即使设置了权重也不加权
+    assert RetrievalFilter(recency_weight=0.2).order_expression() == ("distance", {})
+
+
+def test_rank_score_matches_recency_weighting():
+    chapter_filter = RetrievalFilter(before_chapter=10, recency_weight=0.2)
+    expression, params = chapter_filter.order_expression()
+    assert ":recency_weight" in expression
+    assert params == {"recency_weight": 0.2, "before_chapter": 10}
+    assert chapter_filter.rank_score(0.3, 9) == pytest.approx(0.3 + 0.2 * 1 / 10)
+    assert chapter_filter.rank_score(0.3, 1) == pytest.approx(0.3 + 0.2 * 9 / 10)
+
+
+def test_allows_mirrors_sql_conditions():
+    chapter_filter = RetrievalFilter(before_chapter=5, exclude_chapters=(2,))
+    assert [number for number in range(1, 7) if chapter_filter.allows(number)] == [1, 3, 4]
+
+
+class _FakeIndexClient:
+    """模拟 vector_top_k：按全局排名返回前 candidate_k 个近邻中属于本项目的行。"""
+
+    def __init__(self, project_positions):
+        self.rows = [
+            {
+                "id": f"row-{rank}",
+                "project_id": "p" if rank in project_positions else "other",
+                "chapter_number": 1,
+                "distance": rank / 1000,
+            }
+            for rank in range(200)
+        ]
+        self.candidate_ks = []
+
+    async def batch(self, statements):
+        results = []
+        for sql, params in statements:
+            matched = [row for row in self.rows if row["project_id"] == params["project_id"]]
+            if "COUNT(*)" in sql:
+                results.append([{"total": len(matched)}])
+            else:
+                self.candidate_ks.append(params["candidate_k"])
+                results.append([row for row in matched if int(row["id"].split("-")[1]) < params["candidate_k"]])
+        return results
+
+
+def _index_service(monkeypatch, project_positions):
+    monkeypatch.setattr(settings, "vector_index_oversample", 2)
+    monkeypatch.setattr(settings, "vector_index_max_candidates", 64)
+    service = VectorStoreService()
+    client = _FakeIndexClient(project_positions)
+    service._client = client
+    return service, client
+
+
+def test_index_query_widens_candidates_until_filled(monkeypatch):
+    service, client = _index_service(monkeypatch, {40, 41, 42, 43})
+    rows = asyncio.run(service._query_index("p", b"", {"rag_chunks": 3}))
+    assert [row["id"] for row in rows["rag_chunks"]] == ["row-40", "row-41", "row-42"]
+    assert client.candidate_ks == [6, 24, 64]
+    assert service.index_fallbacks == 0
+
+
+def test_index_query_stops_when_all_project_rows_found(monkeypatch):
+    service, client = _index_service(monkeypatch, {1})
+    rows = asyncio.run(service._query_index("p", b"", {"rag_chunks": 3}))
+    assert [row["id"] for row in rows["rag_chunks"]] == ["row-1"]
+    assert client.candidate_ks == [6]
+
+
+def test_index_query_falls_back_after_max_candidates(monkeypatch):
+    service, client = _index_service(monkeypatch, {150, 151, 152})
+    rows = asyncio.run(service._query_index("p", b"", {"rag_chunks": 3}))
+    assert rows == {}
+    assert client.candidate_ks == [6, 24, 64]
+    assert service.index_fallbacks == 1
+
+
+def test_migration_reports_chapters_with_dropped_vectors(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_db_url", f"file:{tmp_path / 'vectors.db'}")
+    monkeypatch.setattr(settings, "embedding_model_vector_size", None)
+    dropped = []
+
+    async def _on_vectors_dropped(chapters):
+        dropped.extend(chapters)
+
+    async def _scenario():
+        service = VectorStoreService()
+        service.on_vectors_dropped = _on_vectors_dropped
+        try:
+            await service.ensure_schema()
+            # 第 1 章的旧向量为 2 维，第 2 章与当前 3 维模型一致
+            for index, (chapter, dimension) in enumerate(((1, 2), (1, 2), (2, 3))):
+                await service._client.execute(
+                    "INSERT INTO rag_chunks (id, project_id, chapter_number, chunk_index, content, embedding) "
+                    "VALUES (:id, 'p', :chapter, 0, '正文', :embedding)",
+                    {
+                        "id": f"p:{chapter}:{index}",
+                        "chapter": chapter,
+                        "embedding": VectorStoreService._to_f32_blob([0.1] * dimension),
+                    },
+                )
+            assert await service._migrate_vector_column("rag_chunks", 3)
+            result = await service._client.execute("SELECT chapter_number FROM rag_chunks")
+            return [row["chapter_number"] for row in service._iter_rows(result)]
+        finally:
+            await service.close()
+
+    assert asyncio.run(_scenario()) == [2]
+    assert dropped == [("p", 1)]